@@ -0,0 +1,198 @@
+"""KLippel / SoundCheck 曲线导出的 FO 提取（共用模块）
+
+工作表按 values_only 方式只遍历一次，读成按列存储的 float 矩阵（非数值为 NaN），
+每列的最大值及其对应频率用一次向量化计算得到；两种仪器的差异（数据表、行范围、
+并列最大值的取舍、是否清空旧结果）由格式配置 PROFILES 描述。
+
+用法：
+    python FO提取.py KLippel E:\\System\\pic\\1.xlsx      # 单个文件，结果写回源文件的“FO提取”表
+    python FO提取.py SoundCheck E:\\System\\pic\\曲线      # 整个文件夹并行处理，结果汇总到一个工作簿
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import openpyxl
+
+FO_SHEET_NAME = 'FO提取'
+SUMMARY_FILE_NAME = 'FO提取汇总.xlsx'  # 文件夹模式的汇总工作簿（保存在该文件夹下）
+MAX_WORKERS = os.cpu_count() or 1
+
+# --- 格式配置 ---
+# sheet_name:    数据表名，None 表示活动工作表
+# max_row:       只读取前 max_row 行，None 表示读到最后一行
+# tie_break:     同一列出现多个最大值时，'min_freq' 取第一列（频率）最小的行（频率都不是数值时跳过该列），
+#                'first_row' 取最靠前的行
+# clear_output:  写回前是否清空 FO提取 表的旧内容
+PROFILES = {
+    'KLippel': {
+        'sheet_name': '原始数据',
+        'max_row': None,
+        'tie_break': 'min_freq',
+        'clear_output': True,
+    },
+    'SoundCheck': {
+        'sheet_name': None,
+        'max_row': 92,  # SoundCheck 导出固定为前92行
+        'tie_break': 'first_row',
+        'clear_output': False,
+    },
+}
+
+
+def get_data_sheet(wb, profile):
+    """按格式配置取数据表"""
+    sheet_name = profile['sheet_name']
+    if sheet_name is None:
+        return wb.active
+    if sheet_name not in wb.sheetnames:
+        raise ValueError(f"未找到名为 '{sheet_name}' 的工作表！")
+    return wb[sheet_name]
+
+
+def read_curve_matrix(ws, max_row=None):
+    """一次遍历工作表，返回(按列存储的 float 矩阵, 第一列原始值列表)
+
+    矩阵中非数值单元格为 NaN；第一列保留原始值，写回时与原脚本写入的内容一致。
+    """
+    rows = []
+    width = 0
+    for row in ws.iter_rows(min_row=1, max_row=max_row, values_only=True):
+        rows.append(row)
+        width = max(width, len(row))
+
+    matrix = np.full((len(rows), width), np.nan, order='F')
+    for r, row in enumerate(rows):
+        matrix[r, :len(row)] = [v if isinstance(v, (int, float)) else np.nan for v in row]
+
+    first_column = [row[0] if row else None for row in rows]
+    return matrix, first_column
+
+
+def find_fo_rows(matrix, tie_break='min_freq'):
+    """计算第2列起每列最大值所在的行，返回行号数组（0开始，找不到时为 -1）"""
+    if matrix.shape[0] == 0 or matrix.shape[1] < 2:
+        return np.empty(0, dtype=int)
+
+    freq = matrix[:, 0]
+    values = matrix[:, 1:]
+
+    has_value = ~np.isnan(values).all(axis=0)
+    col_max = np.max(np.where(np.isnan(values), -np.inf, values), axis=0)
+    is_max = (values == col_max) & has_value
+
+    if tie_break == 'min_freq':
+        freq_key = np.where(np.isnan(freq), np.inf, freq)
+        candidates = np.where(is_max, freq_key[:, None], np.inf)
+        rows = np.argmin(candidates, axis=0)
+        found = np.isfinite(candidates[rows, np.arange(values.shape[1])])
+    elif tie_break == 'first_row':
+        rows = np.argmax(is_max, axis=0)
+        found = has_value
+    else:
+        raise ValueError(f"未知的 tie_break 配置: {tie_break}")
+
+    return np.where(found, rows, -1)
+
+
+def extract_fo(ws, profile):
+    """提取工作表中每列最大值对应的第一列数值（按列顺序，跳过找不到的列）"""
+    matrix, first_column = read_curve_matrix(ws, profile['max_row'])
+    rows = find_fo_rows(matrix, profile['tie_break'])
+    return [first_column[row] for row in rows if row >= 0]
+
+
+def write_fo_sheet(wb, fo_values, clear_output=True):
+    """将 FO 值写入 FO提取 表的第一列"""
+    if FO_SHEET_NAME in wb.sheetnames:
+        ws_fo = wb[FO_SHEET_NAME]
+        if clear_output:
+            for row in ws_fo.iter_rows():
+                for cell in row:
+                    cell.value = None
+    else:
+        ws_fo = wb.create_sheet(title=FO_SHEET_NAME)
+
+    for write_row, value in enumerate(fo_values, start=1):
+        ws_fo.cell(row=write_row, column=1, value=value)
+
+
+def process_file(file_path, profile):
+    """单个文件：提取 FO 并写回源文件的 FO提取 表"""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(
+            f"未找到文件：{file_path}\n"
+            f"该目录下的文件列表为：{os.listdir(os.path.dirname(file_path) or '.')}"
+        )
+
+    wb = openpyxl.load_workbook(file_path)
+    fo_values = extract_fo(get_data_sheet(wb, profile), profile)
+    write_fo_sheet(wb, fo_values, profile['clear_output'])
+    wb.save(file_path)
+    return fo_values
+
+
+def read_file_fo(file_path, profile):
+    """进程池任务：以只读方式提取一个文件的 FO，返回(文件名, FO列表, 错误信息)"""
+    file_name = os.path.basename(file_path)
+    try:
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            return file_name, extract_fo(get_data_sheet(wb, profile), profile), None
+        finally:
+            wb.close()
+    except Exception as e:
+        return file_name, None, str(e)
+
+
+def process_folder(folder, profile, max_workers=MAX_WORKERS):
+    """文件夹：并行提取所有 xlsx 的 FO，每个文件一列写入汇总工作簿"""
+    files = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+             if name.endswith('.xlsx') and not name.startswith('~$') and name != SUMMARY_FILE_NAME]
+    if not files:
+        print(f"文件夹中没有 xlsx 文件：{folder}")
+        return None
+
+    workers = max(1, min(max_workers, len(files)))
+    print(f"共 {len(files)} 个文件，使用 {workers} 个进程提取")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(read_file_fo, files, [profile] * len(files)))
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = FO_SHEET_NAME
+    col = 1
+    for file_name, fo_values, error in results:
+        if error:
+            print(f"处理 {file_name} 失败：{error}")
+            continue
+        ws.cell(row=1, column=col, value=file_name)
+        for write_row, value in enumerate(fo_values, start=2):
+            ws.cell(row=write_row, column=col, value=value)
+        print(f"{file_name}：提取 {len(fo_values)} 个 FO")
+        col += 1
+
+    summary_path = os.path.join(folder, SUMMARY_FILE_NAME)
+    wb.save(summary_path)
+    return summary_path
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in PROFILES:
+        print(f"用法：python FO提取.py <{'|'.join(PROFILES)}> <文件或文件夹路径>")
+        return
+
+    profile = PROFILES[sys.argv[1]]
+    path = sys.argv[2]
+    if os.path.isdir(path):
+        summary_path = process_folder(path, profile)
+        if summary_path:
+            print(f"处理完成！结果已汇总到：{summary_path}")
+    else:
+        fo_values = process_file(path, profile)
+        print(f"处理完成！已将 {len(fo_values)} 个提取结果写入 '{FO_SHEET_NAME}' 表的第一列。")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,174 @@
+import time
+
+import numpy as np
 from openpyxl import load_workbook
-from itertools import combinations
-from math import comb
 
 # --- 配置区 ---
 file_path     = r"E:\System\desktop\工作簿1.xlsx"  # Excel 文件路径
 sheet_name    = None       # None 表示第一个 sheet，否则写表名
 select_k      = 20         # 要选出的列数
-enum_cutoff   = 20         # 当总列数 <= 该值且 C(N, k) 合理时使用全枚举
-
-# --- 加载工作簿 & 表格 ---
-wb = load_workbook(file_path, data_only=True)
-ws = wb[sheet_name] if sheet_name else wb.active
-
-# --- 读取第一行标签 & 数据 ---
-labels = [cell.value for cell in ws[1]]      # 0-based 列序号对应的“标签”
-n_cols = ws.max_column
-n_rows = ws.max_row - 1                      # 排除表头
-# 将每列的数值读成列表；空或非数值按 0 处理
-cols = []
-for c in range(1, n_cols+1):
-    col_data = []
-    for r in range(2, ws.max_row+1):
-        v = ws.cell(r, c).value
-        col_data.append(v if isinstance(v, (int, float)) else 0)
-    cols.append(col_data)
-
-# --- 计算给定一组列索引 combo 的“总离散度” ---
-def total_dispersion(combo):
+search_mode   = "auto"     # "exact" 分支定界精确搜索；"beam" 束搜索；"greedy" 贪心；"auto" 先束搜索再精确搜索
+beam_width    = 16         # 束搜索每一步保留的候选组合数（1 即为贪心）
+time_budget   = 60         # 精确搜索的时间上限（秒），超时返回当前最优解
+
+
+# --- 读取数据 ---
+def load_matrix(file_path, sheet_name=None):
+    """读取第一行标签和数据矩阵（行 × 列），空或非数值按 0 处理"""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    ws = wb[sheet_name] if sheet_name else wb.active
+    rows = list(ws.iter_rows(values_only=True))
+    wb.close()
+
+    n_cols = max((len(row) for row in rows), default=0)
+    labels = list(rows[0]) + [None] * (n_cols - len(rows[0])) if rows else []
+    data = np.zeros((max(len(rows) - 1, 0), n_cols))
+    for r, row in enumerate(rows[1:]):
+        data[r, :len(row)] = [v if isinstance(v, (int, float)) else 0 for v in row]
+    return labels, data
+
+
+# --- 离散度计算 ---
+def total_dispersion(data, combo):
     """对 combo（列索引元组），累加每行的 max-min"""
-    s = 0
-    for row_idx in range(n_rows):
-        row_vals = [cols[c][row_idx] for c in combo]
-        s += (max(row_vals) - min(row_vals))
-    return s
-
-# --- 主流程：全枚举 or 贪心启发 ---
-best_set, best_score = None, float('inf')
-
-# 决定是否做全枚举
-if n_cols <= enum_cutoff and comb(n_cols, select_k) <= 5e6:
-    # 全枚举
-    for combo in combinations(range(n_cols), select_k):
-        disp = total_dispersion(combo)
-        if disp < best_score:
-            best_score, best_set = disp, combo
-else:
-    # 贪心启发式
-    remaining = set(range(n_cols))
-    # 初始：选一对离散度最小的两列
-    min_pair = min(
-        ((i,j) for i in range(n_cols) for j in range(i+1, n_cols)),
-        key=lambda p: total_dispersion(p)
-    )
-    best_set = set(min_pair)
-    remaining -= best_set
-    # 逐步加入：每次从剩余列中选一个，使加入后对当前集合的总离散度增量最小
-    while len(best_set) < select_k:
-        cand, cand_inc = None, float('inf')
-        for j in remaining:
-            inc = total_dispersion(tuple(sorted(best_set | {j})))
-            if inc < cand_inc:
-                cand_inc, cand = inc, j
-        best_set.add(cand)
-        remaining.remove(cand)
-    best_set = tuple(sorted(best_set))
-    best_score = total_dispersion(best_set)
-
-# --- 输出 ---
-print("选出的列索引 (0-based)：", best_set)
-print("对应第一行标签：", [labels[i] for i in best_set])
-print("总离散度（各行 max-min 之和）：", best_score)
+    sub = data[:, list(combo)]
+    return float((sub.max(axis=1) - sub.min(axis=1)).sum())
+
+
+def extend_scores(data, row_max, row_min, candidates):
+    """当前组合（各行最大值 row_max、最小值 row_min）分别加入每个候选列后的总离散度"""
+    sub = data[:, candidates]
+    return (np.maximum(row_max[:, None], sub) - np.minimum(row_min[:, None], sub)).sum(axis=0)
+
+
+def pair_dispersion(data):
+    """两两列之间的离散度矩阵（两列时每行 max-min 即差的绝对值）"""
+    n_cols = data.shape[1]
+    pairs = np.empty((n_cols, n_cols))
+    for i in range(n_cols):
+        pairs[i] = np.abs(data - data[:, i:i + 1]).sum(axis=0)
+    return pairs
+
+
+# --- 束搜索 / 贪心 ---
+def beam_search(data, k, width=1):
+    """从离散度最小的若干列对出发，每步为每个组合加入一列，只保留总离散度最小的 width 个组合
+
+    width=1 时与原先的贪心启发式一致：先选离散度最小的一对，再逐个加入使总离散度最小的列。
+    各行的 max/min 随组合一起保存，加入一列只需 O(行数)。
+    """
+    n_cols = data.shape[1]
+    pairs = pair_dispersion(data)
+    upper = np.triu_indices(n_cols, 1)
+    order = np.argsort(pairs[upper], kind='stable')[:width]
+
+    beam = []
+    for pos in order:
+        i, j = upper[0][pos], upper[1][pos]
+        beam.append(((i, j), np.maximum(data[:, i], data[:, j]), np.minimum(data[:, i], data[:, j]),
+                     pairs[i, j]))
+
+    all_cols = np.arange(n_cols)
+    for _ in range(k - 2):
+        expanded = {}
+        for combo, row_max, row_min, _ in beam:
+            candidates = np.setdiff1d(all_cols, combo)
+            scores = extend_scores(data, row_max, row_min, candidates)
+            for pos in np.argsort(scores, kind='stable')[:width]:
+                j = candidates[pos]
+                key = tuple(sorted(combo + (j,)))
+                if key not in expanded or scores[pos] < expanded[key][3]:
+                    expanded[key] = (key, np.maximum(row_max, data[:, j]), np.minimum(row_min, data[:, j]),
+                                     scores[pos])
+        beam = sorted(expanded.values(), key=lambda state: state[3])[:width]
+
+    best_set, _, _, best_score = beam[0]
+    return tuple(int(c) for c in best_set), float(best_score)
+
+
+# --- 分支定界精确搜索 ---
+def branch_and_bound(data, k, incumbent=None, time_limit=None):
+    """分支定界精确搜索，返回(最优组合, 总离散度, 是否已证明最优)
+
+    下界：还需加入 r 列时，最终离散度不小于“当前组合加入单个候选列后的离散度”中第 r 小的值
+    （加入列不会使任何一行的 max-min 变小）。incumbent 为初始上界（如束搜索的结果）。
+    """
+    n_cols = data.shape[1]
+    best_set, best_score = incumbent if incumbent else (None, float('inf'))
+    deadline = time.time() + time_limit if time_limit else None
+    timed_out = False
+
+    def search(combo, row_max, row_min, candidates):
+        nonlocal best_set, best_score, timed_out
+        remaining = k - len(combo)
+        if len(candidates) < remaining:
+            return
+        scores = extend_scores(data, row_max, row_min, candidates)
+        order = np.argsort(scores, kind='stable')
+        if scores[order[remaining - 1]] >= best_score:
+            return
+
+        if remaining == 1:
+            best_set, best_score = tuple(sorted(combo + (int(candidates[order[0]]),))), float(scores[order[0]])
+            return
+
+        for pos, idx in enumerate(order):
+            if scores[idx] >= best_score or len(order) - pos - 1 < remaining - 1:
+                break
+            if deadline and time.time() > deadline:
+                timed_out = True
+                return
+            j = candidates[idx]
+            search(combo + (int(j),), np.maximum(row_max, data[:, j]), np.minimum(row_min, data[:, j]),
+                   candidates[order[pos + 1:]])
+
+    # 第一列按“与其最接近的 k-1 列的离散度之和”排序，先搜索更有希望的分支
+    pairs = pair_dispersion(data)
+    first_order = np.argsort(np.sort(pairs, axis=1)[:, 1:k].sum(axis=1), kind='stable')
+    for pos, i in enumerate(first_order):
+        if timed_out:
+            break
+        search((int(i),), data[:, i].copy(), data[:, i].copy(), first_order[pos + 1:])
+
+    return best_set, best_score, not timed_out
+
+
+# --- 主流程 ---
+def main():
+    labels, data = load_matrix(file_path, sheet_name)
+    n_cols = data.shape[1]
+    if not 1 <= select_k <= n_cols:
+        raise ValueError(f"select_k={select_k} 超出列数范围（共 {n_cols} 列）")
+
+    start = time.time()
+    proven = True
+    if select_k == 1:
+        best_set, best_score = (0,), 0.0
+    elif search_mode == "greedy":
+        best_set, best_score = beam_search(data, select_k, 1)
+        proven = False
+    elif search_mode == "beam":
+        best_set, best_score = beam_search(data, select_k, beam_width)
+        proven = False
+    elif search_mode == "exact":
+        # 贪心结果作为初始上界，精确搜索在找到第一个完整组合前超时也有结果可输出
+        incumbent = beam_search(data, select_k, 1)
+        best_set, best_score, proven = branch_and_bound(data, select_k, incumbent, time_budget)
+    elif search_mode == "auto":
+        incumbent = beam_search(data, select_k, beam_width)
+        print("束搜索结果：", incumbent[1], f"（{time.time() - start:.2f}秒）")
+        best_set, best_score, proven = branch_and_bound(data, select_k, incumbent, time_budget)
+    else:
+        raise ValueError(f"未知的 search_mode: {search_mode}")
+
+    # --- 输出 ---
+    print("选出的列索引 (0-based)：", best_set)
+    print("对应第一行标签：", [labels[i] for i in best_set])
+    print("总离散度（各行 max-min 之和）：", best_score)
+    if search_mode in ("exact", "auto"):
+        print("已证明为最优解" if proven else f"精确搜索超过 {time_budget} 秒，结果为当前找到的最优解")
+    print(f"耗时：{time.time() - start:.2f}秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from copy import copy
+
 from openpyxl import load_workbook
 
 # 加载工作簿
@@ -7,38 +9,66 @@ wb = load_workbook(file_path)
 # 获取工作表列表
 sheetnames = wb.sheetnames
 
-# 记录所有需要删除的列位置（以列号为基准）
-# 格式: {sheetname: set([col1, col2, ...])}
-delete_map = {name: set() for name in sheetnames}
 
-# 处理每个工作表
-for current_sheet in sheetnames:
-    ws = wb[current_sheet]
+def find_duplicate_columns(ws):
+    """返回与前面某一列完全相同的列号集合（保留最前面一个）
+
+    按行读取一次后转置为列，以列的值元组做哈希分组；哈希相同时再逐值比较确认。
+    """
+    columns = zip(*ws.iter_rows(values_only=True))
+    groups = {}  # 哈希值 -> 该哈希下已保留的列（值元组）
+    duplicates = set()
+    for col_idx, column in enumerate(columns, start=1):
+        kept = groups.setdefault(hash(column), [])
+        if any(column == other for other in kept):
+            duplicates.add(col_idx)
+        else:
+            kept.append(column)
+    return duplicates
+
+
+def rebuild_sheet(ws, delete_cols):
+    """删除指定列：保留的列一次性左移到位，最后整体删除尾部多出的列"""
     max_col = ws.max_column
-    max_row = ws.max_row
+    delete_cols = {col for col in delete_cols if col <= max_col}
+    if not delete_cols:
+        return
 
-    # 提取每列数据
-    columns = []
+    # 旧列号 -> 新列号（只记录需要移动的列）
+    moves = {}
+    new_col = 0
     for col in range(1, max_col + 1):
-        col_data = [ws.cell(row=row, column=col).value for row in range(1, max_row + 1)]
-        columns.append(col_data)
-
-    # 查找重复列（保留最前面一个）
-    for i in range(len(columns)):
-        for j in range(i + 1, len(columns)):
-            if columns[i] == columns[j]:
-                # 当前表删除列 j+1
-                delete_map[current_sheet].add(j + 1)
-                # 其余表也删除对应列号
-                for other_sheet in sheetnames:
-                    if other_sheet != current_sheet:
-                        delete_map[other_sheet].add(j + 1)
-
-# 对每个表执行删除操作（按列号倒序）
+        if col in delete_cols:
+            continue
+        new_col += 1
+        if new_col != col:
+            moves[col] = new_col
+
+    # 按列号从小到大处理，目标列都在源列左侧且已处理过，不会覆盖尚未移动的数据
+    for row in ws.iter_rows():
+        for cell in row:
+            target_col = moves.get(cell.column)
+            if target_col is None:
+                continue
+            target = ws.cell(row=cell.row, column=target_col)
+            target.value = cell.value
+            target._style = copy(cell._style)
+            target.hyperlink = copy(cell.hyperlink) if cell.hyperlink else None
+            target.comment = copy(cell.comment) if cell.comment else None
+
+    ws.delete_cols(new_col + 1, max_col - new_col)
+
+
+# 处理每个工作表，查找重复列（保留最前面一个）；任一表中重复的列号在所有表中统一删除
+delete_cols = set()
+for current_sheet in sheetnames:
+    duplicates = find_duplicate_columns(wb[current_sheet])
+    print(f"工作表 '{current_sheet}' 中找到 {len(duplicates)} 个重复列")
+    delete_cols |= duplicates
+
+# 每个表只重建一次
 for sheetname in sheetnames:
-    ws = wb[sheetname]
-    for col_idx in sorted(delete_map[sheetname], reverse=True):
-        ws.delete_cols(col_idx)
+    rebuild_sheet(wb[sheetname], delete_cols)
 
 # 保存
 wb.save(file_path)
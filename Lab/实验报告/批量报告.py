@@ -0,0 +1,245 @@
+"""实验报告批量生成（数据处理 → 数据写入 → 报告写入）
+
+一次处理多个报告编号，或老化实验记录中所有尚未生成报告的记录。
+老化实验记录索引和配置文件只加载一次；各报告的数据计算作为独立任务分发到进程池并行执行
+（原始数据在每个工作进程中只读取一次），工作簿的写入和保存按报告顺序串行进行，最后输出各阶段耗时。
+SYS报告每个报告都会覆盖写入同一批文件，因此每个报告写完后将SYS文件复制到
+批量SYS报告\\<报告编号> 目录下保留一份副本。
+"""
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+from openpyxl import load_workbook
+
+import 数据处理
+import 数据写入
+import 报告写入
+from 记录索引 import load_record_index
+from 配置注册表 import load_raw_config
+
+LAB_RECORD_FILE = 数据处理.LAB_RECORD_FILE
+REPORT_TEMPLATE = 报告写入.REPORT_TEMPLATE
+REPORT_OUTPUT_DIR = os.path.dirname(REPORT_TEMPLATE)  # 试验报告的输出目录
+SYS_COPY_DIR = os.path.join(数据写入.EXCEL_DIR, "批量SYS报告")  # 各报告SYS文件副本的保存目录
+MAX_WORKERS = os.cpu_count() or 1  # 数据计算进程数上限
+
+
+def parse_report_ids(text):
+    """解析用户输入的报告编号列表（逗号、分号或空白分隔）"""
+    report_ids = [part for part in re.split(r'[,，;；\s]+', text.strip()) if part]
+    return list(dict.fromkeys(report_ids))
+
+
+def is_report_file(stem, report_id):
+    """判断试验报告文件名（不含扩展名）是否属于该报告编号
+
+    报告文件名为 B3-L3-J3-L2，以"-报告编号"结尾（L2为N列的报告编号），只比较结尾部分，
+    避免R1误匹配...-R10.xlsx或出现在料号、日期中的编号。
+    """
+    return stem == report_id or stem.endswith(f"-{report_id}")
+
+
+def find_pending_reports():
+    """返回老化实验记录中尚未生成试验报告的报告编号（没有以该编号结尾的报告文件即视为未生成）"""
+    index = load_record_index(LAB_RECORD_FILE)
+    existing_stems = [os.path.splitext(file)[0] for file in os.listdir(REPORT_OUTPUT_DIR) if file.endswith('.xlsx')]
+
+    # 按报告编号在老化实验记录中首次出现的顺序排列
+    report_ids = sorted(index['report_rows'], key=lambda report_id: index['report_rows'][report_id][0])
+    return [report_id for report_id in report_ids
+            if not any(is_report_file(stem, str(report_id)) for stem in existing_stems)]
+
+
+def get_report_ids():
+    """从命令行参数或用户输入获取报告编号列表，输入all时处理所有未生成报告的记录"""
+    text = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else input(
+        "请输入报告编号（多个编号用逗号或空格分隔，输入all处理所有未生成报告的记录）: ")
+
+    if text.strip().lower() == 'all':
+        report_ids = find_pending_reports()
+        print(f"老化实验记录中共有 {len(report_ids)} 个未生成报告的记录")
+        return report_ids
+    return parse_report_ids(text)
+
+
+loaded_sheets = {}  # 工作进程内已读取的数据文件：路径 -> 原始数据
+
+
+def compute_report(report_id, file_path, config, spl_targets):
+    """进程池任务：计算一个报告的各阶段结果，返回 (各阶段结果, 错误信息)
+
+    数据文件在每个工作进程中只读取一次并保留在进程内，任务参数只有配置，不用为每个报告传递原始数据。
+    """
+    try:
+        if file_path not in loaded_sheets:
+            loaded_sheets[file_path] = 数据处理.load_raw_sheets(file_path)
+    except Exception as e:
+        return None, f"读取数据文件失败: {e}"
+    try:
+        print(f"\n========== 计算报告 {report_id} 的数据 ==========")
+        return 数据处理.compute_stage_values(loaded_sheets[file_path], config, spl_targets), None
+    except Exception as e:
+        return None, f"计算数据失败: {e}"
+
+
+def save_sys_copies(report_id, excel_files):
+    """将刚写入的SYS报告复制到该报告编号的副本目录（下一个报告会覆盖原文件）"""
+    report_dir = os.path.join(SYS_COPY_DIR, re.sub(r'[\\/:*?"<>|\r\n\t]', '', str(report_id)))
+    os.makedirs(report_dir, exist_ok=True)
+    for file in excel_files:
+        shutil.copy2(file, os.path.join(report_dir, os.path.basename(file)))
+    print(f"已将 {len(excel_files)} 个SYS报告复制到: {report_dir}")
+
+
+def prepare_reports(report_ids):
+    """为每个报告查找配置、单元格数据和老化实验记录，返回可处理的报告列表和失败原因"""
+    reports = []
+    failures = {}
+    for report_id in report_ids:
+        print(f"\n========== 准备报告: {report_id} ==========")
+        try:
+            config_file_path, config, spl_targets = 数据处理.load_report_settings(report_id)
+            report_data = 报告写入.find_report_data(report_id, LAB_RECORD_FILE)
+            if report_data is None:
+                raise ValueError("老化实验记录中未找到该报告编号")
+            raw_config = load_raw_config(config_file_path) or {}
+            reports.append({
+                'report_id': report_id,
+                'config': config,
+                'spl_targets': spl_targets,
+                'cell_data': 数据写入.parse_cell_data(raw_config),
+                'report_data': report_data,
+            })
+        except Exception as e:
+            print(f"准备报告 {report_id} 时出错: {e}")
+            failures[report_id] = str(e)
+    return reports, failures
+
+
+def compute_reports(reports, failures):
+    """在进程池中并行计算各报告的结果
+
+    每个报告的计算作为独立任务提交，即使所有报告共用同一个IMP数据.xlsx也能分散到多个进程；
+    数据文件由工作进程自己读取，每个进程每个文件只读取一次。
+    """
+    file_count = len({report['config']['FILE_PATH'] for report in reports})
+    stage_values = {}
+    workers = max(1, min(MAX_WORKERS, len(reports)))
+    print(f"\n共 {file_count} 个数据文件、{len(reports)} 个报告，使用 {workers} 个进程计算")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(compute_report, report['report_id'], report['config']['FILE_PATH'],
+                                   report['config'], report['spl_targets']): report['report_id']
+                   for report in reports}
+        for future, report_id in futures.items():
+            values, error = future.result()
+            if error:
+                print(f"报告 {report_id} {error}")
+                failures[report_id] = error
+            else:
+                stage_values[report_id] = values
+    return stage_values
+
+
+def save_reports(reports, stage_values, failures, timings):
+    """按报告顺序串行写入并保存：数据处理结果 → SYS报告 → 试验报告"""
+    excel_files = 数据写入.find_excel_files(数据写入.EXCEL_DIR, 数据写入.SEARCH_TEXT)
+    print(f"\n找到 {len(excel_files)} 个包含 '{数据写入.SEARCH_TEXT}' 的Excel文件")
+
+    data_workbooks = {}  # 数据文件路径 -> 已加载的工作簿（多个报告共用时只加载一次）
+    source_blocks = None  # 数据写入的源数据（与数据文件不同时只读取一次）
+
+    for report in reports:
+        report_id = report['report_id']
+        if report_id not in stage_values:
+            continue
+        print(f"\n========== 写入报告: {report_id} ==========")
+        file_path = report['config']['FILE_PATH']
+        errors = []
+
+        try:
+            # 数据处理：写入ACR/Fb/SPL/THD工作表并保存
+            start = time.time()
+            if file_path not in data_workbooks:
+                data_workbooks[file_path] = openpyxl.load_workbook(file_path)
+            wb = data_workbooks[file_path]
+            数据处理.write_stage_values(wb, stage_values[report_id])
+            数据处理.save_workbook(wb, file_path)
+            timings['数据处理写入'] += time.time() - start
+
+            # 数据写入：将结果复制到所有SYS报告
+            start = time.time()
+            if not report['cell_data']:
+                print("配置文件中未找到CELL_DATA配置，跳过数据写入")
+            else:
+                if os.path.normcase(os.path.abspath(file_path)) == os.path.normcase(
+                        os.path.abspath(数据写入.SOURCE_FILE)):
+                    # 源数据就是刚写入的工作簿，直接从内存读取
+                    report_source_blocks = 数据写入.load_source_blocks(wb)
+                else:
+                    if source_blocks is None:
+                        source_blocks = 数据写入.load_source_blocks(
+                            load_workbook(数据写入.SOURCE_FILE, data_only=True))
+                    report_source_blocks = source_blocks
+                written = 数据写入.write_excel_files(excel_files, report['cell_data'], report_source_blocks)
+                if written < len(excel_files):
+                    errors.append(f"SYS报告写入失败 {len(excel_files) - written}/{len(excel_files)} 个")
+                else:
+                    save_sys_copies(report_id, excel_files)
+            timings['数据写入'] += time.time() - start
+
+            # 报告写入：生成试验报告
+            start = time.time()
+            if not 报告写入.write_to_report_template(report['report_data'], REPORT_TEMPLATE):
+                errors.append("试验报告写入失败")
+            timings['报告写入'] += time.time() - start
+
+        except Exception as e:
+            print(f"写入报告 {report_id} 时出错: {e}")
+            errors.append(f"写入失败: {e}")
+
+        if errors:
+            failures[report_id] = "；".join(errors)
+
+
+def main():
+    report_ids = get_report_ids()
+    if not report_ids:
+        print("没有需要处理的报告编号")
+        return
+
+    print(f"本次共处理 {len(report_ids)} 个报告: {report_ids}")
+    print(f"注意: SYS报告会被每个报告依次覆盖，各报告的SYS文件副本保存在 {SYS_COPY_DIR}")
+    timings = dict.fromkeys(['查找配置', '数据计算', '数据处理写入', '数据写入', '报告写入'], 0.0)
+    total_start = time.time()
+
+    start = time.time()
+    reports, failures = prepare_reports(report_ids)
+    timings['查找配置'] = time.time() - start
+
+    start = time.time()
+    stage_values = compute_reports(reports, failures) if reports else {}
+    timings['数据计算'] = time.time() - start
+
+    save_reports(reports, stage_values, failures, timings)
+
+    # 输出汇总
+    print("\n========== 批量处理完成 ==========")
+    succeeded = [report_id for report_id in report_ids if report_id not in failures]
+    print(f"成功: {len(succeeded)} 个，失败: {len(failures)} 个")
+    print(f"SYS报告中保留的是最后一个报告的数据，各报告的SYS文件副本见: {SYS_COPY_DIR}")
+    for report_id, reason in failures.items():
+        print(f"  {report_id}: {reason}")
+
+    print("各阶段耗时:")
+    for stage, seconds in timings.items():
+        print(f"  {stage}: {seconds:.2f}秒")
+    print(f"  总耗时: {time.time() - total_start:.2f}秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,27 @@ import openpyxl
 from openpyxl.utils import get_column_letter
 import os
 from datetime import datetime, timedelta
+from 记录索引 import lookup_report
+
+# 文件路径配置
+LAB_RECORD_FILE = r"E:\System\pic\A报告\老化实验记录.xlsx"
+REPORT_TEMPLATE = r"E:\System\pic\A报告\试验报告.xlsx"
 
 
 def find_report_data(report_id, lab_record_file):
     """在老化实验记录中查找报告ID对应的数据行"""
     try:
-        print(f"正在读取老化实验记录: {lab_record_file}")
-        df = pd.read_excel(lab_record_file)
-
-        # 查找N列中匹配报告ID的行
-        report_rows = df[df.iloc[:, 13].astype(str).str.strip() == report_id]
+        # 通过老化实验记录索引查找N列中匹配报告ID的行（记录文件未变化时不重新解析Excel）
+        report_rows = lookup_report(report_id, lab_record_file)
 
-        if report_rows.empty:
+        if not report_rows:
             print(f"未找到报告编号为 '{report_id}' 的记录")
             return None
 
         if len(report_rows) > 1:
             print(f"警告: 找到多条报告编号为 '{report_id}' 的记录，仅使用第一条")
 
-        return report_rows.iloc[0]
+        return report_rows[0]
 
     except Exception as e:
         print(f"读取老化实验记录时出错: {e}")
@@ -96,7 +98,7 @@ def calculate_time_difference(ws):
 
 
 def write_to_report_template(report_data, template_file):
-    """将提取的数据写入到试验报告模板中"""
+    """将提取的数据写入到试验报告模板中，成功保存时返回True"""
     try:
         os.makedirs(os.path.dirname(template_file), exist_ok=True)
         print(f"正在打开试验报告模板: {template_file}")
@@ -214,16 +216,14 @@ def write_to_report_template(report_data, template_file):
         # 保存修改后的模板
         wb.save(output_file)
         print(f"试验报告已保存至: {output_file}")
+        return True
 
     except Exception as e:
         print(f"写入试验报告时出错: {e}")
+        return False
 
 
 def main():
-    # 文件路径配置
-    LAB_RECORD_FILE = r"E:\System\pic\A报告\老化实验记录.xlsx"
-    REPORT_TEMPLATE = r"E:\System\pic\A报告\试验报告.xlsx"
-
     # 获取用户输入的报告编号
     report_id = input("请输入报告编号: ").strip()
     if not report_id:
@@ -236,9 +236,8 @@ def main():
         return
 
     # 写入报告模板
-    write_to_report_template(report_data, REPORT_TEMPLATE)
-
-    print("报告生成完成!")
+    if write_to_report_template(report_data, REPORT_TEMPLATE):
+        print("报告生成完成!")
 
 
 if __name__ == "__main__":
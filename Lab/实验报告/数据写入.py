@@ -1,7 +1,12 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pandas as pd
 from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, column_index_from_string
+from openpyxl.utils.cell import coordinate_from_string
+from 记录索引 import search_report, I_COL
+from 配置注册表 import match_config_files, load_raw_config
 
 # 配置参数 - 方便修改
 EXCEL_DIR = r"E:\System\pic\A报告"  # Excel文件所在目录
@@ -9,6 +14,7 @@ SEARCH_TEXT = "SYS"  # 文件名中要包含的文本
 SOURCE_FILE = r"E:\System\pic\A报告\IMP数据.xlsx"  # 源数据文件路径
 CONFIG_DIR = r"E:\System\pic\A报告\模板\配置文件"  # 配置文件目录
 LAB_RECORD_FILE = r"E:\System\pic\A报告\老化实验记录.xlsx"  # 老化实验记录文件
+MAX_WORKERS = os.cpu_count() or 1  # 并行处理Excel文件的进程数上限
 
 # 数据映射：源工作表 -> (起始单元格)
 SHEET_MAPPING = {
@@ -19,25 +25,6 @@ SHEET_MAPPING = {
 }
 
 
-def read_config(file_path):
-    """读取配置文件并返回配置字典"""
-    config = {}
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                # 跳过注释行和空行
-                if line.startswith('#') or not line:
-                    continue
-                # 解析配置项
-                key, value = line.split('=', 1)
-                config[key.strip()] = value.strip()
-        return config
-    except Exception as e:
-        print(f"读取配置文件时发生错误: {e}")
-        return None
-
-
 def parse_cell_data(config):
     """从配置中解析CELL_DATA"""
     cell_data = {}
@@ -87,36 +74,19 @@ def find_excel_files(directory, search_text):
 def find_config_file(report_id):
     """在老化实验记录中查找报告编号并返回对应的配置文件路径"""
     try:
-        # 读取老化实验记录文件
-        print(f"正在读取老化实验记录文件: {LAB_RECORD_FILE}")
-        df = pd.read_excel(LAB_RECORD_FILE)
-
-        # 假设报告编号在第N列，这里遍历所有列查找
-        found = False
-        report_col = None
-
-        # 从最后一行开始向上查找
-        for col in df.columns:
-            for row_idx in reversed(df.index):
-                cell_value = df.at[row_idx, col]
-                if pd.notna(cell_value) and str(report_id) in str(cell_value):
-                    report_col = col
-                    found = True
-                    break
-            if found:
-                break
-
-        if not found:
+        # 通过老化实验记录索引查找报告编号（记录文件未变化时不重新解析Excel）
+        report_row, report_col = search_report(report_id, LAB_RECORD_FILE)
+
+        if report_row is None:
             raise ValueError(f"在老化实验记录中未找到报告编号: {report_id}")
 
         print(f"找到报告编号 '{report_id}' 在列: {report_col}")
 
         # 获取对应的第I列单元格内容
-        i_col_idx = 8  # 假设I列是第9列(索引为8)，根据实际情况调整
-        if i_col_idx >= len(df.columns):
+        if I_COL >= len(report_row):
             raise ValueError(f"未找到第I列数据")
 
-        cell_value = df.at[row_idx, df.columns[i_col_idx]]
+        cell_value = report_row.iloc[I_COL]
         if pd.isna(cell_value):
             raise ValueError(f"第I列对应单元格内容为空")
 
@@ -128,42 +98,8 @@ def find_config_file(report_id):
 
         print(f"从第I列获取的有效关键字: {parts}")
 
-        # 在配置文件目录中查找匹配的配置文件
-        config_files = os.listdir(CONFIG_DIR)
-        matched_files = []
-
-        # 为每个关键字查找匹配的配置文件
-        for part in parts:
-            part_matched = False
-            # 尝试匹配包含所有关键字的单个配置文件
-            combined_keywords = part
-            for file in config_files:
-                if all(keyword.strip() in file for keyword in combined_keywords.split('；')) and file.endswith('.txt'):
-                    matched_files.append(os.path.join(CONFIG_DIR, file))
-                    part_matched = True
-                    print(f"  找到匹配的配置文件: {file}，匹配关键字: {combined_keywords}")
-                    break  # 找到一个匹配项后就退出循环
-
-            # 如果没有找到组合匹配，则尝试单独匹配每个关键字
-            if not part_matched:
-                for keyword in combined_keywords.split('；'):
-                    keyword = keyword.strip()
-                    if not keyword:
-                        continue
-                    for file in config_files:
-                        if keyword in file and file.endswith('.txt'):
-                            matched_files.append(os.path.join(CONFIG_DIR, file))
-                            part_matched = True
-                            print(f"  找到匹配的配置文件: {file}，匹配关键字: {keyword}")
-                            break  # 找到一个匹配项后就退出循环
-                    if part_matched:
-                        break  # 找到一个关键字匹配后就不再检查其他关键字
-
-            if not part_matched:
-                print(f"  警告: 未找到与关键字 '{part}' 匹配的配置文件")
-
-        # 移除重复的文件路径
-        matched_files = list(dict.fromkeys(matched_files))
+        # 通过配置注册表的文件名索引查找匹配的配置文件
+        matched_files = match_config_files(parts, CONFIG_DIR)
 
         if not matched_files:
             raise ValueError(f"未找到匹配的配置文件，关键字: {parts}")
@@ -180,111 +116,110 @@ def find_config_file(report_id):
         return None
 
 
-def get_used_range(ws):
-    """获取工作表的实际使用范围（非空单元格范围）"""
-    min_row = ws.max_row
-    max_row = 1
-    min_col = ws.max_column
-    max_col = 1
-
-    for row in ws.iter_rows():
-        for cell in row:
-            if cell.value is not None:
-                if cell.row < min_row:
-                    min_row = cell.row
-                if cell.row > max_row:
-                    max_row = cell.row
-                if cell.column < min_col:
-                    min_col = cell.column
-                if cell.column > max_col:
-                    max_col = cell.column
-
-    # 如果没有找到任何数据，返回默认值
-    if min_row > max_row:
-        min_row = 1
-        max_row = 0
-    if min_col > max_col:
-        min_col = 1
-        max_col = 0
-
-    return min_row, max_row, min_col, max_col
-
-
-def copy_sheet_data(source_wb, source_sheet_name, target_wb, start_cell):
-    """将源工作表的非空数据复制到目标工作簿的第一个工作表的指定位置"""
-    # 检查源工作表是否存在
-    if source_sheet_name not in source_wb:
-        print(f"源文件中不存在工作表: {source_sheet_name}")
-        return
-
-    # 获取目标工作簿的第一个工作表
-    target_ws = target_wb.active
-    source_ws = source_wb[source_sheet_name]
-
-    # 解析起始单元格（例如：B12 -> 列索引=2, 行索引=12）
-    start_col_letter = start_cell[0]
-    start_row = int(start_cell[1:])
-    start_col = ord(start_col_letter) - 64  # ASCII值减去64 (A=1, B=2...)
+def read_source_block(ws):
+    """一次性读取源工作表的值矩阵，返回(起始行, 起始列, 值矩阵)，没有非空数据时返回None"""
+    rows = [list(row) for row in ws.iter_rows(values_only=True)]
 
-    # 获取源工作表的实际使用范围（只处理有数据的单元格）
-    min_row, max_row, min_col, max_col = get_used_range(source_ws)
-
-    if max_row == 0 or max_col == 0:
+    # 实际使用范围（非空单元格范围）
+    used_rows = [row_idx for row_idx, row in enumerate(rows) if any(value is not None for value in row)]
+    if not used_rows:
+        return None
+    used_cols = [col_idx for col_idx in range(len(rows[0])) if any(row[col_idx] is not None for row in rows)]
+
+    min_row, max_row = used_rows[0], used_rows[-1]
+    min_col, max_col = used_cols[0], used_cols[-1]
+    matrix = [row[min_col:max_col + 1] for row in rows[min_row:max_row + 1]]
+    return min_row + 1, min_col + 1, matrix
+
+
+def load_source_blocks(source_wb):
+    """读取SHEET_MAPPING中所有源工作表的值矩阵（所有目标文件共用，只需读取一次）"""
+    source_blocks = {}
+    for source_sheet_name in SHEET_MAPPING:
+        # 检查源工作表是否存在
+        if source_sheet_name not in source_wb:
+            print(f"源文件中不存在工作表: {source_sheet_name}")
+            continue
+        source_blocks[source_sheet_name] = read_source_block(source_wb[source_sheet_name])
+    return source_blocks
+
+
+def get_block_rect(block, start_cell):
+    """返回源数据块写入目标工作表后占用的区域(起始行, 起始列, 结束行, 结束列)"""
+    start_col_letter, start_row = coordinate_from_string(start_cell)
+    start_col = column_index_from_string(start_col_letter)
+    _, _, matrix = block
+    return start_row, start_col, start_row + len(matrix) - 1, start_col + len(matrix[0]) - 1
+
+
+def get_fixed_cells(cell_data):
+    """返回固定数据及其范围写入的单元格坐标列表[(行, 列)]"""
+    cells = []
+    for cell in cell_data:
+        cells.append(cell)
+        # 跳过B9单元格的解析
+        if cell != "B9":
+            cells.append(f"{get_column_letter(ord(cell[0]) + 1)}{cell[1:]}")
+
+    coords = []
+    for cell in cells:
+        col_letter, row = coordinate_from_string(cell)
+        coords.append((row, column_index_from_string(col_letter)))
+    return coords
+
+
+def copy_sheet_data(source_sheet_name, block, target_ws, start_cell):
+    """将源数据块中的非空数据写入目标工作表的指定位置"""
+    if block is None:
         print(f"工作表 '{source_sheet_name}' 没有可复制的非空数据")
         return
 
+    start_row, start_col, end_row, end_col = get_block_rect(block, start_cell)
+    min_row, min_col, matrix = block
+
     print(f"从源文件复制工作表 '{source_sheet_name}' 数据到目标文件的第一个工作表，起始位置: {start_cell}")
-    print(f"源数据实际使用范围: {min_row}-{max_row}行, {get_column_letter(min_col)}-{get_column_letter(max_col)}列")
+    print(f"源数据实际使用范围: {min_row}-{min_row + len(matrix) - 1}行, "
+          f"{get_column_letter(min_col)}-{get_column_letter(min_col + len(matrix[0]) - 1)}列")
 
     # 复制非空数据
     copied_count = 0
-    for row_idx in range(min_row, max_row + 1):
-        for col_idx in range(min_col, max_col + 1):
-            # 获取源单元格
-            source_cell = source_ws.cell(row=row_idx, column=col_idx)
-
+    for row_offset, row_values in enumerate(matrix):
+        for col_offset, value in enumerate(row_values):
             # 跳过空值单元格
-            value = source_cell.value
             if value is None or value == "":
                 continue
 
-            # 计算目标单元格位置
-            target_row = start_row + (row_idx - min_row)
-            target_col = start_col + (col_idx - min_col)
+            target_cell = target_ws.cell(row=start_row + row_offset, column=start_col + col_offset)
 
             # 对数值类型的数据保留三位小数
             if isinstance(value, (int, float)):
                 value = round(value, 3)
                 # 设置Excel单元格的数字格式为三位小数
-                target_ws.cell(row=target_row, column=target_col).number_format = '0.000'
+                target_cell.number_format = '0.000'
 
             # 写入目标单元格
-            target_ws.cell(row=target_row, column=target_col).value = value
+            target_cell.value = value
             copied_count += 1
 
     print(f"成功复制 {copied_count} 个非空单元格数据到起始位置 {start_cell}")
 
 
-def save_merge_ranges(ws):
-    """记录工作表中所有合并单元格的范围，返回合并区域列表"""
+def unmerge_intersecting_ranges(ws, rects):
+    """只解除与写入区域相交的合并单元格，返回被解除的合并区域列表（用于恢复）
+
+    rects为写入区域列表[(起始行, 起始列, 结束行, 结束列)]，与写入区域不相交的合并单元格保持不变。
+    """
     merge_ranges = []
-    # 遍历所有合并单元格区域
-    for merged_range in ws.merged_cells.ranges:
-        # 保存合并区域的坐标字符串（如 "A1:B5"）
-        merge_ranges.append(str(merged_range))
-    print(f"记录到 {len(merge_ranges)} 个合并单元格区域")
+    for merged_range in list(ws.merged_cells.ranges):
+        min_col, min_row, max_col, max_row = merged_range.bounds
+        if any(min_row <= rect[2] and rect[0] <= max_row and min_col <= rect[3] and rect[1] <= max_col
+               for rect in rects):
+            merge_ranges.append(str(merged_range))
+            ws.unmerge_cells(str(merged_range))
+    print(f"解除 {len(merge_ranges)}/{len(ws.merged_cells.ranges) + len(merge_ranges)} 个与写入区域相交的合并单元格")
     return merge_ranges
 
 
-def unmerge_all_cells(ws):
-    """解除工作表中所有的合并单元格"""
-    # 先复制合并区域列表（避免遍历时修改原列表）
-    merge_ranges = list(ws.merged_cells.ranges)
-    for merged_range in merge_ranges:
-        ws.unmerge_cells(str(merged_range))
-    print("已解除所有合并单元格")
-
-
 def restore_merge_ranges(ws, merge_ranges):
     """恢复工作表的合并单元格结构"""
     restored_count = 0
@@ -297,24 +232,29 @@ def restore_merge_ranges(ws, merge_ranges):
     print(f"成功恢复 {restored_count}/{len(merge_ranges)} 个合并单元格区域")
 
 
-def write_to_excel(file_path, cell_data):
-    """向Excel文件的指定单元格写入数据，直接覆盖原文件"""
+def write_to_excel(file_path, cell_data, source_blocks=None):
+    """向Excel文件的指定单元格写入数据，直接覆盖原文件，成功时返回True
+
+    source_blocks为load_source_blocks读取的源数据，多个文件共用时传入以避免重复读取源文件。
+    """
     try:
-        # 加载源工作簿
-        source_wb = load_workbook(SOURCE_FILE, data_only=True)
+        # 读取源数据
+        if source_blocks is None:
+            source_blocks = load_source_blocks(load_workbook(SOURCE_FILE, data_only=True))
 
         # 加载目标工作簿
         target_wb = load_workbook(file_path)
         target_ws = target_wb.active
 
         # ========== 核心流程：处理合并单元格 ==========
-        # 1. 记录所有合并区域
-        merge_ranges = save_merge_ranges(target_ws)
-
-        # 2. 解除全部合并
-        unmerge_all_cells(target_ws)
+        # 1. 计算所有写入区域，只解除与之相交的合并单元格
+        rects = [(row, col, row, col) for row, col in get_fixed_cells(cell_data)]
+        for source_sheet_name, start_cell in SHEET_MAPPING.items():
+            if source_blocks.get(source_sheet_name) is not None:
+                rects.append(get_block_rect(source_blocks[source_sheet_name], start_cell))
+        merge_ranges = unmerge_intersecting_ranges(target_ws, rects)
 
-        # 3. 写入固定数据（此时所有单元格都是独立的，可以正常写入）
+        # 2. 写入固定数据（写入区域内的单元格都是独立的，可以正常写入）
         for cell, value in cell_data.items():
             target_ws[cell] = value
             print(f"写入单元格 {cell}: {value}")
@@ -341,20 +281,35 @@ def write_to_excel(file_path, cell_data):
                 target_ws[f"{next_col_letter}{row}"] = "N/A"
                 print(f"单元格 {cell}: {value} -> 范围: N/A (无法解析)")
 
-        # 复制工作表数据
+        # 3. 批量写入各工作表数据
         for source_sheet_name, start_cell in SHEET_MAPPING.items():
-            print(f"\n开始复制工作表 '{source_sheet_name}' 到 {start_cell}")
-            copy_sheet_data(source_wb, source_sheet_name, target_wb, start_cell)
+            if source_sheet_name in source_blocks:
+                print(f"\n开始复制工作表 '{source_sheet_name}' 到 {start_cell}")
+                copy_sheet_data(source_sheet_name, source_blocks[source_sheet_name], target_ws, start_cell)
 
-        # 4. 恢复原始合并结构
+        # 4. 恢复被解除的合并结构
         restore_merge_ranges(target_ws, merge_ranges)
 
         # 保存文件
         target_wb.save(file_path)
         print(f"\n成功写入数据到 {file_path}")
+        return True
 
     except Exception as e:
         print(f"处理文件 {file_path} 时出错: {e}")
+        return False
+
+
+def write_excel_files(excel_files, cell_data, source_blocks, max_workers=MAX_WORKERS):
+    """在多个进程中并行处理所有目标Excel文件，返回成功处理的文件数"""
+    workers = max(1, min(max_workers, len(excel_files)))
+    if workers == 1:
+        return sum(write_to_excel(file, cell_data, source_blocks) for file in excel_files)
+
+    print(f"使用 {workers} 个进程并行处理 {len(excel_files)} 个文件")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(write_to_excel, excel_files, repeat(cell_data), repeat(source_blocks))
+        return sum(results)
 
 
 def main():
@@ -375,7 +330,7 @@ def main():
     print(f"使用配置文件: {config_file_path}")
 
     # 读取配置文件
-    config = read_config(config_file_path)
+    config = load_raw_config(config_file_path)
     if not config:
         print("无法读取配置文件或配置文件为空")
         return
@@ -399,11 +354,13 @@ def main():
 
     print(f"找到 {len(excel_files)} 个Excel文件")
 
-    # 处理每个Excel文件
-    for file in excel_files:
-        print(f"\n========== 处理文件: {file} ==========")
-        write_to_excel(file, cell_data)
+    # 源数据只读取一次，所有Excel文件共用
+    source_blocks = load_source_blocks(load_workbook(SOURCE_FILE, data_only=True))
+
+    # 并行处理每个Excel文件
+    success_count = write_excel_files(excel_files, cell_data, source_blocks)
+    print(f"\n处理完成: 成功 {success_count}/{len(excel_files)} 个文件")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,132 +3,87 @@ import openpyxl
 from openpyxl.utils import get_column_letter
 import time
 import numpy as np
-import os
+from 记录索引 import search_report, I_COL
+from 配置注册表 import match_config_files, load_report_config
 
 # 文件路径配置
 CONFIG_DIR = r"E:\System\pic\A报告\模板\配置文件"
 LAB_RECORD_FILE = r"E:\System\pic\A报告\老化实验记录.xlsx"
 
 
-def read_config(file_path):
-    """读取配置文件并返回配置字典"""
-    config = {}
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                # 跳过注释行和空行
-                if line.startswith('#') or not line:
-                    continue
-                # 解析配置项
-                key, value = line.split('=', 1)
-                config[key.strip()] = value.strip()
-        return config
-    except Exception as e:
-        print(f"读取配置文件时发生错误: {e}")
-        return None
-
-
-def parse_config(config):
-    """解析配置字典并返回结构化配置，不使用默认值"""
-    if not config:
-        raise ValueError("配置字典为空")
-
-    # 定义配置参数元数据（不包含默认值）
-    CONFIG_METADATA = {
-        # 基本配置
-        'TARGET_VALUE': {'type': int},
-        'FILE_PATH': {'type': str},
-        'A_RANGE_LOW': {'type': int},
-        'A_RANGE_HIGH': {'type': int},
-        'FIND_MAX': {'type': lambda x: x.lower() == 'true'},
-
-        # SPL原档配置
-        'SPL_MODE': {'type': str},
-        'SPL_FIXED_TARGETS': {'type': lambda x: [int(v) for v in x.split(',')]},
-        'SPL_RANGE_STEP': {'type': int},
-        'SPL_CUSTOM_TARGETS': {'type': lambda x: [int(v) for v in x.split(',')]},
-        'SPL_RANGE_LOW': {'type': int},
-        'SPL_RANGE_HIGH': {'type': int},
-
-        # THD原档配置
-        'THD_A_RANGE_LOW': {'type': int},
-        'THD_A_RANGE_HIGH': {'type': int}
-    }
-
-    # 自动解析配置，不使用默认值
-    parsed_config = {}
-    for key, meta in CONFIG_METADATA.items():
-        if key not in config:
-            raise ValueError(f"配置文件中缺少必需的参数: {key}")
-
-        try:
-            parsed_config[key] = meta['type'](config[key])
-        except Exception as e:
-            raise ValueError(f"解析配置项 '{key}' 时发生错误: {e}") from e
-
-    return parsed_config
-
-
-def validate_config(config):
-    """验证配置是否完整且有效"""
-    required_keys = [
-        'TARGET_VALUE', 'FILE_PATH', 'A_RANGE_LOW', 'A_RANGE_HIGH', 'FIND_MAX',
-        'SPL_MODE', 'SPL_FIXED_TARGETS', 'SPL_RANGE_STEP', 'SPL_CUSTOM_TARGETS',
-        'SPL_RANGE_LOW', 'SPL_RANGE_HIGH', 'THD_A_RANGE_LOW', 'THD_A_RANGE_HIGH'
-    ]
-
-    # 检查是否缺少必需的键
-    missing_keys = [key for key in required_keys if key not in config]
-    if missing_keys:
-        raise ValueError(f"配置文件缺少以下必需参数: {', '.join(missing_keys)}")
-
-    # 验证数值范围
-    if config['A_RANGE_LOW'] >= config['A_RANGE_HIGH']:
-        raise ValueError("A_RANGE_LOW必须小于A_RANGE_HIGH")
-
-    if config['SPL_RANGE_LOW'] >= config['SPL_RANGE_HIGH']:
-        raise ValueError("SPL_RANGE_LOW必须小于SPL_RANGE_HIGH")
-
-    if config['THD_A_RANGE_LOW'] >= config['THD_A_RANGE_HIGH']:
-        raise ValueError("THD_A_RANGE_LOW必须小于THD_A_RANGE_HIGH")
-
-    # 验证SPL_MODE值
-    valid_spl_modes = ['FIXED', 'RANGE', 'CUSTOM', 'RANGE_ALL']
-    if config['SPL_MODE'] not in valid_spl_modes:
-        raise ValueError(
-            f"无效的SPL_MODE值: {config['SPL_MODE']}，必须是{'FIXED', 'RANGE', 'CUSTOM', 'RANGE_ALL'}中的一个")
-
-    return True
+def load_numeric_matrix(df):
+    """将工作表数据整体转换为二维浮点数组，非数值和空单元格均为NaN"""
+    return df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
 
 
-def find_nearest_value(df, target):
-    # 确保数据是数值类型
-    df = pd.to_numeric(df.iloc[:, 0], errors='coerce').dropna().reset_index(drop=True)
+def split_column_pairs(matrix):
+    """将数值矩阵拆分为奇数列(X)和偶数列(Y)两个矩阵，每个列对占一列"""
+    pair_count = matrix.shape[1] // 2
+    return matrix[:, 0:pair_count * 2:2], matrix[:, 1:pair_count * 2:2]
 
-    if df.empty:
-        return None
-
-    left, right = 0, len(df) - 1
-    nearest_idx = 0
-    min_diff = float('inf')
 
-    while left <= right:
-        mid = (left + right) // 2
-        current_diff = abs(df.iloc[mid] - target)
+def batch_nearest(x, y, target):
+    """对每个列对查找X列最接近目标值的行，返回(对应的Y值数组, 列对是否有效)"""
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    diff = np.where(valid, np.abs(x - target), np.inf)
+    rows = np.argmin(diff, axis=0)
+    return y[rows, np.arange(y.shape[1])], valid.any(axis=0)
 
-        if current_diff < min_diff:
-            min_diff = current_diff
-            nearest_idx = mid
 
-        if df.iloc[mid] < target:
-            left = mid + 1
-        elif df.iloc[mid] > target:
-            right = mid - 1
-        else:
-            break
+def batch_window_extreme(x, y, low, high, find_max=True):
+    """在X值位于[low, high]的窗口内查找每列Y的极值（多个极值取第一个）
 
-    return df.iloc[nearest_idx]
+    x可以是与y同形状的矩阵，也可以是所有列共用的一维A列。
+    返回(极值行的X值, 极值, 该列窗口内是否有数据)
+    """
+    if x.ndim == 1:
+        x = np.broadcast_to(x[:, None], y.shape)
+    mask = ~np.isnan(x) & ~np.isnan(y) & (x >= low) & (x <= high)
+    if find_max:
+        rows = np.argmax(np.where(mask, y, -np.inf), axis=0)
+    else:
+        rows = np.argmin(np.where(mask, y, np.inf), axis=0)
+    cols = np.arange(y.shape[1])
+    return x[rows, cols], y[rows, cols], mask.any(axis=0)
+
+
+def batch_range_average(x, y, low, high):
+    """计算每列Y在共用A列位于[low, high]范围内的平均值，返回(平均值, 参与计算的行数)"""
+    mask = ~np.isnan(x)[:, None] & ~np.isnan(y) & (x >= low)[:, None] & (x <= high)[:, None]
+    counts = mask.sum(axis=0)
+    sums = np.where(mask, y, 0.0).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts, counts
+
+
+def batch_target_average(x, y, targets):
+    """对每列Y，取共用A列中与每个目标值最接近的行（精确匹配时即为该行），求对应Y值的平均值
+
+    按各列的有效行模式分组，每组只做一次(行数 x 目标数)的向量化查找，
+    通常所有列的有效行一致，整个阶段只需一次计算。
+    返回(平均值, 未精确匹配的目标个数, 列是否有效)
+    """
+    targets = np.asarray(targets, dtype=float)
+    column_count = y.shape[1]
+    averages = np.full(column_count, np.nan)
+    inexact = np.zeros(column_count, dtype=int)
+    valid = ~np.isnan(x)[:, None] & ~np.isnan(y)
+    has_data = valid.any(axis=0)
+    if column_count == 0 or targets.size == 0:
+        return averages, inexact, has_data & (targets.size > 0)
+
+    patterns, inverse = np.unique(valid.T, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    for pattern_idx, pattern in enumerate(patterns):
+        rows = np.flatnonzero(pattern)
+        if rows.size == 0:
+            continue
+        cols = np.flatnonzero(inverse == pattern_idx)
+        diff = np.abs(x[rows][:, None] - targets[None, :])
+        nearest_rows = rows[np.argmin(diff, axis=0)]
+        averages[cols] = y[np.ix_(nearest_rows, cols)].mean(axis=0)
+        inexact[cols] = int(np.count_nonzero(x[nearest_rows] != targets))
+    return averages, inexact, has_data
 
 
 def generate_spl_targets(spl_mode, a_range_low, a_range_high, step, fixed_targets, custom_targets, range_low,
@@ -151,36 +106,19 @@ def generate_spl_targets(spl_mode, a_range_low, a_range_high, step, fixed_target
 def find_config_file(report_id):
     """在老化实验记录中查找报告编号并返回对应的配置文件路径"""
     try:
-        # 读取老化实验记录文件
-        print(f"正在读取老化实验记录文件: {LAB_RECORD_FILE}")
-        df = pd.read_excel(LAB_RECORD_FILE)
-
-        # 假设报告编号在第N列，这里遍历所有列查找
-        found = False
-        report_col = None
-
-        # 从最后一行开始向上查找
-        for col in df.columns:
-            for row_idx in reversed(df.index):
-                cell_value = df.at[row_idx, col]
-                if pd.notna(cell_value) and str(report_id) in str(cell_value):
-                    report_col = col
-                    found = True
-                    break
-            if found:
-                break
-
-        if not found:
+        # 通过老化实验记录索引查找报告编号（记录文件未变化时不重新解析Excel）
+        report_row, report_col = search_report(report_id, LAB_RECORD_FILE)
+
+        if report_row is None:
             raise ValueError(f"在老化实验记录中未找到报告编号: {report_id}")
 
         print(f"找到报告编号 '{report_id}' 在列: {report_col}")
 
         # 获取对应的第I列单元格内容
-        i_col_idx = 8  # 假设I列是第9列(索引为8)，根据实际情况调整
-        if i_col_idx >= len(df.columns):
+        if I_COL >= len(report_row):
             raise ValueError(f"未找到第I列数据")
 
-        cell_value = df.at[row_idx, df.columns[i_col_idx]]
+        cell_value = report_row.iloc[I_COL]
         if pd.isna(cell_value):
             raise ValueError(f"第I列对应单元格内容为空")
 
@@ -192,42 +130,8 @@ def find_config_file(report_id):
 
         print(f"从第I列获取的有效关键字: {parts}")
 
-        # 在配置文件目录中查找匹配的配置文件
-        config_files = os.listdir(CONFIG_DIR)
-        matched_files = []
-
-        # 为每个关键字查找匹配的配置文件
-        for part in parts:
-            part_matched = False
-            # 尝试匹配包含所有关键字的单个配置文件
-            combined_keywords = part
-            for file in config_files:
-                if all(keyword.strip() in file for keyword in combined_keywords.split('；')) and file.endswith('.txt'):
-                    matched_files.append(os.path.join(CONFIG_DIR, file))
-                    part_matched = True
-                    print(f"  找到匹配的配置文件: {file}，匹配关键字: {combined_keywords}")
-                    break  # 找到一个匹配项后就退出循环
-
-            # 如果没有找到组合匹配，则尝试单独匹配每个关键字
-            if not part_matched:
-                for keyword in combined_keywords.split('；'):
-                    keyword = keyword.strip()
-                    if not keyword:
-                        continue
-                    for file in config_files:
-                        if keyword in file and file.endswith('.txt'):
-                            matched_files.append(os.path.join(CONFIG_DIR, file))
-                            part_matched = True
-                            print(f"  找到匹配的配置文件: {file}，匹配关键字: {keyword}")
-                            break  # 找到一个匹配项后就退出循环
-                    if part_matched:
-                        break  # 找到一个关键字匹配后就不再检查其他关键字
-
-            if not part_matched:
-                print(f"  警告: 未找到与关键字 '{part}' 匹配的配置文件")
-
-        # 移除重复的文件路径
-        matched_files = list(dict.fromkeys(matched_files))
+        # 通过配置注册表的文件名索引查找匹配的配置文件
+        matched_files = match_config_files(parts, CONFIG_DIR)
 
         if not matched_files:
             raise ValueError(f"未找到匹配的配置文件，关键字: {parts}")
@@ -244,61 +148,13 @@ def find_config_file(report_id):
         return None
 
 
-try:
-    # 获取用户输入的报告编号
-    report_id = input("请输入报告编号: ").strip()
-    if not report_id:
-        raise ValueError("报告编号不能为空")
-
-    print(f"正在查找报告编号 '{report_id}' 对应的配置文件...")
+def load_raw_sheets(file_path):
+    """读取IMP原档、SPL原档、THD原档并转换为数值矩阵
 
-    # 查找配置文件
-    config_file_path = find_config_file(report_id)
-    if not config_file_path:
-        raise ValueError("无法找到匹配的配置文件")
-
-    print(f"使用配置文件: {config_file_path}")
-
-    # 读取配置文件
-    config = read_config(config_file_path)
-    if not config:
-        raise ValueError("无法读取配置文件或配置文件为空")
-
-    # 解析配置
-    config = parse_config(config)
-
-    # 验证配置
-    validate_config(config)
-
-    print(f"开始执行Excel数据处理脚本")
-    print(f"配置参数:")
-    for key, value in config.items():
-        print(f"  {key}: {value}")
-
-    # 生成SPL目标值列表
-    spl_targets = generate_spl_targets(
-        config['SPL_MODE'],
-        config['A_RANGE_LOW'],
-        config['A_RANGE_HIGH'],
-        config['SPL_RANGE_STEP'],
-        config['SPL_FIXED_TARGETS'],
-        config['SPL_CUSTOM_TARGETS'],
-        config['SPL_RANGE_LOW'],
-        config['SPL_RANGE_HIGH']
-    )
-    print(f"  SPL查找模式: {config['SPL_MODE']}")
-    if config['SPL_MODE'] == "RANGE_ALL":
-        print(f"  SPL查找范围: {config['SPL_RANGE_LOW']}~{config['SPL_RANGE_HIGH']} (处理范围内的所有值)")
-    else:
-        print(f"  SPL查找目标: {spl_targets} (共{len(spl_targets)}个值)")
-
-    print(f"  THD原档A列范围: {config['THD_A_RANGE_LOW']}~{config['THD_A_RANGE_HIGH']}")
-
-    start_time = time.time()
-
-    # 读取Excel文件
+    返回{工作表名: 数值矩阵}，SPL原档/THD原档读取失败时对应值为None（跳过该阶段）。
+    """
     print(f"正在读取Excel文件...")
-    excel_file = pd.ExcelFile(config['FILE_PATH'])
+    excel_file = pd.ExcelFile(file_path)
 
     # 获取IMP原档中的数据
     print(f"正在解析'IMP原档'工作表...")
@@ -310,555 +166,364 @@ try:
     if non_empty_columns % 2 != 0:
         raise ValueError(f"IMP原档中有数值的列数为{non_empty_columns}，必须为偶数")
 
-    # 使用openpyxl将值写入ACR表
-    print(f"准备写入'ACR'工作表...")
-    wb = openpyxl.load_workbook(config['FILE_PATH'])
-    ws = wb["ACR"]
+    raw_sheets = {"IMP原档": load_numeric_matrix(df)}
+    for sheet_name in ("SPL原档", "THD原档"):
+        try:
+            raw_sheets[sheet_name] = load_numeric_matrix(excel_file.parse(sheet_name))
+        except Exception as e:
+            print(f"处理'{sheet_name}'工作表时发生错误: {e}")
+            raw_sheets[sheet_name] = None
+    return raw_sheets
+
+
+def compute_stage_values(raw_sheets, config, spl_targets):
+    """根据配置计算ACR、Fb、SPL、THD各阶段需要写入A列的值（不涉及openpyxl）
+
+    返回{'ACR': {行号: 值}, 'Fb': [值], 'SPL': {行号: 值}, 'THD': {行号: 值}}，
+    SPL/THD原档读取失败时对应值为None。
+    """
+    stage_values = {}
 
-    # 处理所有奇数列(1,3,5...)及其后续偶数列(2,4,6...)
+    # 一次性将IMP原档转换为数值矩阵，奇数列(1,3,5...)与其后的偶数列(2,4,6...)组成列对
     print(f"正在处理列对数据...")
-    max_col = df.shape[1]
-    processed_pairs = 0
-    skipped_pairs = 0
+    imp_x, imp_y = split_column_pairs(raw_sheets["IMP原档"])
+    pair_count = imp_x.shape[1]
 
-    for col_pair in range(0, max_col, 2):
-        # 检查是否有足够的列
-        if col_pair + 1 >= max_col:
-            break
+    # 所有列对一次性查找奇数列最接近目标值的行，取对应偶数列的值
+    acr_values, acr_valid = batch_nearest(imp_x, imp_y, config['TARGET_VALUE'])
+    processed_pairs = int(acr_valid.sum())
+    skipped_pairs = pair_count - processed_pairs
 
-        # 获取当前奇数列和偶数列
-        odd_col = col_pair
-        even_col = col_pair + 1
+    stage_values['ACR'] = {}
+    for pair_idx in range(pair_count):
+        # 跳过空列对
+        if not acr_valid[pair_idx]:
+            print(f"    跳过空列对: {get_column_letter(pair_idx * 2 + 1)}&{get_column_letter(pair_idx * 2 + 2)}")
+            continue
 
-        # 获取列字母表示（用于日志输出）
-        col_letter_odd = get_column_letter(odd_col + 1)
-        col_letter_even = get_column_letter(even_col + 1)
+        # ACR表的对应行(从1开始，每对占一行)
+        stage_values['ACR'][pair_idx + 1] = float(acr_values[pair_idx])
 
-        print(f"  处理列对: {col_letter_odd}&{col_letter_even}")
+    print(f"列对数据处理完成: 已处理 {processed_pairs} 对, 跳过 {skipped_pairs} 对")
 
-        # 提取当前奇数列和偶数列的数据
-        current_df = df.iloc[:, [odd_col, even_col]].copy()
+    # 处理Fb - 所有列对一次性在奇数列的指定范围内查找偶数列的最大值或最小值
+    print(f"正在处理'Fb'工作表数据...")
+    extreme_type = "最大值" if config['FIND_MAX'] else "最小值"
+    fb_x, fb_extremes, fb_found = batch_window_extreme(
+        imp_x, imp_y, config['A_RANGE_LOW'], config['A_RANGE_HIGH'], config['FIND_MAX'])
 
-        # 转换为数值类型并删除非数值
-        current_df.iloc[:, 0] = pd.to_numeric(current_df.iloc[:, 0], errors='coerce')
-        current_df.iloc[:, 1] = pd.to_numeric(current_df.iloc[:, 1], errors='coerce')
-        current_df = current_df.dropna()
+    stage_values['Fb'] = []
+    for pair_idx in range(pair_count):
+        odd_letter = get_column_letter(pair_idx * 2 + 1)
+        even_letter = get_column_letter(pair_idx * 2 + 2)
 
         # 跳过空列对
-        if current_df.empty:
-            print(f"    跳过空列对: {col_letter_odd}&{col_letter_even}")
-            skipped_pairs += 1
+        if not acr_valid[pair_idx]:
+            print(f"    跳过空列对: {odd_letter}&{even_letter}")
             continue
 
-        # 找到奇数列最接近目标值的值对应的偶数列的值
-        nearest_value = find_nearest_value(current_df, config['TARGET_VALUE'])
-
-        # 如果找不到合适的值，则跳过
-        if nearest_value is None:
-            print(f"    在列 {col_letter_odd} 中未找到合适的值")
-            skipped_pairs += 1
+        if not fb_found[pair_idx]:
+            print(f"  在{odd_letter}列中未找到范围在 {config['A_RANGE_LOW']}~{config['A_RANGE_HIGH']} 之间的值")
             continue
 
-        # 获取对应偶数列的值
-        nearest_row = current_df.iloc[(current_df.iloc[:, 0] - config['TARGET_VALUE']).abs().argsort()[:1]]
-        value_to_write = nearest_row.iloc[0, 1]
+        print(
+            f"  在{odd_letter}列范围 {config['A_RANGE_LOW']}~{config['A_RANGE_HIGH']} 内找到{even_letter}列的{extreme_type}: {fb_extremes[pair_idx]}")
+        print(f"    对应的{odd_letter}列值为: {fb_x[pair_idx]}")
 
-        # 计算ACR表中的行号(从1开始，每对占一行)
-        row_in_acr = (col_pair // 2) + 1
+        # 保存结果
+        stage_values['Fb'].append(float(fb_x[pair_idx]))
 
-        # 将值写入ACR表的对应行的第一列
-        ws.cell(row=row_in_acr, column=1).value = value_to_write
-        processed_pairs += 1
+    # 处理SPL原档
+    print(f"正在处理'SPL原档'工作表数据...")
+    spl_matrix = raw_sheets["SPL原档"]
+    if spl_matrix is None:
+        stage_values['SPL'] = None
+    elif spl_matrix.shape[1] < 2:
+        print(f"SPL原档中至少需要两列数据")
+        stage_values['SPL'] = {}
+    else:
+        # SPL原档A列为所有偶数列（B,D,F...）共用的频率列
+        spl_col_a = spl_matrix[:, 0]
+        spl_even = spl_matrix[:, 1::2]
+        spl_has_data = (~np.isnan(spl_col_a)[:, None] & ~np.isnan(spl_even)).any(axis=0)
+
+        # 所有偶数列一次性计算平均值
+        if config['SPL_MODE'] == "RANGE_ALL":
+            spl_averages, spl_counts = batch_range_average(
+                spl_col_a, spl_even, config['SPL_RANGE_LOW'], config['SPL_RANGE_HIGH'])
+            spl_inexact = None
+        else:
+            spl_averages, spl_inexact, _ = batch_target_average(spl_col_a, spl_even, spl_targets)
+            spl_counts = np.where(spl_has_data, len(spl_targets), 0)
 
-    print(f"列对数据处理完成: 已处理 {processed_pairs} 对, 跳过 {skipped_pairs} 对")
+        stage_values['SPL'] = {}
+        for even_idx in range(spl_even.shape[1]):
+            col_idx = even_idx * 2 + 1
+            col_letter = get_column_letter(col_idx + 1)
 
-    # 读取ACR表中的所有数据
-    print(f"正在分析'ACR'工作表数据...")
-    acr_data = []
-    max_row = ws.max_row
-    for row in range(1, max_row + 1):
-        cell_value = ws.cell(row=row, column=1).value
-        if cell_value is not None:
-            acr_data.append(cell_value)
+            if not spl_has_data[even_idx]:
+                print(f"  偶数列 {col_letter} 与A列合并后的数据为空")
+                continue
 
-    # 计算分割点
-    split_index = len(acr_data) // 2
+            print(f"  正在处理偶数列 {col_letter}...")
+            if spl_inexact is None:
+                print(f"    在A列中找到{spl_counts[even_idx]}个值在{config['SPL_RANGE_LOW']}~{config['SPL_RANGE_HIGH']}范围内")
+            elif spl_inexact[even_idx]:
+                print(f"    注意: 有{spl_inexact[even_idx]}个目标值在A列中未精确找到，已使用最接近的值")
 
-    # 将后一半数据移至B列的起始行，并清空A列对应位置
-    print(f"正在重新排列'ACR'工作表数据...")
-    moved_values = 0
+            # 计算当前偶数列的平均值
+            if spl_counts[even_idx]:
+                average_value = float(spl_averages[even_idx])
 
-    for i in range(split_index, len(acr_data)):
-        source_row = i + 1
-        target_row = (i - split_index) + 1
-        ws.cell(row=target_row, column=2).value = acr_data[i]
-        ws.cell(row=source_row, column=1).value = None  # 清空A列原数据
-        moved_values += 1
+                # 确定写入位置（B列对应A1，D列对应A2，依此类推）
+                row_in_spl = (col_idx + 1) // 2
+                stage_values['SPL'][row_in_spl] = average_value
+                print(f"    {col_letter}列对应值的平均值 {average_value:.4f} 将写入'SPL'工作表的A列第{row_in_spl}行")
+            else:
+                print(f"    没有找到符合条件的数据，无法计算平均值")
 
-    print(f"数据重新排列完成: 已移动 {moved_values} 个值到B列")
+        print(f"SPL原档所有偶数列处理完成")
 
-    # 比较AB两列相邻数据，确保B列数值大于A列
-    print(f"正在验证'ACR'工作表AB列数据关系...")
-    swap_count = 0
-    max_compare_row = max(ws.max_row, len(acr_data) - split_index)
+    # 处理THD原档
+    print(f"正在处理'THD原档'工作表数据...")
+    thd_matrix = raw_sheets["THD原档"]
+    if thd_matrix is None:
+        stage_values['THD'] = None
+    elif thd_matrix.shape[1] < 2:
+        print(f"THD原档中至少需要两列数据")
+        stage_values['THD'] = {}
+    else:
+        # THD原档A列为所有偶数列（B,D,F...）共用的频率列
+        thd_col_a = thd_matrix[:, 0]
+        thd_even = thd_matrix[:, 1::2]
+        thd_has_data = (~np.isnan(thd_col_a)[:, None] & ~np.isnan(thd_even)).any(axis=0)
+
+        # 所有偶数列一次性在A列指定范围内查找最大值
+        thd_a_values, thd_max_values, thd_found = batch_window_extreme(
+            thd_col_a, thd_even, config['THD_A_RANGE_LOW'], config['THD_A_RANGE_HIGH'])
+
+        stage_values['THD'] = {}
+        for even_idx in range(thd_even.shape[1]):
+            col_idx = even_idx * 2 + 1
+            col_letter = get_column_letter(col_idx + 1)
+
+            if not thd_has_data[even_idx]:
+                print(f"  偶数列 {col_letter} 与A列合并后的数据为空")
+                continue
 
-    for row in range(1, max_compare_row + 1):
-        a_value = ws.cell(row=row, column=1).value
-        b_value = ws.cell(row=row, column=2).value
+            print(f"  正在处理偶数列 {col_letter}...")
+            if not thd_found[even_idx]:
+                print(f"    在A列中未找到范围在 {config['THD_A_RANGE_LOW']}~{config['THD_A_RANGE_HIGH']} 之间的值")
+                continue
 
-        # 尝试转换为数值
-        try:
-            a_value = float(a_value) if a_value is not None else None
-            b_value = float(b_value) if b_value is not None else None
-        except (ValueError, TypeError):
-            continue
+            max_value = float(thd_max_values[even_idx])
+            print(
+                f"    在A列范围 {config['THD_A_RANGE_LOW']}~{config['THD_A_RANGE_HIGH']} 内找到{col_letter}列的最大值: {max_value}")
+            print(f"    对应的A列值为: {thd_a_values[even_idx]}")
 
-        # 确保两个单元格都有数值
-        if a_value is not None and b_value is not None:
-            # 如果B列值小于等于A列值，则交换
-            if b_value <= a_value:
-                ws.cell(row=row, column=1).value = b_value
-                ws.cell(row=row, column=2).value = a_value
-                swap_count += 1
+            # 确定写入位置（B列对应A1，D列对应A2，依此类推）
+            stage_values['THD'][(col_idx + 1) // 2] = max_value
 
-    print(f"数据验证完成: 执行了 {swap_count} 次交换操作")
+        print(f"THD原档所有偶数列处理完成")
 
-    # 处理Fb工作表 - 对所有偶数列执行相同操作
-    print(f"正在处理'Fb'工作表数据...")
+    return stage_values
 
-    # 创建或获取Fb工作表
-    if "Fb" in wb.sheetnames:
-        fb_sheet = wb["Fb"]
-    else:
-        fb_sheet = wb.create_sheet("Fb")
 
-    # 清空Fb工作表中已有的数据
-    for row in range(1, fb_sheet.max_row + 1):
-        for col in range(1, fb_sheet.max_column + 1):
-            fb_sheet.cell(row=row, column=col).value = None
+def get_or_create_sheet(wb, sheet_name):
+    """获取工作表，不存在时创建"""
+    if sheet_name in wb.sheetnames:
+        return wb[sheet_name]
+    return wb.create_sheet(sheet_name)
 
-    # 处理所有偶数列（B,D,F...）
-    result_values = []
 
-    for col in range(1, max_col, 2):
-        # 获取列字母表示
-        col_letter = get_column_letter(col + 1)
+# 各工作表AB列重新排列规则：(分割点计算方式, 需要交换AB两列的条件)
+REARRANGE_RULES = {
+    'ACR': (lambda count: count // 2, lambda a, b: b <= a),  # 确保B列数值大于A列
+    'Fb': (lambda count: (count + 1) // 2, lambda a, b: b >= a),  # 向上取整，确保B列数值小于A列
+    'SPL': (lambda count: count // 2, lambda a, b: a <= b),  # 确保A列数值大于B列
+    'THD': (lambda count: count // 2, lambda a, b: b <= a),  # 确保B列数值大于A列
+}
 
-        # 获取当前偶数列和前一列(奇数列)的数据
-        odd_col = col - 1
-        even_col = col
 
-        # 检查列索引是否有效
-        if odd_col < 0 or even_col >= max_col:
-            print(f"    跳过无效列索引: {odd_col}和{even_col}")
-            continue
+def read_sheet_cells(ws):
+    """一次性读取工作表中所有非空单元格，返回{(行, 列): 值}"""
+    cells = {}
+    for row_idx, row in enumerate(ws.iter_rows(values_only=True), start=1):
+        for col_idx, value in enumerate(row, start=1):
+            if value is not None:
+                cells[(row_idx, col_idx)] = value
+    return cells
 
-        # 提取数据
-        current_df = df.iloc[:, [odd_col, even_col]].copy()
 
-        # 转换为数值类型并删除非数值
-        current_df.iloc[:, 0] = pd.to_numeric(current_df.iloc[:, 0], errors='coerce')
-        current_df.iloc[:, 1] = pd.to_numeric(current_df.iloc[:, 1], errors='coerce')
-        current_df = current_df.dropna()
+def rearrange_columns(grid, sheet_name):
+    """在内存中将A列后一半数据移至B列，并比较AB两列交换数值，返回(移动个数, 交换次数)
 
-        # 跳过空列
-        if current_df.empty:
-            print(f"    跳过空列对: {get_column_letter(odd_col + 1)}&{col_letter}")
-            continue
+    grid为{(行, 列): 值}，规则与逐单元格读写时完全一致：
+    A列非空值按行顺序编号，第i个值(i >= 分割点)移到B列第(i-分割点+1)行，并清空A列第(i+1)行。
+    """
+    split_rule, swap_rule = REARRANGE_RULES[sheet_name]
 
-        # 筛选奇数列在指定范围内的数据
-        filtered_df = current_df[
-            (current_df.iloc[:, 0] >= config['A_RANGE_LOW']) & (current_df.iloc[:, 0] <= config['A_RANGE_HIGH'])]
+    # 读取A列中的所有数据，计算分割点
+    data = [grid[(row, col)] for row, col in sorted(grid) if col == 1]
+    split_index = split_rule(len(data))
 
-        if not filtered_df.empty:
-            # 重置索引以确保索引连续
-            filtered_df = filtered_df.reset_index(drop=True)
+    # 将后一半数据移至B列的起始行，并清空A列对应位置
+    for i in range(split_index, len(data)):
+        grid[(i - split_index + 1, 2)] = data[i]
+        grid.pop((i + 1, 1), None)
+    moved_values = len(data) - split_index
 
-            # 确保筛选后的数据有足够的行
-            if len(filtered_df) == 0:
-                print(f"    跳过: {col_letter}列在范围内没有有效值")
-                continue
+    # 比较AB两列相邻数据
+    swap_count = 0
+    for row in sorted({row for row, col in grid if col == 1} & {row for row, col in grid if col == 2}):
+        try:
+            a_value = float(grid[(row, 1)])
+            b_value = float(grid[(row, 2)])
+        except (ValueError, TypeError):
+            continue
 
-            # 根据配置查找偶数列的最大值或最小值
-            if config['FIND_MAX']:
-                extreme_value = filtered_df.iloc[:, 1].max()
-                extreme_type = "最大值"
-            else:
-                extreme_value = filtered_df.iloc[:, 1].min()
-                extreme_type = "最小值"
+        if swap_rule(a_value, b_value):
+            grid[(row, 1)] = b_value
+            grid[(row, 2)] = a_value
+            swap_count += 1
+
+    return moved_values, swap_count
 
-            # 找到对应的行
-            extreme_rows = filtered_df[filtered_df.iloc[:, 1] == extreme_value]
 
-            # 如果有多个匹配值，取第一个
-            if not extreme_rows.empty:
-                extreme_row = extreme_rows.iloc[0]
+def build_write_plan(sheet_name, existing_cells, final_cells):
+    """对比工作表现有内容与最终内容，生成写入计划：需要设置的单元格和需要清空的单元格"""
+    return {
+        'sheet': sheet_name,
+        'set': {coord: value for coord, value in final_cells.items() if existing_cells.get(coord) != value},
+        'blank': sorted(coord for coord in existing_cells if coord not in final_cells),
+    }
 
-                # 获取奇数列和偶数列的值
-                odd_col_value = extreme_row.iloc[0]
-                even_col_value = extreme_row.iloc[1]
 
-                print(
-                    f"  在{get_column_letter(odd_col + 1)}列范围 {config['A_RANGE_LOW']}~{config['A_RANGE_HIGH']} 内找到{col_letter}列的{extreme_type}: {even_col_value}")
-                print(f"    对应的{get_column_letter(odd_col + 1)}列值为: {odd_col_value}")
+def plan_stage_writes(wb, stage_values):
+    """根据各阶段计算结果在内存中生成每个工作表的写入计划（不修改工作簿）"""
+    plans = []
+    for sheet_name in ('ACR', 'Fb', 'SPL', 'THD'):
+        values = stage_values[sheet_name]
+        if values is None:
+            continue  # 原档读取失败时保持该工作表不变
 
-                # 保存结果
-                result_values.append(odd_col_value)
-            else:
-                print(f"    警告: 未找到符合条件的行")
+        if sheet_name == 'ACR':
+            # ACR工作表不清空，只覆盖A列对应行
+            existing_cells = read_sheet_cells(wb["ACR"])
+            grid = dict(existing_cells)
         else:
-            print(
-                f"  在{get_column_letter(odd_col + 1)}列中未找到范围在 {config['A_RANGE_LOW']}~{config['A_RANGE_HIGH']} 之间的值")
+            # Fb/SPL/THD工作表先清空
+            existing_cells = read_sheet_cells(wb[sheet_name]) if sheet_name in wb.sheetnames else {}
+            grid = {}
 
-    # 将结果按顺序写入Fb工作表的第一列
-    if result_values:
-        for i, value in enumerate(result_values):
-            fb_sheet.cell(row=i + 1, column=1).value = value
+        # Fb结果按顺序写入第一列，其余工作表按列对确定行号
+        if sheet_name == 'Fb':
+            values = {row: value for row, value in enumerate(values, start=1)}
+        for row, value in values.items():
+            grid[(row, 1)] = value
 
-        print(f"已将所有结果按顺序写入'Fb'工作表的第一列")
+        moved_values, swap_count = rearrange_columns(grid, sheet_name)
+        print(f"'{sheet_name}'工作表: 写入 {len(values)} 个值, 移动 {moved_values} 个值到B列, 交换 {swap_count} 次")
 
-        # 将Fb工作表后一半数据移至B列
-        total_results = len(result_values)
-        split_index_fb = (total_results + 1) // 2  # 向上取整
+        plans.append(build_write_plan(sheet_name, existing_cells, grid))
+    return plans
 
-        print(f"正在重新排列'Fb'工作表数据...")
-        moved_values_fb = 0
 
-        for i in range(split_index_fb, total_results):
-            source_row = i + 1
-            target_row = (i - split_index_fb) + 1
-            fb_sheet.cell(row=target_row, column=2).value = result_values[i]
-            fb_sheet.cell(row=source_row, column=1).value = None  # 清空A列原数据
-            moved_values_fb += 1
+def apply_write_plans(wb, plans):
+    """一次性执行所有写入计划"""
+    for plan in plans:
+        ws = get_or_create_sheet(wb, plan['sheet'])
+        for row, col in plan['blank']:
+            ws.cell(row=row, column=col).value = None
+        for (row, col), value in plan['set'].items():
+            ws.cell(row=row, column=col).value = value
+        print(f"'{plan['sheet']}'工作表: 设置 {len(plan['set'])} 个单元格, 清空 {len(plan['blank'])} 个单元格")
 
-        print(f"Fb表数据重新排列完成: 已移动 {moved_values_fb} 个值到B列")
 
-        # 比较Fb表AB两列相邻数据，确保B列数值小于A列
-        print(f"正在验证'Fb'工作表AB列数据关系...")
-        swap_count_fb = 0
-        max_row_fb = max(fb_sheet.max_row, split_index_fb)
+def write_stage_values(wb, stage_values):
+    """将各阶段的计算结果写入工作簿（ACR/Fb/SPL/THD工作表），并重新排列AB两列"""
+    print(f"正在生成写入计划...")
+    plans = plan_stage_writes(wb, stage_values)
+    apply_write_plans(wb, plans)
 
-        for row in range(1, max_row_fb + 1):
-            a_value = fb_sheet.cell(row=row, column=1).value
-            b_value = fb_sheet.cell(row=row, column=2).value
 
-            # 尝试转换为数值
-            try:
-                a_value = float(a_value) if a_value is not None else None
-                b_value = float(b_value) if b_value is not None else None
-            except (ValueError, TypeError):
-                continue
+def load_report_settings(report_id):
+    """查找报告编号对应的配置文件，返回(配置文件路径, 配置, SPL目标值列表)"""
+    print(f"正在查找报告编号 '{report_id}' 对应的配置文件...")
 
-            # 确保两个单元格都有数值
-            if a_value is not None and b_value is not None:
-                # 如果B列值大于等于A列值，则交换
-                if b_value >= a_value:
-                    fb_sheet.cell(row=row, column=1).value = b_value
-                    fb_sheet.cell(row=row, column=2).value = a_value
-                    swap_count_fb += 1
+    # 查找配置文件
+    config_file_path = find_config_file(report_id)
+    if not config_file_path:
+        raise ValueError("无法找到匹配的配置文件")
 
-        print(f"Fb表数据验证完成: 执行了 {swap_count_fb} 次交换操作")
-    else:
-        print(f"没有找到符合条件的数据，'Fb'工作表保持为空")
+    print(f"使用配置文件: {config_file_path}")
 
-    # 处理SPL原档工作表
-    print(f"正在处理'SPL原档'工作表数据...")
+    # 读取、解析并验证配置（同一配置文件未修改时直接使用缓存）
+    config = load_report_config(config_file_path)
 
-    try:
-        # 获取SPL原档中的数据
-        spl_df = excel_file.parse("SPL原档")
+    print(f"配置参数:")
+    for key, value in config.items():
+        print(f"  {key}: {value}")
 
-        # 创建或获取SPL工作表
-        if "SPL" in wb.sheetnames:
-            spl_sheet = wb["SPL"]
-        else:
-            spl_sheet = wb.create_sheet("SPL")
+    # 生成SPL目标值列表
+    spl_targets = generate_spl_targets(
+        config['SPL_MODE'],
+        config['A_RANGE_LOW'],
+        config['A_RANGE_HIGH'],
+        config['SPL_RANGE_STEP'],
+        config['SPL_FIXED_TARGETS'],
+        config['SPL_CUSTOM_TARGETS'],
+        config['SPL_RANGE_LOW'],
+        config['SPL_RANGE_HIGH']
+    )
+    print(f"  SPL查找模式: {config['SPL_MODE']}")
+    if config['SPL_MODE'] == "RANGE_ALL":
+        print(f"  SPL查找范围: {config['SPL_RANGE_LOW']}~{config['SPL_RANGE_HIGH']} (处理范围内的所有值)")
+    else:
+        print(f"  SPL查找目标: {spl_targets} (共{len(spl_targets)}个值)")
 
-        # 清空SPL工作表中已有的数据
-        for row in range(1, spl_sheet.max_row + 1):
-            for col in range(1, spl_sheet.max_column + 1):
-                spl_sheet.cell(row=row, column=col).value = None
+    print(f"  THD原档A列范围: {config['THD_A_RANGE_LOW']}~{config['THD_A_RANGE_HIGH']}")
 
-        # 获取SPL原档的总列数
-        total_columns = spl_df.shape[1]
+    return config_file_path, config, spl_targets
 
-        if total_columns < 2:
-            print(f"SPL原档中至少需要两列数据")
-        else:
-            # 提取SPL原档A列数据
-            spl_col_a = pd.to_numeric(spl_df.iloc[:, 0], errors='coerce').dropna()
-
-            # 处理所有偶数列（B,D,F...）
-            for col_idx in range(1, total_columns, 2):
-                # 获取当前偶数列的数据
-                even_col = pd.to_numeric(spl_df.iloc[:, col_idx], errors='coerce').dropna()
-
-                # 合并A列和当前偶数列数据
-                merged_df = pd.concat([spl_col_a, even_col], axis=1).dropna()
-                merged_df.columns = ['A', 'Current']
-
-                if not merged_df.empty:
-                    # 获取当前列的字母表示(用于日志)
-                    col_letter = get_column_letter(col_idx + 1)
-                    print(f"  正在处理偶数列 {col_letter}...")
-
-                    # 查找A列中所有在范围内的行，并记录对应的偶数列值
-                    target_values = []
-
-                    if config['SPL_MODE'] == "RANGE_ALL":
-                        # 处理范围内的所有值
-                        filtered_df = merged_df[
-                            (merged_df['A'] >= config['SPL_RANGE_LOW']) & (merged_df['A'] <= config['SPL_RANGE_HIGH'])]
-
-                        if not filtered_df.empty:
-                            target_values = filtered_df['Current'].tolist()
-                            print(
-                                f"    在A列中找到{len(target_values)}个值在{config['SPL_RANGE_LOW']}~{config['SPL_RANGE_HIGH']}范围内")
-                        else:
-                            print(f"    在A列中未找到值在{config['SPL_RANGE_LOW']}~{config['SPL_RANGE_HIGH']}范围内")
-                    else:
-                        # 处理指定目标值列表
-                        missing_targets = []
-
-                        for target in spl_targets:
-                            # 找到A列中等于目标值的所有行
-                            target_rows = merged_df[merged_df['A'] == target]
-
-                            if not target_rows.empty:
-                                # 获取对应的偶数列值
-                                current_values = target_rows['Current'].tolist()
-
-                                # 如果有多个匹配值，取第一个
-                                if current_values:
-                                    target_values.append(current_values[0])
-                                    print(f"    在A列中找到值 {target}，对应的{col_letter}列值为 {current_values[0]}")
-                                else:
-                                    print(f"    警告: 在A列中找到值 {target}，但对应的{col_letter}列值为空")
-                                    missing_targets.append(target)
-                            else:
-                                # 如果没有找到完全匹配的值，使用最接近的值
-                                print(f"    警告: 在A列中未找到值 {target}，尝试查找最接近的值...")
-                                nearest_row = merged_df.iloc[(merged_df['A'] - target).abs().argsort()[:1]]
-
-                                if not nearest_row.empty:
-                                    a_value = nearest_row.iloc[0]['A']
-                                    current_value = nearest_row.iloc[0]['Current']
-
-                                    # 存储对应的当前列值
-                                    target_values.append(current_value)
-                                    print(
-                                        f"    在A列中找到最接近的值 {a_value}，对应的{col_letter}列值为 {current_value}")
-                                else:
-                                    print(f"    警告: 在A列中未找到接近的值")
-                                    missing_targets.append(target)
-
-                    # 计算当前偶数列的平均值并写入SPL工作表
-                    if target_values:
-                        # 计算平均值
-                        average_value = sum(target_values) / len(target_values)
-
-                        # 记录缺失的目标值（如果有）
-                        if config['SPL_MODE'] != "RANGE_ALL" and missing_targets:
-                            print(f"    注意: 在{col_letter}列中未找到以下目标值: {missing_targets}")
-
-                        # 确定写入位置（B列对应A1，D列对应A2，依此类推）
-                        row_in_spl = (col_idx + 1) // 2
-                        spl_sheet.cell(row=row_in_spl, column=1).value = average_value
-                        print(
-                            f"    已将{col_letter}列对应值的平均值 {average_value:.4f} 写入'SPL'工作表的A列第{row_in_spl}行")
-                    else:
-                        print(f"    没有找到符合条件的数据，无法计算平均值")
-                else:
-                    print(f"  偶数列 {col_letter} 与A列合并后的数据为空")
-
-            print(f"SPL原档所有偶数列处理完成")
-
-            # 读取SPL表A列中的所有数据
-            print(f"正在分析'SPL'工作表数据...")
-            spl_data = []
-            max_row_spl = spl_sheet.max_row
-            for row in range(1, max_row_spl + 1):
-                cell_value = spl_sheet.cell(row=row, column=1).value
-                if cell_value is not None:
-                    spl_data.append(cell_value)
-
-            # 计算分割点
-            split_index_spl = len(spl_data) // 2
-
-            # 将后一半数据移至B列的起始行，并清空A列对应位置
-            print(f"正在重新排列'SPL'工作表数据...")
-            moved_values_spl = 0
-
-            for i in range(split_index_spl, len(spl_data)):
-                source_row = i + 1
-                target_row = (i - split_index_spl) + 1
-                spl_sheet.cell(row=target_row, column=2).value = spl_data[i]
-                spl_sheet.cell(row=source_row, column=1).value = None  # 清空A列原数据
-                moved_values_spl += 1
-
-            print(f"SPL表数据重新排列完成: 已移动 {moved_values_spl} 个值到B列")
-
-            # 比较SPL表AB两列相邻数据，确保A列数值大于B列
-            print(f"正在验证'SPL'工作表AB列数据关系...")
-            swap_count_spl = 0
-            max_compare_row_spl = max(spl_sheet.max_row, split_index_spl)
-
-            for row in range(1, max_compare_row_spl + 1):
-                a_value = spl_sheet.cell(row=row, column=1).value
-                b_value = spl_sheet.cell(row=row, column=2).value
-
-                # 尝试转换为数值
-                try:
-                    a_value = float(a_value) if a_value is not None else None
-                    b_value = float(b_value) if b_value is not None else None
-                except (ValueError, TypeError):
-                    continue
-
-                # 确保两个单元格都有数值
-                if a_value is not None and b_value is not None:
-                    # 如果A列值小于等于B列值，则交换
-                    if a_value <= b_value:
-                        spl_sheet.cell(row=row, column=1).value = b_value
-                        spl_sheet.cell(row=row, column=2).value = a_value
-                        swap_count_spl += 1
-
-            print(f"SPL表数据验证完成: 执行了 {swap_count_spl} 次交换操作")
-
-    except Exception as spl_e:
-        print(f"处理'SPL原档'工作表时发生错误: {spl_e}")
-
-    # 处理THD原档工作表
-    print(f"正在处理'THD原档'工作表数据...")
 
+def save_workbook(wb, file_path):
+    """保存修改后的Excel文件"""
+    print(f"正在保存修改后的Excel文件...")
     try:
-        # 获取THD原档中的数据
-        thd_df = excel_file.parse("THD原档")
+        wb.save(file_path)
+        print(f"文件已成功保存到: {file_path}")
+    except Exception as save_e:
+        print(f"保存文件时发生错误: {save_e}")
 
-        # 创建或获取THD工作表
-        if "THD" in wb.sheetnames:
-            thd_sheet = wb["THD"]
-        else:
-            thd_sheet = wb.create_sheet("THD")
 
-        # 清空THD工作表中已有的数据
-        for row in range(1, thd_sheet.max_row + 1):
-            for col in range(1, thd_sheet.max_column + 1):
-                thd_sheet.cell(row=row, column=col).value = None
+def main():
+    try:
+        # 获取用户输入的报告编号
+        report_id = input("请输入报告编号: ").strip()
+        if not report_id:
+            raise ValueError("报告编号不能为空")
 
-        # 获取THD原档的总列数
-        total_columns = thd_df.shape[1]
+        _, config, spl_targets = load_report_settings(report_id)
 
-        if total_columns < 2:
-            print(f"THD原档中至少需要两列数据")
-        else:
-            # 提取THD原档A列数据
-            thd_col_a = pd.to_numeric(thd_df.iloc[:, 0], errors='coerce').dropna()
-
-            # 处理所有偶数列（B,D,F...）
-            for col_idx in range(1, total_columns, 2):
-                # 获取当前偶数列的数据
-                even_col = pd.to_numeric(thd_df.iloc[:, col_idx], errors='coerce').dropna()
-
-                # 合并A列和当前偶数列数据
-                merged_df = pd.concat([thd_col_a, even_col], axis=1).dropna()
-                merged_df.columns = ['A', 'Current']
-
-                if not merged_df.empty:
-                    # 获取当前列的字母表示(用于日志)
-                    col_letter = get_column_letter(col_idx + 1)
-                    print(f"  正在处理偶数列 {col_letter}...")
-
-                    # 筛选A列在指定范围内的数据
-                    filtered_df = merged_df[
-                        (merged_df['A'] >= config['THD_A_RANGE_LOW']) & (merged_df['A'] <= config['THD_A_RANGE_HIGH'])]
-
-                    if not filtered_df.empty:
-                        # 找到偶数列的最大值
-                        max_value = filtered_df['Current'].max()
-
-                        # 找到对应的A列值
-                        max_row = filtered_df[filtered_df['Current'] == max_value].iloc[0]
-                        a_value = max_row['A']
-
-                        print(
-                            f"    在A列范围 {config['THD_A_RANGE_LOW']}~{config['THD_A_RANGE_HIGH']} 内找到{col_letter}列的最大值: {max_value}")
-                        print(f"    对应的A列值为: {a_value}")
-
-                        # 确定写入位置（B列对应A1，D列对应A2，依此类推）
-                        row_in_thd = (col_idx + 1) // 2
-                        thd_sheet.cell(row=row_in_thd, column=1).value = max_value
-                    else:
-                        print(
-                            f"    在A列中未找到范围在 {config['THD_A_RANGE_LOW']}~{config['THD_A_RANGE_HIGH']} 之间的值")
-                else:
-                    print(f"  偶数列 {col_letter} 与A列合并后的数据为空")
-
-            print(f"THD原档所有偶数列处理完成")
-
-            # 读取THD表A列中的所有数据
-            print(f"正在分析'THD'工作表数据...")
-            thd_data = []
-            max_row_thd = thd_sheet.max_row
-            for row in range(1, max_row_thd + 1):
-                cell_value = thd_sheet.cell(row=row, column=1).value
-                if cell_value is not None:
-                    thd_data.append(cell_value)
-
-            # 计算分割点
-            split_index_thd = len(thd_data) // 2
-
-            # 将后一半数据移至B列的起始行，并清空A列对应位置
-            print(f"正在重新排列'THD'工作表数据...")
-            moved_values_thd = 0
-
-            for i in range(split_index_thd, len(thd_data)):
-                source_row = i + 1
-                target_row = (i - split_index_thd) + 1
-                thd_sheet.cell(row=target_row, column=2).value = thd_data[i]
-                thd_sheet.cell(row=source_row, column=1).value = None  # 清空A列原数据
-                moved_values_thd += 1
-
-            print(f"THD表数据重新排列完成: 已移动 {moved_values_thd} 个值到B列")
-
-            # 比较THD表AB两列相邻数据，确保B列数值大于A列
-            print(f"正在验证'THD'工作表AB列数据关系...")
-            swap_count_thd = 0
-            max_compare_row_thd = max(thd_sheet.max_row, split_index_thd)
-
-            for row in range(1, max_compare_row_thd + 1):
-                a_value = thd_sheet.cell(row=row, column=1).value
-                b_value = thd_sheet.cell(row=row, column=2).value
-
-                # 尝试转换为数值
-                try:
-                    a_value = float(a_value) if a_value is not None else None
-                    b_value = float(b_value) if b_value is not None else None
-                except (ValueError, TypeError):
-                    continue
-
-                # 确保两个单元格都有数值
-                if a_value is not None and b_value is not None:
-                    # 如果B列值小于等于A列值，则交换
-                    if b_value <= a_value:
-                        thd_sheet.cell(row=row, column=1).value = b_value
-                        thd_sheet.cell(row=row, column=2).value = a_value
-                        swap_count_thd += 1
-
-            print(f"THD表数据验证完成: 执行了 {swap_count_thd} 次交换操作")
-
-    except Exception as thd_e:
-        print(f"处理'THD原档'工作表时发生错误: {thd_e}")
-
-    # 保存修改后的Excel文件
-    print(f"正在保存修改后的Excel文件...")
-    try:
-        wb.save(config['FILE_PATH'])
-        print(f"文件已成功保存到: {config['FILE_PATH']}")
-    except Exception as save_e:
-        print(f"保存文件时发生错误: {save_e}")
+        print(f"开始执行Excel数据处理脚本")
+        start_time = time.time()
+
+        # 计算各阶段结果
+        raw_sheets = load_raw_sheets(config['FILE_PATH'])
+        stage_values = compute_stage_values(raw_sheets, config, spl_targets)
+
+        # 写入并保存
+        wb = openpyxl.load_workbook(config['FILE_PATH'])
+        write_stage_values(wb, stage_values)
+        save_workbook(wb, config['FILE_PATH'])
+
+        end_time = time.time()
+        print(f"脚本执行完成，耗时: {end_time - start_time:.2f}秒")
+
+    except Exception as e:
+        print(f"执行脚本时发生错误: {e}")
 
-    end_time = time.time()
-    print(f"脚本执行完成，耗时: {end_time - start_time:.2f}秒")
 
-except Exception as e:
-    print(f"执行脚本时发生错误: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
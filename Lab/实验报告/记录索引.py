@@ -0,0 +1,139 @@
+"""老化实验记录的报告编号索引，供数据处理、数据写入、报告写入共用
+
+首次查询时解析老化实验记录，并在同目录下生成索引文件（报告编号 -> 行）。
+之后只有记录文件的修改时间或大小发生变化时才会重新解析Excel，其余情况直接加载索引。
+"""
+import os
+import pickle
+import pandas as pd
+
+LAB_RECORD_FILE = r"E:\System\pic\A报告\老化实验记录.xlsx"
+INDEX_SUFFIX = ".index.pkl"  # 索引文件后缀，与老化实验记录同目录同名
+INDEX_VERSION = 1  # 索引结构变化时递增，旧索引自动失效
+
+# 老化实验记录中各脚本用到的列（索引从0开始）
+I_COL = 8  # I列：客户；型号；料号
+M_COL = 12  # M列：功率；电压；测试条件等
+N_COL = 13  # N列：报告编号
+Q_COL = 16  # Q列：测试设备
+
+# 进程内缓存，同一进程多次查询时不重复加载索引文件
+_loaded_indexes = {}
+
+
+def get_index_path(lab_record_file):
+    """返回老化实验记录对应的索引文件路径"""
+    return os.path.splitext(lab_record_file)[0] + INDEX_SUFFIX
+
+
+def get_file_signature(file_path):
+    """返回文件的(修改时间, 大小)，用于判断索引是否过期"""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def normalize_report_id(value):
+    """将单元格值转换为报告编号字符串"""
+    if pd.isna(value):
+        return ""
+    return str(value).strip()
+
+
+def build_record_index(lab_record_file, signature):
+    """解析老化实验记录并生成索引"""
+    df = pd.read_excel(lab_record_file)
+
+    # 报告编号 -> 所在行号列表（按文件中的先后顺序）
+    report_rows = {}
+    if N_COL < df.shape[1]:
+        for row_pos, value in enumerate(df.iloc[:, N_COL]):
+            report_id = normalize_report_id(value)
+            if report_id:
+                report_rows.setdefault(report_id, []).append(row_pos)
+
+    return {
+        'version': INDEX_VERSION,
+        'signature': signature,
+        'records': df,
+        'report_rows': report_rows,
+    }
+
+
+def read_index_file(index_path, signature):
+    """读取索引文件，索引不存在、已损坏或已过期时返回None"""
+    try:
+        with open(index_path, 'rb') as f:
+            index = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取老化实验记录索引失败，将重新生成: {e}")
+        return None
+
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return None
+    if index.get('signature') != signature:
+        return None
+    return index
+
+
+def write_index_file(index_path, index):
+    """写入索引文件（先写临时文件再替换，避免中断时留下损坏的索引）"""
+    temp_path = index_path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        print(f"警告: 无法保存老化实验记录索引，下次运行将重新解析: {e}")
+
+
+def load_record_index(lab_record_file=LAB_RECORD_FILE):
+    """加载老化实验记录索引，记录文件变化时自动重建"""
+    signature = get_file_signature(lab_record_file)
+
+    index = _loaded_indexes.get(lab_record_file)
+    if index is not None and index['signature'] == signature:
+        return index
+
+    index_path = get_index_path(lab_record_file)
+    index = read_index_file(index_path, signature)
+    if index is None:
+        print(f"正在解析老化实验记录并生成索引: {lab_record_file}")
+        index = build_record_index(lab_record_file, signature)
+        write_index_file(index_path, index)
+    else:
+        print(f"已加载老化实验记录索引: {index_path}")
+
+    _loaded_indexes[lab_record_file] = index
+    return index
+
+
+def lookup_report(report_id, lab_record_file=LAB_RECORD_FILE):
+    """按N列报告编号精确查找，返回所有匹配行（pandas.Series，按文件顺序）"""
+    index = load_record_index(lab_record_file)
+    rows = index['report_rows'].get(normalize_report_id(report_id), [])
+    return [index['records'].iloc[row_pos] for row_pos in rows]
+
+
+def search_report(report_id, lab_record_file=LAB_RECORD_FILE):
+    """查找包含报告编号的记录行，返回(行数据, 所在列名)，未找到时返回(None, None)
+
+    优先使用N列索引精确匹配（多条时取最后一条）；未命中时退回到按列、
+    从最后一行向上的包含匹配，与原先逐单元格查找的规则一致。
+    """
+    index = load_record_index(lab_record_file)
+    df = index['records']
+
+    rows = index['report_rows'].get(normalize_report_id(report_id))
+    if rows:
+        return df.iloc[rows[-1]], df.columns[N_COL]
+
+    report_id = str(report_id)
+    for col in df.columns:
+        column = df[col]
+        matched = column.notna() & column.astype(str).str.contains(report_id, regex=False)
+        if matched.any():
+            return df.iloc[matched.to_numpy().nonzero()[0][-1]], col
+
+    return None, None
@@ -0,0 +1,219 @@
+"""实验报告配置文件注册表，供数据处理、数据写入共用
+
+配置目录中的文件名只在目录变化时切分一次，建立字符二元组倒排索引，关键字查找时先用
+索引缩小候选文件，再校验是否包含关键字（与原先的子串匹配规则一致）。
+读取、解析、校验后的配置按(路径, 修改时间)缓存，同一进程内重复使用不再重新解析。
+"""
+import os
+
+CONFIG_DIR = r"E:\System\pic\A报告\模板\配置文件"
+CONFIG_EXT = '.txt'
+GRAM_SIZE = 2  # 倒排索引的分词长度（字符二元组）
+
+# 定义配置参数元数据（不包含默认值）
+CONFIG_METADATA = {
+    # 基本配置
+    'TARGET_VALUE': {'type': int},
+    'FILE_PATH': {'type': str},
+    'A_RANGE_LOW': {'type': int},
+    'A_RANGE_HIGH': {'type': int},
+    'FIND_MAX': {'type': lambda x: x.lower() == 'true'},
+
+    # SPL原档配置
+    'SPL_MODE': {'type': str},
+    'SPL_FIXED_TARGETS': {'type': lambda x: [int(v) for v in x.split(',')]},
+    'SPL_RANGE_STEP': {'type': int},
+    'SPL_CUSTOM_TARGETS': {'type': lambda x: [int(v) for v in x.split(',')]},
+    'SPL_RANGE_LOW': {'type': int},
+    'SPL_RANGE_HIGH': {'type': int},
+
+    # THD原档配置
+    'THD_A_RANGE_LOW': {'type': int},
+    'THD_A_RANGE_HIGH': {'type': int}
+}
+
+# 进程内缓存
+_config_indexes = {}  # 配置目录 -> 文件名倒排索引
+_raw_configs = {}  # (路径, 修改时间) -> 配置字典
+_report_configs = {}  # (路径, 修改时间) -> 解析并校验后的配置
+
+
+def read_config(file_path):
+    """读取配置文件并返回配置字典"""
+    config = {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                # 跳过注释行和空行
+                if line.startswith('#') or not line:
+                    continue
+                # 解析配置项
+                key, value = line.split('=', 1)
+                config[key.strip()] = value.strip()
+        return config
+    except Exception as e:
+        print(f"读取配置文件时发生错误: {e}")
+        return None
+
+
+def parse_config(config):
+    """解析配置字典并返回结构化配置，不使用默认值"""
+    if not config:
+        raise ValueError("配置字典为空")
+
+    # 自动解析配置，不使用默认值
+    parsed_config = {}
+    for key, meta in CONFIG_METADATA.items():
+        if key not in config:
+            raise ValueError(f"配置文件中缺少必需的参数: {key}")
+
+        try:
+            parsed_config[key] = meta['type'](config[key])
+        except Exception as e:
+            raise ValueError(f"解析配置项 '{key}' 时发生错误: {e}") from e
+
+    return parsed_config
+
+
+def validate_config(config):
+    """验证配置是否完整且有效"""
+    required_keys = [
+        'TARGET_VALUE', 'FILE_PATH', 'A_RANGE_LOW', 'A_RANGE_HIGH', 'FIND_MAX',
+        'SPL_MODE', 'SPL_FIXED_TARGETS', 'SPL_RANGE_STEP', 'SPL_CUSTOM_TARGETS',
+        'SPL_RANGE_LOW', 'SPL_RANGE_HIGH', 'THD_A_RANGE_LOW', 'THD_A_RANGE_HIGH'
+    ]
+
+    # 检查是否缺少必需的键
+    missing_keys = [key for key in required_keys if key not in config]
+    if missing_keys:
+        raise ValueError(f"配置文件缺少以下必需参数: {', '.join(missing_keys)}")
+
+    # 验证数值范围
+    if config['A_RANGE_LOW'] >= config['A_RANGE_HIGH']:
+        raise ValueError("A_RANGE_LOW必须小于A_RANGE_HIGH")
+
+    if config['SPL_RANGE_LOW'] >= config['SPL_RANGE_HIGH']:
+        raise ValueError("SPL_RANGE_LOW必须小于SPL_RANGE_HIGH")
+
+    if config['THD_A_RANGE_LOW'] >= config['THD_A_RANGE_HIGH']:
+        raise ValueError("THD_A_RANGE_LOW必须小于THD_A_RANGE_HIGH")
+
+    # 验证SPL_MODE值
+    valid_spl_modes = ['FIXED', 'RANGE', 'CUSTOM', 'RANGE_ALL']
+    if config['SPL_MODE'] not in valid_spl_modes:
+        raise ValueError(
+            f"无效的SPL_MODE值: {config['SPL_MODE']}，必须是{'FIXED', 'RANGE', 'CUSTOM', 'RANGE_ALL'}中的一个")
+
+    return True
+
+
+def split_grams(text):
+    """将文本切分为字符二元组集合"""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def load_config_index(config_dir=CONFIG_DIR):
+    """加载配置目录的文件名倒排索引，目录内容变化（目录修改时间改变）时重建"""
+    signature = os.stat(config_dir).st_mtime_ns
+    index = _config_indexes.get(config_dir)
+    if index is not None and index['signature'] == signature:
+        return index
+
+    # 保持os.listdir的顺序，匹配时仍按该顺序取第一个文件
+    files = [file for file in os.listdir(config_dir) if file.endswith(CONFIG_EXT)]
+    grams = {}
+    for file_pos, file in enumerate(files):
+        for gram in split_grams(file):
+            grams.setdefault(gram, set()).add(file_pos)
+
+    index = {'signature': signature, 'files': files, 'grams': grams}
+    _config_indexes[config_dir] = index
+    return index
+
+
+def find_files_containing(index, keywords):
+    """返回文件名同时包含所有关键字的文件（按目录顺序）"""
+    keywords = [keyword for keyword in keywords if keyword]
+    candidates = None
+    for keyword in keywords:
+        if len(keyword) < GRAM_SIZE:
+            continue  # 过短的关键字无法用索引缩小范围，留给最后的子串校验
+        for gram in split_grams(keyword):
+            postings = index['grams'].get(gram)
+            if not postings:
+                return []
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+
+    positions = range(len(index['files'])) if candidates is None else sorted(candidates)
+    return [index['files'][pos] for pos in positions
+            if all(keyword in index['files'][pos] for keyword in keywords)]
+
+
+def match_config_files(parts, config_dir=CONFIG_DIR):
+    """为每组关键字查找匹配的配置文件，返回去重后的配置文件路径列表
+
+    每组关键字以'；'分隔，优先匹配同时包含该组所有关键字的文件；
+    没有找到时再按顺序单独匹配每个关键字，取第一个匹配的文件。
+    """
+    index = load_config_index(config_dir)
+    matched_files = []
+
+    for part in parts:
+        keywords = [keyword.strip() for keyword in part.split('；')]
+
+        # 尝试匹配包含所有关键字的单个配置文件
+        files = find_files_containing(index, keywords)
+        if files:
+            matched_files.append(os.path.join(config_dir, files[0]))
+            print(f"  找到匹配的配置文件: {files[0]}，匹配关键字: {part}")
+            continue
+
+        # 如果没有找到组合匹配，则尝试单独匹配每个关键字
+        for keyword in keywords:
+            if not keyword:
+                continue
+            files = find_files_containing(index, [keyword])
+            if files:
+                matched_files.append(os.path.join(config_dir, files[0]))
+                print(f"  找到匹配的配置文件: {files[0]}，匹配关键字: {keyword}")
+                break
+        else:
+            print(f"  警告: 未找到与关键字 '{part}' 匹配的配置文件")
+
+    # 移除重复的文件路径
+    return list(dict.fromkeys(matched_files))
+
+
+def load_raw_config(file_path):
+    """读取配置文件（按路径和修改时间缓存），读取失败时返回None"""
+    key = (file_path, os.stat(file_path).st_mtime_ns)
+    if key not in _raw_configs:
+        config = read_config(file_path)
+        if config is None:
+            return None
+        _raw_configs[key] = config
+    return _raw_configs[key]
+
+
+def load_report_config(file_path):
+    """读取、解析并校验数据处理配置（按路径和修改时间缓存）"""
+    key = (file_path, os.stat(file_path).st_mtime_ns)
+    if key not in _report_configs:
+        config = load_raw_config(file_path)
+        if not config:
+            raise ValueError("无法读取配置文件或配置文件为空")
+        config = parse_config(config)
+        validate_config(config)
+        _report_configs[key] = config
+    return _report_configs[key]
+
+
+def resolve(parts, config_dir=CONFIG_DIR):
+    """根据关键字组查找配置文件，返回(配置文件路径, 解析后的配置)，未找到时返回(None, None)"""
+    matched_files = match_config_files(parts, config_dir)
+    if not matched_files:
+        return None, None
+    return matched_files[0], load_report_config(matched_files[0])
@@ -0,0 +1,203 @@
+"""日常性能测试数据提取（按型号配置文件驱动）
+
+每个型号一个 JSON 配置文件（型号配置/<型号>.json），描述源文件关键字、各测试项的
+提取方式、行范围、报告中的写入列和上下限。一次运行可处理配置目录中的所有型号：
+
+    python 性能测试提取.py                    # 处理所有型号
+    python 性能测试提取.py 12302-500111 ...   # 只处理指定型号
+
+源文件以只读方式打开，只读取配置中用到的行列范围；各型号在进程池中并行处理。
+"""
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from openpyxl import load_workbook
+from openpyxl.styles import Font
+from openpyxl.utils import column_index_from_string
+
+OQC_ROOT = "F:/system/Desktop/PY/OQC"  # 各型号目录所在位置：<OQC_ROOT>/<型号>/源文件、<OQC_ROOT>/<型号>/TEMP
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "型号配置")
+MAX_WORKERS = os.cpu_count() or 1
+
+# 设置红色、加粗样式
+RED_BOLD_FONT = Font(color='FF0000', bold=True)
+
+
+def load_profile(profile_path):
+    """读取型号配置，并补全目录等默认值"""
+    with open(profile_path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+
+    profile.setdefault('model', os.path.splitext(os.path.basename(profile_path))[0])
+    model_dir = os.path.join(OQC_ROOT, profile['model'])
+    profile.setdefault('source_dir', os.path.join(model_dir, "源文件"))
+    profile.setdefault('report_dir', os.path.join(model_dir, "TEMP"))
+    profile.setdefault('sheet_index', 1)
+    return profile
+
+
+def load_profiles(models=None, profile_dir=PROFILE_DIR):
+    """读取配置目录中的型号配置，models 不为空时只读取指定型号"""
+    if models:
+        paths = [os.path.join(profile_dir, model + ".json") for model in models]
+    else:
+        paths = [os.path.join(profile_dir, file) for file in sorted(os.listdir(profile_dir))
+                 if file.endswith(".json")]
+    return [load_profile(path) for path in paths]
+
+
+def get_rows(spec):
+    """测试项用到的行：rows 为行号列表，或 min_row~max_row（含两端）"""
+    if 'rows' in spec:
+        return list(spec['rows'])
+    return list(range(spec['min_row'], spec['max_row'] + 1))
+
+
+def get_columns(spec, channels):
+    """测试项用到的列：各通道的数据列，max_at 方式还包括取值列"""
+    columns = set(channels)
+    if spec['method'] == 'max_at':
+        columns |= {col + spec['value_offset'] for col in channels}
+    return columns
+
+
+def find_source_file(files, keyword):
+    """返回文件名包含关键字的源文件（有多个时取最后一个，与原脚本逐个覆盖的结果一致）"""
+    matched = [file for file in files if keyword in file]
+    return matched[-1] if matched else None
+
+
+def read_cells(file_path, sheet_index, rows, columns):
+    """以只读方式读取工作表中指定行列范围内的单元格，返回 {(行, 列): 值}"""
+    min_row, max_row = min(rows), max(rows)
+    min_col, max_col = min(columns), max(columns)
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = wb.worksheets[sheet_index]
+        cells = {}
+        for row_idx, row in enumerate(sheet.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col,
+                                                      max_col=max_col, values_only=True), start=min_row):
+            for col_idx, value in enumerate(row, start=min_col):
+                cells[(row_idx, col_idx)] = value
+        return cells
+    finally:
+        wb.close()
+
+
+def extract_item(spec, cells, channels):
+    """按测试项配置计算各通道的值"""
+    method = spec['method']
+    rows = get_rows(spec)
+    values = []
+    for col in channels:
+        column = [cells.get((row, col)) for row in rows]
+        if method == 'cell':
+            values.append(column[0])
+        elif method == 'max':
+            values.append(max(column))
+        elif method == 'mean':
+            values.append(sum(column) / len(column))
+        elif method == 'max_at':
+            # 最大值所在行（并列时取最靠前的行）对应 value_offset 列的数值
+            max_row = rows[max(range(len(rows)), key=lambda i: column[i])]
+            values.append(cells.get((max_row, col + spec['value_offset'])))
+        else:
+            raise ValueError(f"未知的提取方式: {method}")
+    return values
+
+
+def extract_measurements(profile):
+    """读取源文件并计算所有测试项，返回 {测试项: [各通道的值]}"""
+    files = os.listdir(profile['source_dir'])
+    channels = [column_index_from_string(letter) for letter in profile['channels']]
+
+    # 按源文件分组，同一文件的多个测试项只打开一次
+    groups = {}
+    for name, spec in profile['items'].items():
+        groups.setdefault(spec['file_keyword'], []).append(name)
+
+    results = {}
+    for keyword, names in groups.items():
+        file = find_source_file(files, keyword)
+        if file is None:
+            raise FileNotFoundError(f"{profile['source_dir']} 中没有包含 '{keyword}' 的文件")
+        specs = [profile['items'][name] for name in names]
+        rows = [row for spec in specs for row in get_rows(spec)]
+        columns = set().union(*(get_columns(spec, channels) for spec in specs))
+        cells = read_cells(os.path.join(profile['source_dir'], file), profile['sheet_index'], rows, columns)
+        for name, spec in zip(names, specs):
+            results[name] = extract_item(spec, cells, channels)
+    return results
+
+
+def check_condition(value, low_limit, up_limit):
+    """上下限判定，非数值按 NG 处理"""
+    if not isinstance(value, (int, float)):
+        return "NG"
+    return "OK" if low_limit <= value <= up_limit else "NG"
+
+
+def write_report(file_path, profile, results):
+    """写入一个报告：各通道数据、判定结果，NG 标红加粗"""
+    report = profile['report']
+    wb = load_workbook(file_path)
+    sheet = wb.active
+
+    for name, spec in profile['items'].items():
+        column = spec['report_column']
+        for offset, value in enumerate(results[name]):
+            sheet[f"{column}{report['first_row'] + offset}"] = value
+
+        # NG&OK判断：只判定前 judge_units 个样品（原脚本只判定第一个样品）
+        if 'limits' in spec:
+            low_limit, up_limit = spec['limits']
+            judge_values = results[name][:report.get('judge_units', 1)]
+            result = "OK" if all(check_condition(value, low_limit, up_limit) == "OK"
+                                 for value in judge_values) else "NG"
+            cell = sheet[f"{column}{report['judge_row']}"]
+            cell.value = result
+            if result == "NG":
+                cell.font = RED_BOLD_FONT
+
+    wb.save(file_path)
+    wb.close()
+
+
+def process_model(profile):
+    """处理一个型号：提取源文件数据并写入所有报告，返回(型号, 写入的报告数, 错误信息)"""
+    model = profile['model']
+    try:
+        results = extract_measurements(profile)
+        report_dir = profile['report_dir']
+        reports = [file for file in os.listdir(report_dir) if profile['report']['keyword'] in file]
+        for file in reports:
+            write_report(os.path.join(report_dir, file), profile, results)
+        return model, len(reports), None
+    except Exception as e:
+        return model, 0, str(e)
+
+
+def run(profiles, max_workers=MAX_WORKERS):
+    """在进程池中并行处理多个型号"""
+    workers = max(1, min(max_workers, len(profiles)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for model, report_count, error in executor.map(process_model, profiles):
+            if error:
+                print(f"{model}: 处理失败 - {error}")
+            else:
+                print(f"{model}: 实验前数据写入及结果判定完成，共 {report_count} 个报告")
+
+
+def main():
+    profiles = load_profiles(sys.argv[1:])
+    if not profiles:
+        print(f"配置目录中没有型号配置文件: {PROFILE_DIR}")
+        return
+    print(f"共 {len(profiles)} 个型号")
+    run(profiles)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,84 @@
+import numbers
+from datetime import datetime
+
 import pandas as pd
 import numpy as np
+from openpyxl import Workbook, load_workbook
+from pandas.util import hash_pandas_object
+
+CHUNK_ROWS = 200000  # 流式模式下每批处理的行数
+# 组特征由两个独立的64位哈希组成（加上组的行数），不同组内容发生碰撞的概率可忽略
+HASH_KEYS = ("0123456789abcdef", "fedcba9876543210")
+
+
+def value_kind(value):
+    """单元格值的类型标记，参与组特征的哈希
+
+    hash_pandas_object 按文本形式哈希object列，数值1001和文本"1001"、True和"True"会得到相同的哈希，
+    因此把类型一起哈希。数值（含布尔）统一标记为number，与原先逐行比较时 1 == 1.0 == True 的结果一致；
+    pandas的Timestamp和openpyxl的datetime同样视为一类，保证流式和一次性读取结果相同。
+    """
+    if value is None:
+        return 'none'
+    if isinstance(value, numbers.Number):
+        return 'number'
+    if isinstance(value, datetime):
+        return 'datetime'
+    return type(value).__name__
+
+
+def hash_groups(df):
+    """按A列非空行划分组，计算每组B、C列内容（值和类型）的特征
+
+    返回 (每行所属组号, 每组特征DataFrame)。组号从1开始，0表示第一个组之前的行（不属于任何组）。
+    组内每行的哈希先与行在组内的位置混合再求和，因此特征与行的顺序有关，和逐行比较的结果一致。
+    """
+    group_ids = df['A'].notna().cumsum().to_numpy()
+    in_group = group_ids > 0
+    ids = group_ids[in_group]
+    # B、C统一按object处理，空值统一为None，避免同样的内容因列类型或空值写法不同得到不同的哈希
+    content = df.loc[in_group, ['B', 'C']].astype(object)
+    content = content.where(content.notna(), None)
+    for column in ['B', 'C']:
+        content[f'{column}_kind'] = content[column].map(value_kind)
+    positions = pd.Series(ids).groupby(ids).cumcount().to_numpy()
+
+    features = {'rows': np.bincount(ids)[1:]}
+    for n, hash_key in enumerate(HASH_KEYS):
+        row_hash = hash_pandas_object(content, index=False, hash_key=hash_key).to_numpy()
+        mixed = hash_pandas_object(pd.DataFrame({'h': row_hash, 'pos': positions}),
+                                   index=False, hash_key=hash_key).to_numpy()
+        # 按组求和（uint64 溢出回绕即可）
+        sums = np.zeros(len(features['rows']) + 1, dtype=np.uint64)
+        np.add.at(sums, ids, mixed)
+        features[f'h{n}'] = sums[1:]
+    return group_ids, pd.DataFrame(features, index=np.arange(1, len(features['rows']) + 1))
+
+
+def select_unique_groups(df, seen_features):
+    """返回保留的行（布尔数组）、组数、保留组数；seen_features 为已出现过的组特征集合，会被更新"""
+    group_ids, features = hash_groups(df)
+    if features.empty:
+        return np.zeros(len(df), dtype=bool), 0, 0
+
+    keys = list(features.itertuples(index=False, name=None))
+    keep_group = ~features.duplicated(keep='first').to_numpy()
+    if seen_features:
+        keep_group &= np.fromiter((key not in seen_features for key in keys), dtype=bool, count=len(keys))
+    seen_features.update(key for key, keep in zip(keys, keep_group) if keep)
+
+    keep_by_id = np.concatenate(([False], keep_group))
+    return keep_by_id[group_ids], len(features), int(keep_group.sum())
 
 
-def remove_duplicate_groups(input_file, output_file, sheet_name=0):
+def remove_duplicate_groups(input_file, output_file, sheet_name=0, stream=False, chunk_rows=CHUNK_ROWS):
+    """删除B、C列内容完全相同的重复组（A列非空的行为组的第一行），保留第一次出现的组
+
+    stream=True 时按批流式读写，适合内存放不下的大BOM；结果与一次性读取相同。
+    """
+    if stream:
+        return remove_duplicate_groups_streaming(input_file, output_file, sheet_name, chunk_rows)
+
     # 读取数据（指定列索引0、1、2，对应A、B、C列，无表头）
     df = pd.read_excel(input_file, sheet_name=sheet_name, usecols=[0, 1, 2], header=None)
     # 给列命名（方便后续处理，0对应A列，1对应B列，2对应C列）
@@ -11,47 +87,67 @@ def remove_duplicate_groups(input_file, output_file, sheet_name=0):
     # 处理空值（将A列空值转为NaN便于判断）
     df['A'] = df['A'].replace('', np.nan)
 
-    # 识别组的起始位置（A列非空的行索引）
-    group_starts = df.index[df['A'].notna()].tolist()
-    if not group_starts:
+    if not df['A'].notna().any():
         print("未找到任何组（A列无有效值）")
         return
 
-    # 确定每组的行范围
-    group_starts.append(len(df))
-    groups = []
-
-    for i in range(len(group_starts) - 1):
-        start = group_starts[i]
-        end = group_starts[i + 1] - 1
-        group_data = df.loc[start:end, ['B', 'C']]
-        group_feature = tuple(tuple(row) for row in group_data.values)
-        groups.append({
-            'start': start,
-            'end': end,
-            'feature': group_feature,
-            'data': group_data
-        })
-
-    # 筛选唯一组
-    seen_features = set()
-    unique_groups = []
-    for group in groups:
-        if group['feature'] not in seen_features:
-            seen_features.add(group['feature'])
-            unique_groups.append(group)
-
-    # 合并结果并输出
-    all_rows = []
-    for group in unique_groups:
-        all_rows.extend(range(group['start'], group['end'] + 1))
-    result_df = df.loc[all_rows].reset_index(drop=True)
+    keep_rows, group_count, unique_count = select_unique_groups(df, set())
+    result_df = df[keep_rows].reset_index(drop=True)
     # 输出时不保留临时列名（如果需要）
     result_df.to_excel(output_file, index=False, header=None)
-    print(f"处理完成！共识别{len(groups)}组，去重后保留{len(unique_groups)}组，结果已保存至{output_file}")
+    print(f"处理完成！共识别{group_count}组，去重后保留{unique_count}组，结果已保存至{output_file}")
+
+
+def remove_duplicate_groups_streaming(input_file, output_file, sheet_name=0, chunk_rows=CHUNK_ROWS):
+    """流式版本：每次读取 chunk_rows 行，处理其中完整的组，最后一个（可能未结束的）组留到下一批"""
+    source = load_workbook(input_file, read_only=True, data_only=True)
+    sheet = source.worksheets[sheet_name] if isinstance(sheet_name, int) else source[sheet_name]
+    target = Workbook(write_only=True)
+    target_sheet = target.create_sheet()
+
+    seen_features = set()
+    group_count = unique_count = 0
+    pending = []  # 尚未处理的行（从最后一个组的第一行开始）
+    flush_at = chunk_rows  # 留下的行之外再读满 chunk_rows 行才处理下一批
+
+    def flush(rows, final):
+        nonlocal group_count, unique_count
+        df = pd.DataFrame(rows, columns=['A', 'B', 'C'], dtype=object)
+        df['A'] = df['A'].replace('', np.nan)
+        starts = np.flatnonzero(df['A'].notna().to_numpy())
+        if not len(starts):
+            # 还没有遇到组的第一行：第一个组之前的行直接丢弃
+            return []
+        carry_from = len(df) if final else starts[-1]
+        keep_rows, groups, unique = select_unique_groups(df.iloc[:carry_from], seen_features)
+        group_count += groups
+        unique_count += unique
+        for row in df.iloc[:carry_from][keep_rows].itertuples(index=False, name=None):
+            target_sheet.append([None if pd.isna(value) else value for value in row])
+        return rows[carry_from:]
+
+    try:
+        for row in sheet.iter_rows(max_col=3, values_only=True):
+            pending.append(tuple(row) + (None,) * (3 - len(row)))
+            if len(pending) >= flush_at:
+                pending = flush(pending, final=False)
+                flush_at = len(pending) + chunk_rows
+        # 与 read_excel 一致：忽略末尾的空行
+        while pending and all(value is None for value in pending[-1]):
+            pending.pop()
+        if pending:
+            flush(pending, final=True)
+    finally:
+        source.close()
+
+    if not group_count:
+        print("未找到任何组（A列无有效值）")
+        return
+    target.save(output_file)
+    print(f"处理完成！共识别{group_count}组，去重后保留{unique_count}组，结果已保存至{output_file}")
 
 
 if __name__ == "__main__":
     input_file = r"E:\System\download\组装BOM五表头.xlsx"  # 注意路径前加r避免转义问题
     output_file = r"E:\System\download\组装BOM五表头2.xlsx"
-    remove_duplicate_groups(input_file, output_file)
\ No newline at end of file
+    remove_duplicate_groups(input_file, output_file)
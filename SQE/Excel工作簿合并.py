@@ -1,53 +1,187 @@
+import csv
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 import openpyxl
 from openpyxl import Workbook
 
 # =============================
 # 配置区
 # =============================
-src_path = r"E:\System\download\IQC样品明细.xlsx"
+src_paths = [
+    r"E:\System\download\IQC样品明细.xlsx",
+]
 dst_path = r"E:\System\download\IQC样品明细_合集.xlsx"
+output_format = None  # None=按 dst_path 的扩展名判断，可选 "xlsx" / "csv" / "parquet"（parquet 需要安装 pyarrow）
+max_workers = None  # 并行读取源文件的进程数，None=CPU核数；只有一个源文件或设为1时不启动子进程
 
-# =============================
-# 读取源文件
-# =============================
-wb_src = openpyxl.load_workbook(src_path, data_only=True)
-sheet_names = wb_src.sheetnames
+BATCH_ROWS = 5000  # 子进程与主进程之间每次传递的行数
 
-# 新建目标文件
-wb_new = Workbook()
-ws_new = wb_new.active
-ws_new.title = "合集"
 
 # =============================
-# 合并逻辑
+# 读取与清洗
 # =============================
-for name in sheet_names:
-    ws = wb_src[name]
-    print(f"正在处理工作表：{name}")
-
-    # 跳过第一行（表头）
-    rows = list(ws.iter_rows(values_only=True))[1:]
-
-    for row in rows:
+def clean_rows(ws):
+    """逐行产出清洗后的数据（跳过第一行表头）"""
+    for row in islice(ws.iter_rows(values_only=True), 1, None):
         if not row:
             continue
 
         # 去除每个单元格中的空格（前中后）
-        cleaned = []
-        for cell in row:
-            if isinstance(cell, str):
-                cleaned.append(cell.replace(" ", ""))  # 去掉所有空格
-            else:
-                cleaned.append(cell)
+        cleaned = [cell.replace(" ", "") if isinstance(cell, str) else cell for cell in row]
 
         # 跳过首列为空的行
         if cleaned[0] in (None, "", " "):
             continue
 
-        ws_new.append(cleaned)
+        yield cleaned
+
+
+def iter_source_rows(src_path):
+    """以只读模式依次读取源文件中每个工作表的清洗后数据"""
+    wb_src = openpyxl.load_workbook(src_path, read_only=True, data_only=True)
+    try:
+        for name in wb_src.sheetnames:
+            ws = wb_src[name]
+            if not hasattr(ws, "iter_rows"):
+                continue  # 图表工作表
+            print(f"正在处理工作表：{os.path.basename(src_path)} / {name}")
+            yield from clean_rows(ws)
+    finally:
+        wb_src.close()
+
+
+def iter_batches(rows):
+    """将行分成每批 BATCH_ROWS 行"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, BATCH_ROWS))
+        if not batch:
+            return
+        yield batch
+
+
+def dump_source(src_path, temp_path):
+    """子进程：读取一个源文件，清洗后的行分批写入临时文件，返回 (行数, 最大列数)"""
+    row_count = width = 0
+    with open(temp_path, "wb") as f:
+        for batch in iter_batches(iter_source_rows(src_path)):
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+            row_count += len(batch)
+            width = max(width, max(len(row) for row in batch))
+    return row_count, width
+
+
+def load_batches(temp_path):
+    """依次读出临时文件中的各批数据"""
+    with open(temp_path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
 
 # =============================
-# 保存结果
+# 写出结果
 # =============================
-wb_new.save(dst_path)
-print(f"✅ 合并完成！结果已保存为：{dst_path}")
+def write_xlsx(path, batches, width):
+    wb_new = Workbook(write_only=True)
+    ws_new = wb_new.create_sheet("合集")
+    for batch in batches:
+        for row in batch:
+            ws_new.append(row)
+    wb_new.save(path)
+
+
+def write_csv(path, batches, width):
+    # utf-8-sig 让 Excel 直接打开时中文不乱码
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        for batch in batches:
+            writer.writerows(batch)
+
+
+def import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("输出 parquet 需要安装 pyarrow：pip install pyarrow")
+    return pa, pq
+
+
+def write_parquet(path, batches, width):
+    """各工作表的列类型不一定一致，parquet 中统一按文本保存"""
+    pa, pq = import_pyarrow()
+
+    schema = pa.schema([(f"列{col}", pa.string()) for col in range(1, width + 1)])
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            columns = [[] for _ in range(width)]
+            for row in batch:
+                for col in range(width):
+                    value = row[col] if col < len(row) else None
+                    columns[col].append(None if value is None else str(value))
+            writer.write_table(pa.table(columns, schema=schema))
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+
+def get_output_format(path, fmt=None):
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".") or "xlsx").lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"不支持的输出格式：{fmt}，可选 {', '.join(WRITERS)}")
+    return fmt
+
+
+# =============================
+# 合并逻辑
+# =============================
+def merge_workbooks(src_paths, dst_path, output_format=None, max_workers=None):
+    """合并多个工作簿中所有工作表的数据（按源文件、工作表顺序），返回合并的行数
+
+    读取用只读模式、写出用 write_only 模式，逐批处理，内存占用与文件大小无关。
+    多个源文件时由子进程并行读取清洗，结果先写入临时文件，再由主进程按顺序写出。
+    """
+    writer = WRITERS[get_output_format(dst_path, output_format)]
+    if writer is write_parquet:
+        import_pyarrow()  # 读取源文件之前先确认依赖
+
+    if len(src_paths) == 1 or max_workers == 1:
+        # 不需要并行：直接从源文件流式写出
+        if writer is write_parquet:
+            # parquet 需要事先知道列数
+            width = max((len(row) for src in src_paths for row in iter_source_rows(src)), default=0)
+        else:
+            width = None
+        row_count = 0
+
+        def counted(batches):
+            nonlocal row_count
+            for batch in batches:
+                row_count += len(batch)
+                yield batch
+
+        rows = (row for src in src_paths for row in iter_source_rows(src))
+        writer(dst_path, counted(iter_batches(rows)), width)
+        return row_count
+
+    with tempfile.TemporaryDirectory(prefix="工作簿合并_") as temp_dir:
+        temp_paths = [os.path.join(temp_dir, f"{i}.pkl") for i in range(len(src_paths))]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(dump_source, src_paths, temp_paths))
+
+        width = max((w for _, w in results), default=0)
+        batches = (batch for temp_path in temp_paths for batch in load_batches(temp_path))
+        writer(dst_path, batches, width)
+        return sum(count for count, _ in results)
+
+
+if __name__ == "__main__":
+    total = merge_workbooks(src_paths, dst_path, output_format, max_workers)
+    print(f"✅ 合并完成！共 {total} 行，结果已保存为：{dst_path}")
@@ -1,38 +1,51 @@
 import os
-import re
+from datetime import date
 
+from 环保证书库 import CATALOG_PATH, open_catalog, refresh_catalog, expired, remove_path, parse_name
 
-def delete_expired_files_recursive(target_dir="."):
+
+def delete_expired_files_recursive(target_dir=".", catalog_path=CATALOG_PATH, on=None):
     """
-    递归遍历指定目录下的所有子目录，删除文件名包含"过期时间(2025-xx-xx)"的文件
+    删除指定目录（含所有子目录）下已过期的环保文件
+
+    过期日期从环保证书目录中按索引查询（早于 on，默认今天），不再按文件名中的年份匹配；
+    查询前按修改时间增量刷新该目录的记录，只有新增或变化的文件才会被读取。
+    只删除当前文件名中仍带有该过期时间的文件：文件名中去掉了过期时间的文件（例如用户改名保留），
+    证书目录按内容沿用的过期时间只用于查询报表，不会据此删除。
 
     参数:
         target_dir: 要检查的根目录路径，默认是当前目录（.）
+        catalog_path: 证书目录文件路径
+        on: 以哪一天为准判断过期，默认今天
     """
-    # 正则表达式匹配 "过期时间(2025-xx-xx)" 格式
-    pattern = re.compile(r'过期时间\((2025)-\d{2}-\d{2}\)')
-
-    # 递归遍历根目录下的所有目录、子目录、文件
-    # os.walk返回：当前目录路径、子目录列表、文件列表
-    for root_dir, sub_dirs, files in os.walk(target_dir):
-        for filename in files:
-            # 拼接当前文件的完整路径
-            file_path = os.path.join(root_dir, filename)
-
-            # 只处理文件（os.walk已过滤文件夹，此处做双重校验）
-            if os.path.isfile(file_path):
-                # 检查文件名是否匹配正则
-                if pattern.search(filename):
-                    try:
-                        # ========== 安全提示 ==========
-                        # 首次运行建议先注释下面的 os.remove 行，只保留 print 测试
-                        os.remove(file_path)
-                        # print(f"【待删除】{root_dir}\\{filename}")
-                        # 测试无误后，取消注释上面的 os.remove(file_path)，并注释掉这行提示
-                        # print(f"已删除过期文件: {root_dir}\\{filename}")
-                    except Exception as e:
-                        # 捕获删除失败的异常（比如文件被占用、权限不足）
-                        print(f"删除文件失败 {root_dir}\\{filename}: {str(e)}")
+    conn = open_catalog(catalog_path)
+    try:
+        changed, removed = refresh_catalog(conn, target_dir)
+        print(f"证书目录已刷新：新增或变化 {changed} 个，已不存在 {removed} 个")
+
+        rows = expired(conn, on, root=target_dir)
+        print(f"过期时间早于 {on or date.today()} 的文件：{len(rows)} 个")
+        for file_path, client, sample, expiry in rows:
+            info = parse_name(os.path.basename(file_path))
+            if info is None or info["expiry"] != expiry:
+                print(f"文件名中没有过期时间 {expiry}，跳过删除: {file_path}")
+                continue
+            try:
+                # ========== 安全提示 ==========
+                # 首次运行建议先注释下面的 os.remove 行，只保留 print 测试
+                os.remove(file_path)
+                # print(f"【待删除】{file_path}（过期时间 {expiry}）")
+                # 测试无误后，取消注释上面的 os.remove(file_path)，并注释掉这行提示
+                # print(f"已删除过期文件: {file_path}")
+                remove_path(conn, file_path)
+            except FileNotFoundError:
+                remove_path(conn, file_path)
+            except Exception as e:
+                # 捕获删除失败的异常（比如文件被占用、权限不足）
+                print(f"删除文件失败 {file_path}: {str(e)}")
+        conn.commit()
+    finally:
+        conn.close()
 
 
 if __name__ == "__main__":
@@ -47,4 +60,4 @@ if __name__ == "__main__":
         # 第二步：执行递归删除操作
         print(f"开始递归检查根目录（含所有子目录）: {os.path.abspath(ROOT_DIRECTORY)}")
         delete_expired_files_recursive(ROOT_DIRECTORY)
-        print("所有目录检查完成！")
\ No newline at end of file
+        print("所有目录检查完成！")
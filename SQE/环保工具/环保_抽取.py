@@ -1,12 +1,15 @@
 import pdfplumber
 import re
 import os
+import hashlib
+import json
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import multiprocessing
+import sqlite3
 from tqdm import tqdm
-import threading
 from dateutil import parser
+from 环保证书库 import CATALOG_PATH, open_catalog, record_certificate, record_failure, refresh_catalog
 
 # ================= 字段匹配规则 =================
 schemes = [
@@ -34,10 +37,25 @@ failed_file = os.path.join(folder_path, "处理失败文件.txt")
 duplicate_file = os.path.join(folder_path, "重复文件.txt")
 DEFAULT_CLIENT = "FengshunShuangxingTechnologyCo ,Ltd"
 
-# ================= 线程锁 =================
-name_lock = threading.Lock()
-rename_lock = threading.Lock()
-process_results = []
+# ================= 并行配置 =================
+# "process"=多进程（版面分析和正则匹配都是CPU密集型，多进程才能用满多核）；"thread"=多线程
+EXECUTOR_MODE = "process"
+MAX_WORKERS = None  # None=多进程时为CPU核数，多线程时为CPU核数×2
+CHUNK_SIZE = None  # 每个任务包含的PDF数（减少进程间传递的开销），None=自动
+
+# ================= 提取缓存 =================
+# 按文件内容摘要缓存前几页的文本行和匹配到的字段，文件没变化时再次运行不再打开PDF
+USE_CACHE = True
+cache_file = os.path.join(folder_path, ".环保抽取缓存.json")
+CACHE_VERSION = 1  # 缓存结构变化时递增，旧缓存自动作废
+RULES_VERSION = 2  # 修改字段匹配逻辑（match_fields）时递增，缓存的字段会按缓存的文本行重新匹配
+FIRST_PAGES = 2  # 读取前几页的文本
+READ_BYTES = 1024 * 1024
+
+# ================= 证书目录 =================
+# 重命名结果（客户、样品、接收日期、过期日期、检测类型）写入环保证书目录，供过期查询和失效文件转移使用
+USE_CATALOG = True
+catalog_path = CATALOG_PATH
 
 # ================= 工具函数 =================
 def clean_company_name(text, pdf_filename=""):
@@ -118,14 +136,6 @@ def parse_date(date_str):
         pass
     return datetime(2026, 12, 2)
 
-def is_pdf_valid(pdf_path):
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            pdf.pages[0].extract_text()
-        return True
-    except:
-        return False
-
 def looks_like_date(text):
     if not text:
         return False
@@ -136,158 +146,574 @@ def looks_like_date(text):
     return bool(re.search(r"\d{4}|\d{1,2}[-/.]\d{1,2}", t))
 
 # ================= 字段提取 =================
+CLIENT_LABELS = re.compile(r'(Company Name|Client Name|委托方|委托单位|Applicant)', re.I)
+SAMPLE_LABELS = re.compile(r'(Sample Name|样品名称|样品描述|产品名称)', re.I)
+
+
+def combine_line(lines, i):
+    """当前行连同下一行一起匹配（关键词和取值可能被换行拆开）"""
+    combined_line = lines[i]
+    if i + 1 < len(lines):
+        combined_line += " " + lines[i + 1].strip()
+    return combined_line
+
+
+def read_value(lines, i, key, field_name, value_pattern):
+    """关键词出现在第 i 行时取字段值：优先取关键词后面的内容，没有则往下找三行"""
+    combined_line = combine_line(lines, i)
+    val = ""
+    m = value_pattern.search(combined_line)
+    if m and m.group(1).strip():
+        val = m.group(1).strip()
+    else:
+        for j in range(i + 1, min(i + 4, len(lines))):
+            candidate = lines[j].strip()
+            if field_name == "date" and not looks_like_date(candidate):
+                continue
+            val = candidate
+            break
+    if field_name == "client":
+        val = CLIENT_LABELS.sub('', val)
+    elif field_name == "sample":
+        val = SAMPLE_LABELS.sub('', val)
+    return clean_value(val) if val else None
+
+
+def value_regex(key):
+    return re.compile(rf"{re.escape(key)}\s*[:：]?\s*(.+)", re.I)
+
+
 def extract_field_value(lines, key, field_name=None):
+    """在文本行中查找任意关键词并取值（schemes 里的关键词走下面预编译的匹配器）"""
     key_n = normalize(key)
-    for i, line in enumerate(lines):
-        combined_line = line
-        if i + 1 < len(lines):
-            combined_line += " " + lines[i + 1].strip()
-        line_n = normalize(combined_line)
+    for i in range(len(lines)):
+        line_n = normalize(combine_line(lines, i))
         if re.search(rf'\b{re.escape(key_n)}\b', line_n) and len(key_n) > 1:
-            val = ""
-            m = re.search(rf"{re.escape(key)}\s*[:：]?\s*(.+)", combined_line, re.I)
-            if m and m.group(1).strip():
-                val = m.group(1).strip()
-            else:
-                for j in range(i + 1, min(i + 4, len(lines))):
-                    candidate = lines[j].strip()
-                    if field_name == "date" and not looks_like_date(candidate):
-                        continue
-                    val = candidate
-                    break
-            if field_name == "client":
-                val = re.sub(r'(Company Name|Client Name|委托方|委托单位|Applicant)', '', val, flags=re.I)
-            elif field_name == "sample":
-                val = re.sub(r'(Sample Name|样品名称|样品描述|产品名称)', '', val, flags=re.I)
-            return clean_value(val) if val else None
+            return read_value(lines, i, key, field_name, value_regex(key))
     return None
 
 # ================= 匹配规则 =================
-def try_match_scheme(lines, scheme):
+# "best"=取命中字段最多的方案（相同时取编号小的）；"first"=按顺序取第一个有结果的方案
+SCHEME_PICK = "best"
+
+
+def trie_pattern(words):
+    """把关键词拼成前缀树形式的正则：共同前缀只比较一次，同一位置优先匹配最长的关键词"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def compile_schemes(schemes):
+    """导入时编译一次：所有关键词合成一个正则，每个关键词预编译取值正则
+
+    返回 (关键词正则, 关键词 -> 同一位置同时命中的关键词, 原关键词 -> 规范化关键词, 原关键词 -> 取值正则)。
+    """
+    raw_keys = {key for scheme in schemes for keys in scheme["fields"].values() for key in keys}
+    normalized = {key: normalize(key) for key in raw_keys}
+    keys = {key_n for key_n in normalized.values() if len(key_n) > 1}
+    # 某位置匹配到最长的关键词时，它的前缀中也是关键词的在同一位置一起命中
+    prefixes = {key_n: [k for k in keys if key_n.startswith(k)] for key_n in keys}
+    pattern = re.compile(f"(?=({trie_pattern(keys)}))")
+    return pattern, prefixes, normalized, {key: value_regex(key) for key in raw_keys}
+
+
+KEY_PATTERN, KEY_PREFIXES, NORMALIZED_KEYS, VALUE_PATTERNS = compile_schemes(schemes)
+FIELD_COUNT = max(len(scheme["fields"]) for scheme in schemes)
+
+
+def is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def is_boundary(text, pos):
+    """与正则的 \\b 相同：pos 两侧恰好有一侧是单词字符"""
+    before = pos > 0 and is_word_char(text[pos - 1])
+    after = pos < len(text) and is_word_char(text[pos])
+    return before != after
+
+
+def find_key_lines(lines):
+    """每行（连同下一行）只规范化一次，一遍找出所有关键词，返回 规范化关键词 -> 最早出现的行号"""
+    key_lines = {}
+    for i in range(len(lines)):
+        line_n = normalize(combine_line(lines, i))
+        for m in KEY_PATTERN.finditer(line_n):
+            start = m.start()
+            if not is_boundary(line_n, start):
+                continue
+            for key_n in KEY_PREFIXES[m.group(1)]:
+                if key_n not in key_lines and is_boundary(line_n, start + len(key_n)):
+                    key_lines[key_n] = i
+    return key_lines
+
+
+def try_match_scheme(lines, scheme, key_lines, values):
+    """values 缓存 (关键词, 字段) 的取值，多个方案共用同一关键词时只取一次"""
     temp = {}
     for field, keys in scheme["fields"].items():
         for key in keys:
-            val = extract_field_value(lines, key, field_name=field)
-            if val:
-                temp[field] = val
+            if (key, field) not in values:
+                i = key_lines.get(NORMALIZED_KEYS[key])
+                values[key, field] = None if i is None else read_value(lines, i, key, field, VALUE_PATTERNS[key])
+            if values[key, field]:
+                temp[field] = values[key, field]
                 break
     return temp
 
+
 def try_match_all_schemes(lines):
     """
     尝试匹配所有schemes，返回匹配结果、语言、以及scheme编号
     """
+    key_lines = find_key_lines(lines)
+    if not key_lines:
+        return None, None, None
+    values = {}
+    best = (None, None, None)
     for idx, scheme in enumerate(schemes, start=1):
-        result = try_match_scheme(lines, scheme)
-        if result:
-            return result, scheme["lang"], idx
-    return None, None, None
+        result = try_match_scheme(lines, scheme, key_lines, values)
+        if result and (best[0] is None or len(result) > len(best[0])):
+            best = (result, scheme["lang"], idx)
+            if SCHEME_PICK == "first" or len(result) == FIELD_COUNT:
+                break
+    return best
 
-# ================= 文件重命名 =================
+# ================= 文件重命名（只在主进程中执行） =================
 def safe_rename(src, target):
     base, ext = os.path.splitext(target)
-    with rename_lock:
-        if not os.path.exists(target):
-            os.replace(src, target)
-            return target, False
-        i = 1
-        while True:
-            new_target = f"{base}_重复{i}{ext}"
-            if not os.path.exists(new_target):
-                os.replace(src, new_target)
-                return new_target, True
-            i += 1
+    # 文件名已经符合规则（例如上次已重命名过）时保持不动，重复文件也不重新编号
+    src_n = os.path.normcase(os.path.abspath(src))
+    target_n = os.path.normcase(os.path.abspath(target))
+    if src_n == target_n:
+        return target, False
+    target_base, target_ext = os.path.splitext(target_n)
+    if re.fullmatch(re.escape(target_base) + r"_重复\d+" + re.escape(target_ext), src_n):
+        return src, True
+    if not os.path.exists(target):
+        os.replace(src, target)
+        return target, False
+    i = 1
+    while True:
+        new_target = f"{base}_重复{i}{ext}"
+        if not os.path.exists(new_target):
+            os.replace(src, new_target)
+            return new_target, True
+        i += 1
+
+# ================= 提取缓存 =================
+def new_cache():
+    return {"version": CACHE_VERSION, "files": {}, "reports": {}}
+
+
+def load_cache():
+    """读取缓存，不存在、已损坏或版本不一致时返回空缓存
+
+    files：文件路径 -> {大小, 修改时间, 摘要}，用来避免重复计算摘要；
+    reports：摘要 -> {读取页数, 规则标记, 文本行, 字段, 首次读取时的文件名, 已重命名的文件名}。
+    """
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache
+    except FileNotFoundError:
+        pass
+    except (ValueError, OSError) as e:
+        print(f"读取提取缓存失败，将重新建立: {e}")
+    return new_cache()
+
+
+def save_cache(cache):
+    """只保留当前文件引用的提取结果，先写临时文件再替换"""
+    digests = {entry["digest"] for entry in cache["files"].values()}
+    cache["reports"] = {d: r for d, r in cache["reports"].items() if d in digests}
+    temp_path = cache_file + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, cache_file)
+    except OSError as e:
+        print(f"警告: 无法保存提取缓存，下次运行将重新读取所有PDF: {e}")
+
+
+def rules_tag():
+    """字段匹配规则的标记，schemes 或 SCHEME_PICK 修改后缓存的字段全部重新匹配"""
+    return hashlib.blake2b(repr((schemes, SCHEME_PICK, RULES_VERSION)).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_entry(pdf_path):
+    """文件的 {大小, 修改时间, 摘要}，新增或变化的文件在工作进程中计算"""
+    stat = os.stat(pdf_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "digest": hash_file(pdf_path)}
+
+
+def reusable_digests(cache, tag):
+    """读取页数和规则都与本次一致的提取结果的摘要，工作进程算出的摘要在其中时不再打开PDF"""
+    return frozenset(digest for digest, report in cache["reports"].items()
+                     if report["pages"] == FIRST_PAGES and report["rules"] == tag)
+
+
+def store_report(cache, tag, extracted):
+    """把工作进程读取的文本行和字段按摘要存入缓存，返回缓存记录（未缓存时返回 None）
+
+    同一内容第一次读取时的文件名一直保留，之后重新匹配也按原文件名命名，已重命名的文件不会越改越长。
+    规则未变时保留已记录的新文件名，同一次运行中内容相同的文件不会互相清掉对方的记录。
+    """
+    pdf_path, lines, fields, error = extracted
+    if error is not None or pdf_path not in cache["files"]:
+        return None
+    digest = cache["files"][pdf_path]["digest"]
+    old = cache["reports"].get(digest)
+    report = cache["reports"][digest] = {
+        "pages": FIRST_PAGES, "rules": tag, "lines": lines, "fields": fields,
+        "source": old["source"] if old else os.path.basename(pdf_path),
+        "names": old["names"] if old and old["rules"] == tag else []}
+    return report
+
+
+def record_rename(cache, result):
+    """重命名后更新缓存：文件记录随文件改名，新文件名记入提取结果，下次运行直接跳过"""
+    pdf_path, final_path, status, _ = result
+    if status not in ("成功", "重复") or pdf_path not in cache["files"]:
+        return
+    entry = cache["files"][final_path] = cache["files"].pop(pdf_path)
+    report = cache["reports"].get(entry["digest"])
+    if report is not None and os.path.basename(final_path) not in report["names"]:
+        report["names"].append(os.path.basename(final_path))
 
 # ================= PDF处理 =================
-def process_single_pdf(pdf_path):
-    pdf_filename = os.path.basename(pdf_path)
-    with name_lock:
-        print(f"\n===== 开始处理文件：{pdf_filename} =====", flush=True)
+NOT_READ = "提取结果 -> client: 未读取, sample: 未读取, date: 未读取, scheme编号: -"
+
+
+def is_msds(pdf_path):
+    return 'msds' in pdf_path.lower()
+
+
+def skip_result(pdf_path):
+    return (pdf_path, "", "跳过", "文件包含MSDS，无需处理", NOT_READ, None)
+
 
-    if 'msds' in pdf_path.lower():
-        print(f"提取结果 -> client: 未读取, sample: 未读取, date: 未读取, scheme编号: -")
-        return (pdf_path, "", "跳过", "文件包含MSDS，无需处理")
+def unchanged_result(pdf_path):
+    return (pdf_path, pdf_path, "未变化", "上次已处理，文件未变化")
 
-    if not is_pdf_valid(pdf_path):
-        print(f"提取结果 -> client: 未读取, sample: 未读取, date: 未读取, scheme编号: -")
-        return (pdf_path, "", "失败", "PDF文件损坏/加密/无读取权限")
 
+def read_first_lines(pdf_path):
+    """只打开一次PDF：第一页能读出文本即视为有效，同时读取前 FIRST_PAGES 页的文本行
+
+    返回 (文本行, 错误说明)，读取失败时文本行为 None。
+    """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            first_lines = []
-            for idx in range(min(2, len(pdf.pages))):
-                t = pdf.pages[idx].extract_text()
-                if t:
-                    first_lines.extend([l.strip() for l in t.split("\n") if l.strip()])
-
-        result, lang, scheme_index = try_match_all_schemes(first_lines)
-
-        client_val = result.get('client') if result else None
-        sample_val = result.get('sample') if result else None
-        date_val = result.get('date') if result else None
-
-        if not sample_val:
-            for line in first_lines:
-                if re.search(r'Sample Name|样品名称|产品名称', line, re.I):
-                    sample_val = extract_field_value(first_lines, line, "sample")
-                    if sample_val:
-                        break
-            if not sample_val:
-                sample_val = re.sub(r'[^\w+]', '', pdf_filename.split(".")[0])
-
-        if not client_val:
-            client_val = DEFAULT_CLIENT
-        if not date_val:
-            date_val = datetime.now().strftime('%Y-%m-%d')
-
-        # 控制台打印提取结果及scheme编号
-        with name_lock:
-            print(f"提取结果 -> client: {client_val}, sample: {sample_val}, date: {date_val}, scheme编号: {scheme_index}")
-
-        dt = parse_date(date_val)
-        expire = dt + timedelta(days=365)
-
-        client_final = clean_filename(clean_company_name(client_val, pdf_filename))
-        sample_final = clean_filename(clean_sample_name(sample_val))
-
-        keywords = set()
-        halogen_hits = set()
+        pdf = pdfplumber.open(pdf_path)
+    except Exception:
+        return None, "PDF文件损坏/加密/无读取权限"
+    try:
+        with pdf:
+            try:
+                texts = [pdf.pages[0].extract_text()]
+            except Exception:
+                return None, "PDF文件损坏/加密/无读取权限"
+            for idx in range(1, min(FIRST_PAGES, len(pdf.pages))):
+                texts.append(pdf.pages[idx].extract_text())
+    except Exception as e:
+        return None, f"处理异常：{str(e)}"
+    first_lines = []
+    for t in texts:
+        if t:
+            first_lines.extend([l.strip() for l in t.split("\n") if l.strip()])
+    return first_lines, None
+
+
+def match_fields(first_lines):
+    """按 schemes 匹配字段，结果只取决于文本行（可以缓存）"""
+    result, lang, scheme_index = try_match_all_schemes(first_lines)
+
+    client_val = result.get('client') if result else None
+    sample_val = result.get('sample') if result else None
+    date_val = result.get('date') if result else None
+
+    if not sample_val:
         for line in first_lines:
-            l = line.lower()
-            if re.search(r'roh\s*s', l):
-                keywords.add('RoHS')
-            if 'reach' in l or 'svhc' in l:
-                keywords.add('REACH')
-            for h in ['F', 'Cl', 'Br', 'I']:
-                if re.search(rf'\b{h}\b', line, re.I):
-                    halogen_hits.add(h)
-        if {'F', 'Cl', 'Br', 'I'}.issubset(halogen_hits):
-            keywords.add('HF')
-        if not keywords:
+            if re.search(r'Sample Name|样品名称|产品名称', line, re.I):
+                sample_val = extract_field_value(first_lines, line, "sample")
+                if sample_val:
+                    break
+
+    return {"client": client_val, "sample": sample_val, "date": date_val, "lang": lang, "scheme": scheme_index}
+
+
+def extract_pdf_info(pdf_path, first_lines=None):
+    """只读取PDF并匹配字段，不做任何文件操作（可在子进程中执行）
+
+    first_lines 为缓存的文本行时不再打开PDF。返回 (原路径, 文本行, 字段, 错误说明)，成功时错误说明为 None。
+    """
+    if first_lines is None:
+        first_lines, error = read_first_lines(pdf_path)
+        if first_lines is None:
+            return (pdf_path, None, None, error)
+    try:
+        return (pdf_path, first_lines, match_fields(first_lines), None)
+    except Exception as e:
+        return (pdf_path, None, None, f"处理异常：{str(e)}")
+
+
+def build_new_name(pdf_filename, first_lines, fields):
+    """根据字段生成新文件名（字段缺失时参考原文件名），返回 (新文件名, 提取结果, 证书目录字段)"""
+    client_val, sample_val, date_val = fields["client"], fields["sample"], fields["date"]
+
+    if not sample_val:
+        sample_val = re.sub(r'[^\w+]', '', pdf_filename.split(".")[0])
+    if not client_val:
+        client_val = DEFAULT_CLIENT
+    if not date_val:
+        date_val = datetime.now().strftime('%Y-%m-%d')
+
+    summary = f"提取结果 -> client: {client_val}, sample: {sample_val}, date: {date_val}, scheme编号: {fields['scheme']}"
+
+    dt = parse_date(date_val)
+    expire = dt + timedelta(days=365)
+
+    client_final = clean_filename(clean_company_name(client_val, pdf_filename))
+    sample_final = clean_filename(clean_sample_name(sample_val))
+
+    keywords = set()
+    halogen_hits = set()
+    for line in first_lines:
+        l = line.lower()
+        if re.search(r'roh\s*s', l):
             keywords.add('RoHS')
+        if 'reach' in l or 'svhc' in l:
+            keywords.add('REACH')
+        for h in ['F', 'Cl', 'Br', 'I']:
+            if re.search(rf'\b{h}\b', line, re.I):
+                halogen_hits.add(h)
+    if {'F', 'Cl', 'Br', 'I'}.issubset(halogen_hits):
+        keywords.add('HF')
+    if not keywords:
+        keywords.add('RoHS')
+
+    keyword_list = [k for k in ['RoHS', 'REACH', 'HF'] if k in keywords]
+
+    filename_parts = [
+        client_final,
+        sample_final,
+        dt.strftime('%Y-%m-%d'),
+        fields["lang"] or "英",
+        f"过期时间({expire.strftime('%Y-%m-%d')})"
+    ]
+    if keyword_list:
+        filename_parts.append("_".join(keyword_list))
+
+    info = {"client": client_final, "sample": sample_final, "receive_date": dt, "expiry": expire,
+            "kinds": keyword_list}
+    return "_".join([p for p in filename_parts if p]) + ".pdf", summary, info
+
+
+def name_result(extracted, pdf_filename=None):
+    """主进程：由提取结果生成新文件名，返回 (原路径, 新文件名, 状态, 说明, 提取结果, 证书目录字段)
+
+    pdf_filename 为缓存中记录的原文件名，None=当前文件名。
+    """
+    pdf_path, first_lines, fields, error = extracted
+    if error:
+        return (pdf_path, "", "失败", error, NOT_READ, None)
+    try:
+        new_name, summary, info = build_new_name(pdf_filename or os.path.basename(pdf_path), first_lines, fields)
+    except Exception as e:
+        return (pdf_path, "", "失败", f"处理异常：{str(e)}", NOT_READ, None)
+    return (pdf_path, new_name, "成功", "处理成功", summary, info)
 
-        keyword_list = [k for k in ['RoHS', 'REACH', 'HF'] if k in keywords]
 
-        filename_parts = [
-            client_final,
-            sample_final,
-            dt.strftime('%Y-%m-%d'),
-            lang or "英",
-            f"过期时间({expire.strftime('%Y-%m-%d')})"
-        ]
-        if keyword_list:
-            filename_parts.append("_".join(keyword_list))
+# 工作进程中可直接复用的提取结果摘要（由 init_worker 设置）
+known_digests = frozenset()
+
+
+def init_worker(digests):
+    global known_digests
+    known_digests = digests
 
-        new_name = "_".join([p for p in filename_parts if p]) + ".pdf"
-        new_path = os.path.join(os.path.dirname(pdf_path), new_name)
-        final_path, is_dup = safe_rename(pdf_path, new_path)
 
-        return (pdf_path, final_path, "成功" if not is_dup else "重复",
-                "处理成功" if not is_dup else "文件名重复，自动添加后缀")
+def extract_batch(tasks):
+    """一个任务处理一批 (PDF路径, 缓存的文本行, 是否需要计算摘要)，返回值只包含字符串和列表，进程间传递开销小
 
+    返回 [(PDF路径, 文件记录, 提取结果)]：文件记录为工作进程计算的 {大小, 修改时间, 摘要}（未计算时为 None）；
+    摘要已在缓存中（例如手动改名、复制的文件）时不打开PDF，提取结果为 None，由主进程按缓存处理。
+    """
+    results = []
+    for pdf_path, first_lines, needs_digest in tasks:
+        entry = None
+        if needs_digest:
+            try:
+                entry = file_entry(pdf_path)
+            except OSError:
+                entry = None  # 读不了的文件照常交给 pdfplumber，按读取失败记录
+            if entry is not None and entry["digest"] in known_digests:
+                results.append((pdf_path, entry, None))
+                continue
+        results.append((pdf_path, entry, extract_pdf_info(pdf_path, first_lines)))
+    return results
+
+
+def apply_result(named):
+    """主进程：打印提取结果并重命名，返回 (原路径, 新路径, 状态, 说明)"""
+    pdf_path, new_name, status, message, summary = named[:5]
+    print(f"\n===== 开始处理文件：{os.path.basename(pdf_path)} =====")
+    print(summary)
+    if status != "成功":
+        return (pdf_path, "", status, message)
+
+    try:
+        new_path = os.path.join(os.path.dirname(pdf_path), new_name)
+        final_path, is_dup = safe_rename(pdf_path, new_path)
     except Exception as e:
-        print(f"提取结果 -> client: 未读取, sample: 未读取, date: 未读取, scheme编号: -")
         return (pdf_path, "", "失败", f"处理异常：{str(e)}")
+    return (pdf_path, final_path, "成功" if not is_dup else "重复",
+            "处理成功" if not is_dup else "文件名重复，自动添加后缀")
+
+
+def process_single_pdf(pdf_path):
+    """处理单个PDF（提取并重命名，不使用缓存）"""
+    if is_msds(pdf_path):
+        return apply_result(skip_result(pdf_path))
+    return apply_result(name_result(extract_pdf_info(pdf_path)))
+
+
+def reuse_report(pdf_path, report):
+    """内容和规则都没变的文件：文件名就是上次重命名的结果时返回 None（未变化），否则用缓存的字段生成新文件名"""
+    if os.path.basename(pdf_path) in report["names"]:
+        return None
+    return name_result((pdf_path, report["lines"], report["fields"], None), report["source"])
+
+
+def plan_tasks(pdf_paths, cache, tag):
+    """按缓存把文件分类，返回 (需要交给工作进程的任务, 可直接命名的提取结果, 未变化的文件)
+
+    - 大小或修改时间变了（含新增、手动改名）：摘要交给工作进程计算，主进程不逐个读取全文；
+    - 内容和规则都没变、文件名就是上次重命名的结果：未变化，跳过；
+    - 内容和规则都没变但文件名不同：用缓存的字段直接生成新文件名；
+    - 只有规则变了：用缓存的文本行重新匹配，不再打开PDF；
+    - 缓存中没有提取结果：交给工作进程读取。
+    """
+    old_files, cache["files"] = cache["files"], {}
+    tasks, named, unchanged = [], [], []
+    for pdf_path in pdf_paths:
+        entry = old_files.get(pdf_path)
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            entry = None  # 读不了的文件交给工作进程，按读取失败记录
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+            tasks.append((pdf_path, None, True))
+            continue
+        cache["files"][pdf_path] = entry
+        report = cache["reports"].get(entry["digest"])
+        if report is None or report["pages"] != FIRST_PAGES:
+            tasks.append((pdf_path, None, False))
+        elif report["rules"] != tag:
+            tasks.append((pdf_path, report["lines"], False))
+        else:
+            result = reuse_report(pdf_path, report)
+            if result is None:
+                unchanged.append(pdf_path)
+            else:
+                named.append(result)
+    return tasks, named, unchanged
+
+
+def record_catalog(catalog, cache, named, result):
+    """把处理结果写入证书目录：重命名成功的记录识别出的字段，失败的记录原因"""
+    pdf_path, final_path, status, message = result
+    try:
+        if status in ("成功", "重复"):
+            entry = cache["files"].get(final_path)
+            record_certificate(catalog, final_path, named[5], entry and entry["digest"], old_path=pdf_path)
+        elif status == "失败":
+            entry = cache["files"].get(pdf_path)
+            record_failure(catalog, pdf_path, message, entry and entry["digest"])
+    except OSError as e:
+        print(f"警告: 无法写入证书目录 {pdf_path}: {e}")
+
+
+def process_pdfs(pdf_paths, mode=EXECUTOR_MODE, max_workers=MAX_WORKERS, chunk_size=CHUNK_SIZE, use_cache=USE_CACHE,
+                 catalog=None):
+    """并行提取、主进程依次重命名，返回每个文件的处理结果（catalog 为打开的证书目录时同时写入）"""
+    cache = load_cache() if use_cache else new_cache()
+    tag = rules_tag()
+    results = [apply_result(skip_result(p)) for p in pdf_paths if is_msds(p)]
+    pdf_paths = [p for p in pdf_paths if not is_msds(p)]
+    if use_cache:
+        tasks, named, unchanged = plan_tasks(pdf_paths, cache, tag)
+        print(f"未变化 {len(unchanged)} 个，使用缓存的字段 {len(named)} 个，需要计算摘要或读取 {len(tasks)} 个")
+    else:
+        tasks, named, unchanged = [(p, None, False) for p in pdf_paths], [], []
+    results += [unchanged_result(p) for p in unchanged]
+
+    def finish(named):
+        result = apply_result(named)
+        record_rename(cache, result)
+        if catalog is not None:
+            record_catalog(catalog, cache, named, result)
+        results.append(result)
+
+    try:
+        for item in named:
+            finish(item)
+        if not tasks:
+            return results
+
+        if mode == "process":
+            executor_class = ProcessPoolExecutor
+            max_workers = max_workers or multiprocessing.cpu_count()
+        else:
+            executor_class = ThreadPoolExecutor
+            max_workers = max_workers or multiprocessing.cpu_count() * 2
+        chunk_size = chunk_size or max(1, min(32, len(tasks) // (max_workers * 4)))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+        digests = reusable_digests(cache, tag) if use_cache else frozenset()
+        with executor_class(max_workers=max_workers, initializer=init_worker, initargs=(digests,)) as executor:
+            futures = [executor.submit(extract_batch, chunk) for chunk in chunks]
+            with tqdm(total=len(tasks), desc="PDF处理进度") as progress:
+                for future in as_completed(futures):
+                    batch = future.result()
+                    for pdf_path, entry, extracted in batch:
+                        if entry is not None:
+                            cache["files"][pdf_path] = entry
+                        if extracted is not None:
+                            report = store_report(cache, tag, extracted)
+                            finish(name_result(extracted, report and report["source"]))
+                            continue
+                        # 摘要命中缓存：和主进程中按缓存处理的文件相同
+                        cached = reuse_report(pdf_path, cache["reports"][entry["digest"]])
+                        if cached is None:
+                            results.append(unchanged_result(pdf_path))
+                        else:
+                            finish(cached)
+                    progress.update(len(batch))
+        return results
+    finally:
+        if use_cache:
+            save_cache(cache)
 
 # ================= 主函数 =================
 def main():
@@ -297,17 +723,30 @@ def main():
         print("未找到任何PDF文件！")
         return
 
-    max_workers = multiprocessing.cpu_count() * 2
+    catalog = None
+    if USE_CATALOG:
+        try:
+            catalog = open_catalog(catalog_path)
+        except sqlite3.Error as e:
+            print(f"警告: 无法打开证书目录 {catalog_path}，本次不记录: {e}")
+
     print(f"\n========== 开始批量处理 ==========")
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_single_pdf, p): p for p in pdf_paths}
-        for f in tqdm(as_completed(futures), total=len(futures), desc="PDF处理进度"):
-            process_results.append(f.result())
+    try:
+        process_results = process_pdfs(pdf_paths, catalog=catalog)
+        if catalog is not None:
+            # 本次未处理的文件（未变化、跳过的）若不在目录中，按文件名补录；已删除的文件移出目录
+            catalog.commit()
+            changed, removed = refresh_catalog(catalog, folder_path)
+            print(f"证书目录已更新：{catalog_path}（补录 {changed} 个，移除 {removed} 个）")
+    finally:
+        if catalog is not None:
+            catalog.close()
 
     success = len([r for r in process_results if r[2] == "成功"])
     duplicate = len([r for r in process_results if r[2] == "重复"])
     failed = len([r for r in process_results if r[2] == "失败"])
     skipped = len([r for r in process_results if r[2] == "跳过"])
+    unchanged = len([r for r in process_results if r[2] == "未变化"])
 
     failed_records = [f"{r[0]} -> 失败原因：{r[3]}" for r in process_results if r[2] == "失败"]
     if failed_records:
@@ -324,6 +763,7 @@ def main():
     print(f"重复文件（自动加后缀）：{duplicate} 个")
     print(f"处理失败：{failed} 个")
     print(f"跳过文件（MSDS）：{skipped} 个")
+    print(f"未变化（上次已处理）：{unchanged} 个")
     if failed_records:
         print(f"处理失败文件清单（含原因）：{failed_file}")
     if duplicates:
@@ -331,4 +771,5 @@ def main():
     print("=================================")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包为exe后多进程需要
     main()
@@ -1,8 +1,14 @@
 import pdfplumber
 import re
 import os
+import sqlite3
+import time
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from dateutil.parser import parse  # 兼容中文日期解析
+from 环保证书库 import CATALOG_PATH, open_catalog, record_certificate, refresh_catalog, kinds_in
 
 # -------------------------- 全局配置项 --------------------------
 # 替换为你的目标文件夹路径
@@ -29,6 +35,14 @@ target_keys = {
 expire_days = 365
 # 检测类型关键词（ROHS/REACH等，按需调整）
 target_keywords = ["rohs", "reach", "pops", "svhc"]
+# 重命名结果写入环保证书目录（None=不记录）
+catalog_path = CATALOG_PATH
+# 逐页读取，必填字段全部找到后后面的页只检查检测类型关键词，关键词也全部出现后不再读取；False=读完所有页
+STOP_WHEN_FOUND = True
+# 并行读取PDF的进程数（None=CPU核数），重命名在主进程中依次执行
+MAX_WORKERS = None
+# 处理汇总报告
+summary_file = os.path.join(TARGET_DIR, "处理汇总.txt")
 
 
 # -------------------------- 工具函数 --------------------------
@@ -79,44 +93,80 @@ def get_unique_filename(file_dir, base_filename):
 
 
 # -------------------------- 核心提取函数（仅提取中文字段） --------------------------
-def pdfplumber_extract_multi_page(pdf_path, target_keys, target_keywords):
-    extract_result = {key: "未找到对应内容" for key in target_keys}
+def compile_target_keys(target_keys):
+    """预编译字段正则（参数与原来逐次 re.search 时相同）"""
+    return {key: [re.compile(pattern, re.MULTILINE | re.DOTALL) for pattern in patterns]
+            for key, patterns in target_keys.items()}
+
+
+COMPILED_KEYS = compile_target_keys(target_keys)
+
+
+def search_fields(full_text, compiled_keys, extract_result, final):
+    """在已读取的文本中查找还没找到的字段，返回是否全部找到
+
+    每个字段按正则的先后顺序取第一个命中的。未读完时，匹配到文本末尾的结果可能被下一页改变
+    （例如关键词在页末、值在下一页），这样的结果和排在它后面的正则都暂不采用。
+    """
+    for key, patterns in compiled_keys.items():
+        if extract_result[key] != "未找到对应内容":
+            continue
+        for pattern in patterns:
+            match = pattern.search(full_text)
+            if match is None:
+                continue
+            if final or match.end() < len(full_text):
+                extract_result[key] = match.group(1).strip()
+            break
+    return all(extract_result[key] != "未找到对应内容" for key in compiled_keys)
+
+
+def pdfplumber_extract_multi_page(pdf_path, compiled_keys, target_keywords, log=print, stop_when_found=STOP_WHEN_FOUND):
+    """逐页提取文本并查找字段，必填字段全部找到后不再读取后面的页
+
+    必填字段找到后，后面的页只做小写关键词检查（不再匹配字段正则），直到所有检测类型关键词都出现，
+    因此检测类型与读完所有页时相同。
+    log 用于输出调试信息（子进程中传入列表的 append，由主进程统一打印）。
+    """
+    extract_result = {key: "未找到对应内容" for key in compiled_keys}
     extract_result["检测类型"] = ""
     matched_keywords = set()
     full_text = ""
+    pages_read = page_count = 0
+    fields_found = False
 
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            # 遍历所有页面提取原生文本
+            page_count = len(pdf.pages)
             for page_num, page in enumerate(pdf.pages, start=1):
                 page_text = page.extract_text()
-                if page_text:
-                    full_text += f"\n【第{page_num}页】\n{page_text}"
+                pages_read = page_num
                 # 调试：打印第1页原始文本（方便排查提取问题）
                 if page_num == 1:
-                    print(f"\n【调试】{pdf_path} 第{page_num}页原始文本：\n{page_text}\n")
+                    log(f"\n【调试】{pdf_path} 第{page_num}页原始文本：\n{page_text}\n")
+                if not page_text:
+                    continue
+                # 提取检测类型（兼容中英文关键词，但仅作为可选字段）
+                page_text_lower = page_text.lower()
+                matched_keywords.update(keyword for keyword in target_keywords if keyword in page_text_lower)
+                if not fields_found:
+                    full_text += f"\n【第{page_num}页】\n{page_text}"
+                    fields_found = stop_when_found and search_fields(full_text, compiled_keys, extract_result,
+                                                                     final=False)
+                # 必填字段已找到：检测类型关键词也全部出现后不再读取后面的页
+                if fields_found and len(matched_keywords) == len(target_keywords):
+                    break
 
+        extract_result["读取页数"] = f"{pages_read}/{page_count}"
         # 无原生文本（扫描版）直接返回
         if not full_text.strip():
-            print(f"⚠️ 该PDF无原生文本（可能是扫描版），无法提取字段")
+            log(f"⚠️ 该PDF无原生文本（可能是扫描版），无法提取字段")
             return extract_result
 
         # 仅匹配中文标注的字段
-        for key, patterns in target_keys.items():
-            if extract_result[key] == "未找到对应内容":
-                for pattern in patterns:
-                    # 仅匹配中文，关闭忽略大小写（中文无大小写）
-                    match = re.search(pattern, full_text, re.MULTILINE | re.DOTALL)
-                    if match:
-                        extract_result[key] = match.group(1).strip()
-                        break
-
-        # 提取检测类型（兼容中英文关键词，但仅作为可选字段）
-        full_text_lower = full_text.lower()
-        for keyword in target_keywords:
-            if keyword in full_text_lower:
-                matched_keywords.add(keyword.upper())
-        extract_result["检测类型"] = "/".join(matched_keywords) if matched_keywords else ""
+        search_fields(full_text, compiled_keys, extract_result, final=True)
+        extract_result["检测类型"] = "/".join(keyword.upper() for keyword in target_keywords
+                                          if keyword in matched_keywords)
         # 标记提取状态
         extract_result["找到内容的页码"] = "原生文本提取" if any(v != "未找到对应内容" for v in extract_result.values()) else "所有页均未找到"
 
@@ -126,13 +176,16 @@ def pdfplumber_extract_multi_page(pdf_path, target_keys, target_keywords):
     return extract_result
 
 
-# -------------------------- 单文件重命名函数 --------------------------
-def rename_single_pdf(original_path):
-    print(f"\n========== 开始处理文件：{original_path} ==========")
+def extract_worker(original_path):
+    """子进程：只读取PDF，返回 (原路径, 提取结果, 调试输出)"""
+    logs = []
+    extract_result = pdfplumber_extract_multi_page(original_path, COMPILED_KEYS, target_keywords, log=logs.append)
+    return original_path, extract_result, logs
 
-    # 1. 提取PDF内容（仅中文字段）
-    extract_result = pdfplumber_extract_multi_page(original_path, target_keys, target_keywords)
 
+# -------------------------- 单文件重命名函数 --------------------------
+def rename_from_result(original_path, extract_result, catalog=None):
+    """主进程：根据提取结果重命名并写入证书目录，返回 (是否成功, 失败原因)"""
     # 打印提取结果（清洗前）
     print("提取结果（清洗前）：")
     for key, value in extract_result.items():
@@ -141,7 +194,7 @@ def rename_single_pdf(original_path):
     # 2. 检查提取错误
     if "error" in extract_result:
         print(f"❌ 提取失败，跳过重命名：{extract_result['error']}")
-        return False
+        return False, "提取失败"
 
     # 3. 清洗字段（仅保留中文内容）
     customer_name = clean_field_content(extract_result["客户名称"])
@@ -160,13 +213,13 @@ def rename_single_pdf(original_path):
     required_fields = [customer_name, sample_name, receive_date]
     if any(v == "未找到对应内容" for v in required_fields):
         print(f"❌ 关键必填中文字段缺失，跳过重命名")
-        return False
+        return False, "必填字段缺失"
 
     # 5. 计算过期时间
     expire_date = calculate_expire_date(receive_date, expire_days)
     if expire_date == "日期解析失败":
         print(f"❌ 过期时间计算失败，跳过重命名")
-        return False
+        return False, "过期时间计算失败"
 
     # 6. 拼接文件名（仅中文核心字段）
     filename_parts = [
@@ -192,48 +245,116 @@ def rename_single_pdf(original_path):
     try:
         os.rename(original_path, new_pdf_path)
         print(f"✅ 重命名成功！新路径：{new_pdf_path}")
-        return True
     except Exception as e:
         print(f"❌ 重命名失败：{str(e)}")
-        return False
+        return False, "重命名失败"
+
+    # 9. 写入证书目录
+    if catalog is not None:
+        info = {"client": customer_name, "sample": sample_name, "receive_date": receive_date,
+                "expiry": expire_date, "kinds": kinds_in(detect_type)}
+        try:
+            record_certificate(catalog, new_pdf_path, info, old_path=original_path)
+        except OSError as e:
+            print(f"⚠️ 写入证书目录失败：{e}")
+    return True, ""
+
+
+def rename_single_pdf(original_path, catalog=None):
+    """处理单个PDF（提取并重命名），返回是否成功"""
+    print(f"\n========== 开始处理文件：{original_path} ==========")
+    # 1. 提取PDF内容（仅中文字段）
+    extract_result = pdfplumber_extract_multi_page(original_path, COMPILED_KEYS, target_keywords)
+    return rename_from_result(original_path, extract_result, catalog)[0]
 
 
 # -------------------------- 批量处理函数 --------------------------
-def batch_process_pdfs(target_dir):
-    total_count = 0
+def parse_pages_read(extract_result):
+    """从提取结果中取 (已读页数, 总页数)，提取失败时为 (0, 0)"""
+    pages = extract_result.get("读取页数")
+    if not pages:
+        return 0, 0
+    read, total = pages.split("/")
+    return int(read), int(total)
+
+
+def write_summary(lines):
+    print("\n".join(lines))
+    try:
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        print(f"\n汇总报告：{summary_file}")
+    except OSError as e:
+        print(f"⚠️ 无法写入汇总报告：{e}")
+
+
+def batch_process_pdfs(target_dir, max_workers=MAX_WORKERS):
+    """子进程并行读取PDF，主进程按文件顺序依次打印、重命名并写入证书目录，最后输出汇总报告"""
+    start_time = time.time()
+    pdf_paths = [os.path.join(root, file) for root, dirs, files in os.walk(target_dir)
+                 for file in files if file.lower().endswith(".pdf")]
+    total_count = len(pdf_paths)
     success_count = 0
-    fail_count = 0
     fail_files = []
+    fail_reasons = Counter()
+    pages_read = pages_total = 0
+
+    catalog = None
+    if catalog_path:
+        try:
+            catalog = open_catalog(catalog_path)
+        except sqlite3.Error as e:
+            print(f"⚠️ 无法打开证书目录 {catalog_path}，本次不记录：{e}")
 
-    # 遍历目标文件夹下所有PDF
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                total_count += 1
-                file_path = os.path.join(root, file)
+    try:
+        max_workers = max_workers or multiprocessing.cpu_count()
+        chunk_size = max(1, min(16, total_count // (max_workers * 4)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for original_path, extract_result, logs in executor.map(extract_worker, pdf_paths, chunksize=chunk_size):
+                print(f"\n========== 开始处理文件：{original_path} ==========")
+                for log in logs:
+                    print(log)
+                read, total = parse_pages_read(extract_result)
+                pages_read += read
+                pages_total += total
                 # 处理单个PDF
-                if rename_single_pdf(file_path):
+                ok, reason = rename_from_result(original_path, extract_result, catalog)
+                if ok:
                     success_count += 1
                 else:
-                    fail_count += 1
-                    fail_files.append(file_path)
-
-    # 打印批量处理汇总
-    print("\n========== 批量处理完成 ==========")
-    print(f"📊 汇总统计：")
-    print(f"  总处理PDF数量：{total_count}")
-    print(f"  ✅ 成功重命名：{success_count}")
-    print(f"  ❌ 重命名失败：{fail_count}")
-
-    # 打印失败文件列表
+                    fail_reasons[reason] += 1
+                    fail_files.append(f"{original_path} -> {reason}")
+        if catalog is not None:
+            # 未能重命名的文件按文件名补录，已不存在的文件移出目录
+            catalog.commit()
+            refresh_catalog(catalog, target_dir)
+    finally:
+        if catalog is not None:
+            catalog.close()
+
+    # 批量处理汇总
+    lines = [
+        "========== 批量处理完成 ==========",
+        f"📊 汇总统计：",
+        f"  总处理PDF数量：{total_count}",
+        f"  ✅ 成功重命名：{success_count}",
+        f"  ❌ 重命名失败：{len(fail_files)}",
+    ]
+    for reason, count in fail_reasons.most_common():
+        lines.append(f"      {reason}：{count}")
+    lines.append(f"  📄 读取页数：{pages_read} / {pages_total}" + ("（必填字段和检测类型关键词都找到后跳过其余页）" if STOP_WHEN_FOUND else ""))
+    lines.append(f"  ⏱ 用时：{time.time() - start_time:.1f} 秒（{max_workers} 个进程）")
+    # 失败文件列表
     if fail_files:
-        print(f"\n❌ 失败的文件列表：")
-        for fail_file in fail_files:
-            print(f"  - {fail_file}")
+        lines.append(f"\n❌ 失败的文件列表：")
+        lines.extend(f"  - {fail_file}" for fail_file in fail_files)
+    print()
+    write_summary(lines)
 
 
 # -------------------------- 主执行逻辑 --------------------------
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包为exe后多进程需要
     # 检查目标文件夹是否存在
     if not os.path.exists(TARGET_DIR):
         print(f"❌ 目标目录不存在：{TARGET_DIR}")
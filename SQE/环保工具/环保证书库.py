@@ -0,0 +1,284 @@
+"""环保证书目录（SQLite），供环保_抽取、环保文件管理写入，删除过期环保、失效文件转移查询
+
+每个证书文件一条记录：路径、大小、修改时间、BLAKE2 摘要、客户、样品、接收日期、过期日期、
+RoHS/REACH/HF 标记，以及状态（ok=已识别，failed=环保_抽取处理失败，unknown=文件名中没有过期时间）。
+- 抽取/管理脚本重命名成功后直接写入识别出的字段，失败的文件连同原因一起记录；
+- refresh_catalog 按大小和修改时间增量刷新某个目录：未变化的文件不读取，新增或变化的文件
+  计算摘要，摘要与已消失的记录相同则视为移动/改名，沿用原记录，否则从文件名解析字段；
+- "已过期 / N 天内过期 / 某供应商缺哪类证书" 都由过期日期和客户上的索引直接查询，不再遍历目录。
+日期统一存为 YYYY-MM-DD 文本，可以直接比较大小。
+"""
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+
+CATALOG_PATH = r"E:\System\download\厂商ROHS、REACH\.环保证书库.sqlite"
+CATALOG_VERSION = 1  # 表结构或文件名解析规则变化时递增，旧目录自动重建
+CERT_EXTENSIONS = (".pdf",)
+KINDS = ("RoHS", "REACH", "HF")
+READ_BYTES = 1024 * 1024
+
+# 报告查询（直接运行本文件时）
+REPORT_ROOT = r"E:\System\download\厂商ROHS、REACH"
+EXPIRING_DAYS = 30
+SUPPLIERS = []  # 需要检查证书是否齐全的供应商（与文件名中的客户名称一致）
+
+EXPIRY_PATTERN = re.compile(r'过期时间\((\d{4})\s*[-年./]\s*(\d{1,2})\s*[-月./]\s*(\d{1,2})\s*日?\)')
+DATE_PATTERN = re.compile(r'(\d{4})\s*[-年./_]\s*(\d{1,2})\s*[-月./_]\s*(\d{1,2})')
+TRAILING_DATE = re.compile(r'_?(\d{4})\s*[-年./_]\s*(\d{1,2})\s*[-月./_]\s*(\d{1,2})\s*日?(?:_[中英])?$')
+
+
+def open_catalog(path=CATALOG_PATH):
+    """打开证书目录，不存在时创建；版本不一致时清空重建"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if version is not None and version[0] != str(CATALOG_VERSION):
+        print("证书目录版本已更新，重新建立")
+        conn.execute("DROP TABLE IF EXISTS certificates")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS certificates (
+            path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, digest TEXT,
+            client TEXT, sample TEXT, receive_date TEXT, expiry TEXT,
+            rohs INTEGER, reach INTEGER, hf INTEGER, status TEXT, note TEXT);
+        CREATE INDEX IF NOT EXISTS idx_certificates_expiry ON certificates (expiry);
+        CREATE INDEX IF NOT EXISTS idx_certificates_client ON certificates (client, expiry);
+        CREATE INDEX IF NOT EXISTS idx_certificates_digest ON certificates (digest);
+        CREATE INDEX IF NOT EXISTS idx_certificates_status ON certificates (status);
+    """)
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(CATALOG_VERSION),))
+    conn.commit()
+    return conn
+
+
+# --------------------------
+# 字段解析
+# --------------------------
+def as_iso(value):
+    """日期统一为 YYYY-MM-DD：接受 datetime/date 或含 "2025-05-08"、"2025年05月08日" 等写法的文本"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    m = DATE_PATTERN.search(value or "")
+    if not m:
+        return None
+    try:
+        return date(int(m.group(1)), int(m.group(2)), int(m.group(3))).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def kinds_in(text):
+    """从检测类型文本（文件名末尾、"ROHS/REACH/SVHC" 等）中识别证书类别"""
+    text = (text or "").lower()
+    kinds = set()
+    if "rohs" in text:
+        kinds.add("RoHS")
+    if "reach" in text or "svhc" in text:
+        kinds.add("REACH")
+    if re.search(r'(?<![a-z])hf(?![a-z])', text):
+        kinds.add("HF")
+    return kinds
+
+
+def parse_name(filename):
+    """从规范文件名中解析字段，文件名中没有过期时间时返回 None
+
+    兼容两种命名：
+        客户_样品_2025-05-08_中_过期时间(2026-05-08)_RoHS_REACH.pdf       （环保_抽取）
+        客户_样品_2025年05月08日_过期时间(2026年05月08日)_ROHS_REACH.pdf （环保文件管理）
+    """
+    stem = os.path.splitext(filename)[0]
+    m = EXPIRY_PATTERN.search(stem)
+    if not m:
+        return None
+    head, tail = stem[:m.start()].rstrip("_"), stem[m.end():]
+    receive_date = None
+    date_match = TRAILING_DATE.search(head)
+    if date_match:
+        receive_date = as_iso("-".join(date_match.groups()))
+        head = head[:date_match.start()]
+    client, _, sample = head.partition("_")
+    return {
+        "client": client,
+        "sample": sample,
+        "receive_date": receive_date,
+        "expiry": as_iso("-".join(m.groups())),
+        "kinds": kinds_in(tail),
+    }
+
+
+# --------------------------
+# 写入记录
+# --------------------------
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_row(conn, path, stat, digest, info, status, note=""):
+    info = info or {}
+    kinds = set(info.get("kinds") or ())
+    conn.execute("INSERT OR REPLACE INTO certificates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+        path, stat.st_size, stat.st_mtime_ns, digest,
+        info.get("client"), info.get("sample"), as_iso(info.get("receive_date")), as_iso(info.get("expiry")),
+        int("RoHS" in kinds), int("REACH" in kinds), int("HF" in kinds), status, note))
+
+
+def record_certificate(conn, path, info, digest=None, old_path=None):
+    """记录识别成功的证书；old_path 为重命名前的路径，其旧记录一并删除
+
+    info：{"client", "sample", "receive_date", "expiry", "kinds"}，日期可以是 datetime 或文本。
+    """
+    path = os.path.abspath(path)
+    if old_path:
+        remove_path(conn, old_path)
+    write_row(conn, path, os.stat(path), digest or hash_file(path), info, "ok" if info.get("expiry") else "unknown")
+
+
+def record_failure(conn, path, reason, digest=None):
+    """记录处理失败的文件及原因，供失效文件转移查询"""
+    path = os.path.abspath(path)
+    write_row(conn, path, os.stat(path), digest or hash_file(path), None, "failed", reason)
+
+
+def remove_path(conn, path):
+    conn.execute("DELETE FROM certificates WHERE path = ?", (os.path.abspath(path),))
+
+
+# --------------------------
+# 增量刷新
+# --------------------------
+def iter_files(root):
+    """递归遍历目录中的证书文件，产出 (绝对路径, stat)；以 "." 开头的缓存/目录文件不算"""
+    subdirs = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file() and entry.name.lower().endswith(CERT_EXTENSIONS):
+                yield entry.path, entry.stat()
+    for subdir in subdirs:
+        yield from iter_files(subdir)
+
+
+def path_range(root):
+    """root 下所有路径在主键上的范围 [low, high)，用于只查询/刷新某个目录"""
+    low = os.path.join(os.path.abspath(root), "")
+    return low, low[:-1] + chr(ord(low[-1]) + 1)
+
+
+def refresh_catalog(conn, root):
+    """按大小和修改时间增量刷新 root 下的记录，返回 (新增或变化的文件数, 删除的记录数)"""
+    low, high = path_range(root)
+    rows = {row[0]: row for row in conn.execute(
+        "SELECT * FROM certificates WHERE path >= ? AND path < ?", (low, high))}
+    seen = set()
+    changed = []
+    for path, stat in iter_files(os.path.abspath(root)):
+        seen.add(path)
+        row = rows.get(path)
+        if row is None or row[1] != stat.st_size or row[2] != stat.st_mtime_ns:
+            changed.append((path, stat))
+
+    # 已消失的记录按摘要索引：新文件摘要相同说明只是被移动或改名
+    vanished = {row[3]: row for path, row in rows.items() if path not in seen and row[3]}
+    with conn:
+        for path, stat in changed:
+            digest = hash_file(path)
+            info = parse_name(os.path.basename(path))
+            moved = vanished.pop(digest, None)
+            if info is None and moved is not None:
+                # 移动覆盖了已有记录的文件时，先删掉目标路径的旧记录，避免主键冲突
+                conn.execute("DELETE FROM certificates WHERE path = ?", (path,))
+                conn.execute("UPDATE certificates SET path = ?, size = ?, mtime = ? WHERE path = ?",
+                             (path, stat.st_size, stat.st_mtime_ns, moved[0]))
+                seen.add(moved[0])
+            else:
+                write_row(conn, path, stat, digest, info, "ok" if info else "unknown")
+        removed = [path for path in rows if path not in seen]
+        conn.executemany("DELETE FROM certificates WHERE path = ?", [(path,) for path in removed])
+    return len(changed), len(removed)
+
+
+# --------------------------
+# 查询
+# --------------------------
+def today_iso(on=None):
+    return as_iso(on or date.today())
+
+
+def root_filter(root):
+    if root is None:
+        return "", ()
+    return " AND path >= ? AND path < ?", path_range(root)
+
+
+def expired(conn, on=None, root=None):
+    """已过期的证书（过期日期早于 on，默认今天），按过期日期排序"""
+    where, args = root_filter(root)
+    return conn.execute(
+        f"SELECT path, client, sample, expiry FROM certificates WHERE expiry < ?{where} ORDER BY expiry",
+        (today_iso(on),) + args).fetchall()
+
+
+def expiring_within(conn, days, on=None, root=None):
+    """days 天内（含当天）将要过期、目前仍有效的证书"""
+    start = today_iso(on)
+    end = as_iso(datetime.strptime(start, "%Y-%m-%d") + timedelta(days=days))
+    where, args = root_filter(root)
+    return conn.execute(
+        f"SELECT path, client, sample, expiry FROM certificates WHERE expiry >= ? AND expiry <= ?{where}"
+        f" ORDER BY expiry", (start, end) + args).fetchall()
+
+
+def missing_for_client(conn, client, kinds=KINDS, on=None):
+    """供应商缺少哪些类别的有效证书（没有任何未过期的该类证书），返回类别列表"""
+    row = conn.execute(
+        "SELECT MAX(rohs), MAX(reach), MAX(hf) FROM certificates WHERE client = ? AND expiry >= ?",
+        (client, today_iso(on))).fetchone()
+    have = dict(zip(KINDS, row))
+    return [kind for kind in kinds if not have[kind]]
+
+
+def failed_files(conn, root=None):
+    """环保_抽取处理失败的文件，返回 [(路径, 原因)]"""
+    where, args = root_filter(root)
+    return conn.execute(
+        f"SELECT path, note FROM certificates WHERE status = 'failed'{where} ORDER BY path", args).fetchall()
+
+
+def main():
+    conn = open_catalog()
+    try:
+        changed, removed = refresh_catalog(conn, REPORT_ROOT)
+        print(f"证书目录已刷新：新增或变化 {changed} 个，删除 {removed} 个")
+
+        rows = expired(conn, root=REPORT_ROOT)
+        print(f"\n========== 已过期：{len(rows)} 个 ==========")
+        for path, client, sample, expiry in rows:
+            print(f"{expiry}  {client}  {sample}  {path}")
+
+        rows = expiring_within(conn, EXPIRING_DAYS, root=REPORT_ROOT)
+        print(f"\n========== {EXPIRING_DAYS} 天内过期：{len(rows)} 个 ==========")
+        for path, client, sample, expiry in rows:
+            print(f"{expiry}  {client}  {sample}  {path}")
+
+        if SUPPLIERS:
+            print(f"\n========== 缺少有效证书的供应商 ==========")
+            for client in SUPPLIERS:
+                missing = missing_for_client(conn, client)
+                if missing:
+                    print(f"{client}：缺少 {'/'.join(missing)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""IQC检验记录的本地增量库（SQLite），供第三部分写入QCDS综合评分表
+
+检验记录清洗后存入与IQC检验记录同目录的 .qcds.sqlite 文件，同时按 (月份, 供应商, 料号)
+维护检验总数和NG数。每次同步只读取上次之后新追加的行：
+    水位线 = 已入库的行数 + 这些行内容（前4列）的哈希
+若水位线处的内容对不上（已入库的行被修改、删除或文件被替换），则清空后整体重建。
+清洗和统计只针对新行，QCDS 写入只读取月度统计表，与检验记录的历史长度无关；
+xlsx 本身仍需从头流式读取到水位线处（openpyxl 无法跳行）。
+"""
+import hashlib
+import os
+import re
+import sqlite3
+from collections import Counter
+
+from openpyxl import load_workbook
+
+STORE_SUFFIX = ".qcds.sqlite"  # 记录库文件后缀，与IQC检验记录同目录同名
+STORE_VERSION = 1  # 表结构或清洗规则变化时递增，旧记录库自动重建
+ALL_MONTHS = range(1, 13)
+SUMMARY_MONTH = 0  # 月度统计表中的全年合计（每行只计一次）
+
+
+def clean_text(text):
+    """清洗文本：去除空格、特殊字符并统一为小写，增强匹配度"""
+    if not text:
+        return ""
+    text_str = str(text).strip()
+    text_str = re.sub(r'\s+', '', text_str)  # 去除所有空格
+    text_str = re.sub(r'[^\w一-龥]', '', text_str)  # 保留字母、数字和中文
+    return text_str.lower()  # 统一小写，忽略大小写差异
+
+
+# 清洗结果缓存：同一个供应商/料号在日志中反复出现，只清洗一次
+_clean_cache = {}
+
+
+def clean_cached(text):
+    """带缓存的 clean_text（按值和类型缓存，避免 1 与 1.0 等相等的值共用结果）"""
+    key = (text.__class__, text)
+    cleaned = _clean_cache.get(key)
+    if cleaned is None:
+        cleaned = _clean_cache[key] = clean_text(text)
+    return cleaned
+
+
+def get_row_months(date, months=ALL_MONTHS):
+    """返回该行日期所属的月份（字符串日期按"N月"包含判断，可能同时属于多个月份）"""
+    if isinstance(date, str):
+        return [month_num for month_num in months if f"{month_num}月" in date]
+    if hasattr(date, "month"):
+        return [date.month] if date.month in months else []
+    return []
+
+
+def normalize_row(row):
+    """清洗一行检验记录，返回 (所属月份, 清洗后供应商, 原始供应商, 清洗后料号, 是否NG)，无效行返回None"""
+    row = tuple(row) + (None,) * (4 - len(row))
+    date, supplier, part, status = row[:4]
+    if not supplier or not part:
+        return None
+    row_months = get_row_months(date)
+    if not row_months:
+        return None
+    is_ng = bool(status) and str(status).strip().lower() == "ng"
+    return row_months, clean_cached(supplier), str(supplier).strip(), clean_cached(part), is_ng
+
+
+def new_aggregate(months):
+    """空的月度统计：{月份: {'total': Counter, 'ng': Counter, 'suppliers': set((清洗后, 原始))}}"""
+    return {month_num: {'total': Counter(), 'ng': Counter(), 'suppliers': set()}
+            for month_num in [SUMMARY_MONTH] + list(months)}
+
+
+def add_record(aggregate, record):
+    """将一条清洗后的记录计入统计（只计入 aggregate 中已有的月份）"""
+    row_months, supplier, supplier_original, part, is_ng = record
+    key = (supplier, part)
+    for month_num in [SUMMARY_MONTH] + row_months:
+        month_data = aggregate.get(month_num)
+        if month_data is None:
+            continue
+        month_data['suppliers'].add((supplier, supplier_original))
+        month_data['total'][key] += 1
+        if is_ng:
+            month_data['ng'][key] += 1
+
+
+# --------------------------
+# 增量记录库
+# --------------------------
+def get_store_path(iqc_file):
+    """返回IQC检验记录对应的记录库路径"""
+    return os.path.splitext(iqc_file)[0] + STORE_SUFFIX
+
+
+def open_store(store_path):
+    """打开记录库，不存在时创建表结构"""
+    conn = sqlite3.connect(store_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS records (
+            row_num INTEGER PRIMARY KEY, months TEXT, supplier TEXT, supplier_original TEXT,
+            part TEXT, is_ng INTEGER);
+        CREATE TABLE IF NOT EXISTS monthly (
+            month INTEGER, supplier TEXT, part TEXT, total INTEGER, ng INTEGER,
+            PRIMARY KEY (month, supplier, part));
+        CREATE TABLE IF NOT EXISTS suppliers (
+            month INTEGER, supplier TEXT, supplier_original TEXT,
+            PRIMARY KEY (month, supplier, supplier_original));
+    """)
+    return conn
+
+
+def read_watermark(conn, iqc_file):
+    """读取水位线 (已入库行数, 内容哈希)，记录库版本或来源文件不一致时返回None"""
+    meta = dict(conn.execute("SELECT key, value FROM meta"))
+    if meta.get('version') != str(STORE_VERSION) or meta.get('source') != os.path.abspath(iqc_file):
+        return None
+    return int(meta['row_count']), meta['content_hash']
+
+
+def key_columns(row):
+    """水位线只关心统计用到的前4列（日期、供应商、料号、结果），其他列的变化不影响统计"""
+    return (tuple(row) + (None,) * 4)[:4]
+
+
+def read_new_rows(iqc_file, watermark):
+    """读取水位线之后的新行，返回 (新行列表, 总行数, 全部行的哈希)，水位线校验失败时新行列表为None
+
+    行为第2行起的原始行（values_only，只取前4列），行号从1开始计。
+    xlsx 无法跳过前面的行，读到水位线之前的行时顺便计算哈希，几乎没有额外开销。
+    """
+    row_count, content_hash = watermark if watermark else (0, None)
+    digest = hashlib.sha256()
+    prefix_hash = digest.hexdigest()
+    new_rows = []
+    total = 0
+    workbook = load_workbook(iqc_file, read_only=True, data_only=True)
+    try:
+        for total, row in enumerate(workbook.active.iter_rows(min_row=2, values_only=True), start=1):
+            row = key_columns(row)
+            digest.update(repr(row).encode('utf-8'))
+            if total == row_count:
+                prefix_hash = digest.hexdigest()
+            elif total > row_count:
+                new_rows.append(row)
+    finally:
+        workbook.close()
+
+    if total < row_count or (content_hash is not None and prefix_hash != content_hash):
+        return None, total, digest.hexdigest()
+    return new_rows, total, digest.hexdigest()
+
+
+def reset_store(conn):
+    conn.executescript("DELETE FROM meta; DELETE FROM records; DELETE FROM monthly; DELETE FROM suppliers;")
+
+
+def ingest_rows(conn, rows, first_row_num):
+    """将新行清洗后写入记录表，并累加到月度统计表，返回有效记录数"""
+    records = []
+    monthly = Counter()
+    monthly_ng = Counter()
+    suppliers = set()
+    for row_num, row in enumerate(rows, start=first_row_num):
+        record = normalize_row(row)
+        if record is None:
+            continue
+        row_months, supplier, supplier_original, part, is_ng = record
+        records.append((row_num, ",".join(map(str, row_months)), supplier, supplier_original, part, int(is_ng)))
+        for month_num in [SUMMARY_MONTH] + row_months:
+            monthly[(month_num, supplier, part)] += 1
+            if is_ng:
+                monthly_ng[(month_num, supplier, part)] += 1
+            suppliers.add((month_num, supplier, supplier_original))
+
+    conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)", records)
+    conn.executemany("""
+        INSERT INTO monthly VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (month, supplier, part) DO UPDATE SET total = total + excluded.total, ng = ng + excluded.ng
+    """, [(month_num, supplier, part, total, monthly_ng[(month_num, supplier, part)])
+          for (month_num, supplier, part), total in monthly.items()])
+    conn.executemany("INSERT OR IGNORE INTO suppliers VALUES (?, ?, ?)", suppliers)
+    return len(records)
+
+
+def write_watermark(conn, iqc_file, row_count, content_hash):
+    meta = {
+        'version': str(STORE_VERSION),
+        'source': os.path.abspath(iqc_file),
+        'row_count': str(row_count),
+        'content_hash': content_hash,
+    }
+    conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta.items())
+
+
+def sync_store(iqc_file, store_path=None):
+    """同步记录库：只清洗并入库新追加的行，水位线不一致时整体重建。返回新入库的有效记录数"""
+    store_path = store_path or get_store_path(iqc_file)
+    conn = open_store(store_path)
+    try:
+        watermark = read_watermark(conn, iqc_file)
+        new_rows, total, content_hash = read_new_rows(iqc_file, watermark)
+        if new_rows is None:
+            print("IQC检验记录中已有的行发生了变化，重新建立记录库")
+            watermark = None
+            new_rows, total, content_hash = read_new_rows(iqc_file, None)
+        elif watermark is None:
+            print(f"正在建立IQC记录库: {store_path}")
+
+        with conn:
+            if watermark is None:
+                reset_store(conn)
+            first_row_num = (watermark[0] if watermark else 0) + 1
+            added = ingest_rows(conn, new_rows, first_row_num)
+            write_watermark(conn, iqc_file, total, content_hash)
+        print(f"IQC记录库同步完成：新增 {len(new_rows)} 行，其中有效记录 {added} 条，共 {total} 行")
+        return added
+    finally:
+        conn.close()
+
+
+def load_aggregate(months, iqc_file=None, store_path=None):
+    """从记录库读取月度统计，结构与 new_aggregate 相同（只包含指定月份和全年合计）"""
+    store_path = store_path or get_store_path(iqc_file)
+    aggregate = new_aggregate(months)
+    month_list = list(aggregate)
+    placeholders = ",".join("?" * len(month_list))
+
+    conn = sqlite3.connect(store_path)
+    try:
+        for month_num, supplier, part, total, ng in conn.execute(
+                f"SELECT month, supplier, part, total, ng FROM monthly WHERE month IN ({placeholders})", month_list):
+            aggregate[month_num]['total'][(supplier, part)] = total
+            if ng:
+                aggregate[month_num]['ng'][(supplier, part)] = ng
+        for month_num, supplier, supplier_original in conn.execute(
+                f"SELECT month, supplier, supplier_original FROM suppliers WHERE month IN ({placeholders})",
+                month_list):
+            aggregate[month_num]['suppliers'].add((supplier, supplier_original))
+    finally:
+        conn.close()
+    return aggregate
@@ -4,6 +4,8 @@ import re
 import unicodedata
 from openpyxl.styles import Alignment
 
+from 规则引擎 import apply_exact, compile_exact_rules, compile_keywords, contains_any
+
 # --------------------------
 # 配置参数（在此处修改关键词和规则）
 # --------------------------
@@ -57,6 +59,10 @@ B_COLUMN_SORT_ORDER = [
 # 是否合并B列中内容相同的单元格
 MERGE_B_COLUMN = False  # 设置为False可禁用合并功能
 
+# 是否以只写模式输出：只读方式加载、结果写入新的工作簿（只保留当前工作表的数据，不保留格式和其他工作表）
+# 数据量很大时更快、更省内存；开启B列合并时不可用
+WRITE_ONLY_OUTPUT = False
+
 
 def clean_text(text):
     """增强版文本清理函数，移除不可见字符并标准化"""
@@ -73,49 +79,130 @@ def clean_text(text):
     return cleaned.lower()
 
 
-def delete_rows_by_keyword(sheet, column, keywords):
-    """优化版：通过保留需要的行来替代删除行，提高处理大量数据时的效率"""
+def load_rows(sheet):
+    """一次读取工作表的所有行，返回(行数据列表, 行数, 列数)，每行补齐为相同列数的列表"""
+    rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    max_col = max((len(row) for row in rows), default=0)
+    for row in rows:
+        row.extend([None] * (max_col - len(row)))
+    return rows, len(rows), max_col
+
+
+def get_value(row, col_idx):
+    """取行中指定列（0开始）的值，列不存在时返回None"""
+    return row[col_idx] if col_idx < len(row) else None
+
+
+def replace_b_values(rows, exact_map):
+    """B列字段替换（全字段匹配，exact_map 为编译后的替换规则），返回替换次数"""
+    replaced_count = 0
+    for row in rows:
+        original_value = get_value(row, 1)
+        if original_value is None:
+            continue
+
+        initial_value = clean_text(str(original_value).strip())
+        cleaned_value, steps = apply_exact(exact_map, initial_value)
+        replaced_count += steps
+
+        if cleaned_value != initial_value:
+            row[1] = cleaned_value
+    return replaced_count
+
+
+def fill_a_column(rows):
+    """A列向下填充：空白单元格使用上方最近的非空值"""
+    current_a_value = None
+    for row in rows:
+        if not row:
+            continue
+        cell_value = row[0]
+        if cell_value and str(cell_value).strip():
+            current_a_value = cell_value
+        elif current_a_value is not None:
+            row[0] = current_a_value
+
+
+def build_row_table(rows):
+    """生成行表：每行为(A列清洗值, B列清洗值, 行数据)，后续各步骤只需清洗一次"""
+    return [(clean_text(get_value(row, 0)), clean_text(get_value(row, 1)), row) for row in rows]
+
+
+def filter_by_keywords(table, column, keywords):
+    """删除指定列（'A'或'B'）清洗后包含任一关键词的行，返回(保留的行表, 删除行数)"""
     if not keywords:
-        return 0
+        return table, 0
+
+    automaton = compile_keywords([clean_text(kw) for kw in keywords])
+    key_idx = 0 if column == 'A' else 1
+    kept = [item for item in table if not contains_any(automaton, item[key_idx])]
+    return kept, len(table) - len(kept)
+
+
+def filter_special_companies(table, companies):
+    """A列匹配特殊公司且B列不等于允许值的行删除，返回(保留的行表, 删除行数)"""
+    # 公司 -> 允许的B列值集合（同一公司配置多次时，B列需与每一条配置都一致才保留）
+    allowed_b = {}
+    for company in companies:
+        allowed_b.setdefault(clean_text(company["company"]), set()).add(clean_text(company["allowed_b"]))
 
-    cleaned_keywords = [clean_text(kw) for kw in keywords]
-    max_row = sheet.max_row
-    max_col = sheet.max_column
+    kept = [item for item in table if item[0] not in allowed_b or allowed_b[item[0]] == {item[1]}]
+    return kept, len(table) - len(kept)
 
-    # 收集需要保留的行数据
-    rows_to_keep = []
 
-    for row in range(1, max_row + 1):
-        cell_value = sheet[f'{column}{row}'].value
-        cell_clean = clean_text(cell_value)
+def dedupe_ab(table):
+    """A/B列组合去重（保留第一次出现的行），同时去掉A、B列均为空的行，返回(保留的行表, 删除行数)"""
+    seen_pairs = set()
+    kept = []
+    for item in table:
+        pair = (item[0], item[1])
+        if not item[0] and not item[1]:
+            continue
+        if pair not in seen_pairs:
+            seen_pairs.add(pair)
+            kept.append(item)
+    return kept, len(table) - len(kept)
 
-        # 检查是否包含任何关键词
-        contains_keyword = any(kw in cell_clean for kw in cleaned_keywords)
 
-        # 如果不包含关键词，则保留此行
-        if not contains_keyword:
-            # 保存整行数据
-            row_data = [sheet.cell(row=row, column=col).value for col in range(1, max_col + 1)]
-            rows_to_keep.append(row_data)
+def is_blank(value):
+    return not value or str(value).strip() == ''
 
-    # 计算删除的行数
-    deleted_count = max_row - len(rows_to_keep)
 
-    # 清空工作表
-    for row in range(1, max_row + 1):
-        for col in range(1, max_col + 1):
-            sheet.cell(row=row, column=col).value = None
+def sort_by_b(table, sort_order):
+    """去掉A、B列原值均为空的行，按B列自定义顺序排序（未指定项排在最后），返回排序后的行数据列表"""
+    sort_priority = {clean_text(item): idx for idx, item in enumerate(sort_order)}
+    default_priority = len(sort_order)  # 未指定项的优先级
 
-    # 写入保留的行数据
-    for new_row, row_data in enumerate(rows_to_keep, start=1):
-        for col, value in enumerate(row_data, start=1):
-            sheet.cell(row=new_row, column=col).value = value
+    rows_data = [item for item in table
+                 if not (is_blank(get_value(item[2], 0)) and is_blank(get_value(item[2], 1)))]
+    # 排序键：(优先级, 清洗后的值)
+    rows_data.sort(key=lambda item: (sort_priority.get(item[1], default_priority), item[1]))
+    return [item[2] for item in rows_data]
 
-        # 显示进度
-        if new_row % 5000 == 0:
-            print(f"已处理 {new_row}/{len(rows_to_keep)} 行")
 
-    return deleted_count
+def write_rows(sheet, rows, old_max_row, max_col):
+    """将结果一次写回工作表，原有的多余行清空（只改值，不改格式）"""
+    for row_idx, row_data in enumerate(rows, start=1):
+        for col_idx, value in enumerate(row_data, start=1):
+            sheet.cell(row=row_idx, column=col_idx).value = value
+
+        if row_idx % 5000 == 0:
+            print(f"已写入 {row_idx} 行数据")
+
+    if old_max_row > len(rows) and max_col > 0:
+        for row in sheet.iter_rows(min_row=len(rows) + 1, max_row=old_max_row, max_col=max_col):
+            for cell in row:
+                if cell.value is not None:
+                    cell.value = None
+
+
+def save_write_only(file_path, sheet_title, rows):
+    """以只写模式保存结果（新工作簿，仅包含处理后的数据）"""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    for row_data in rows:
+        sheet.append(row_data)
+    workbook.save(file_path)
 
 
 def merge_same_b_cells(sheet):
@@ -154,19 +241,27 @@ def merge_same_b_cells(sheet):
 
 
 def process_excel_columns(file_path):
-    """完整处理流程：替换→填充→删除→多特殊公司处理→去重→按自定义顺序分类→合并B列相同内容"""
+    """完整处理流程：替换→填充→删除→多特殊公司处理→去重→按自定义顺序分类→合并B列相同内容
+
+    工作表只读取一次，各步骤在内存中的行表上依次进行，结果最后一次性写回。
+    """
     try:
         if not os.path.exists(file_path):
             print(f"错误: 文件 '{file_path}' 不存在")
             return
 
+        write_only = WRITE_ONLY_OUTPUT and not MERGE_B_COLUMN
+        if WRITE_ONLY_OUTPUT and MERGE_B_COLUMN:
+            print("已开启B列合并，不使用只写模式输出")
+
         print("开始加载Excel文件...")
-        workbook = openpyxl.load_workbook(file_path, read_only=False, data_only=True)
+        workbook = openpyxl.load_workbook(file_path, read_only=write_only, data_only=True)
         sheet = workbook.active
+        sheet_title = sheet.title
+        rows, max_row, max_col = load_rows(sheet)
+        if write_only:
+            workbook.close()
         print("Excel文件加载完成")
-
-        max_row = sheet.max_row
-        max_col = sheet.max_column
         print(f"原始数据：共 {max_row} 行，{max_col} 列\n")
 
         # --------------------------
@@ -174,205 +269,81 @@ def process_excel_columns(file_path):
         # --------------------------
         print("===== 步骤1：B列字段替换 =====")
         cleaned_rules = [(clean_text(k), clean_text(v)) for k, v in REPLACEMENT_RULES if clean_text(k)]
-        replaced_count = 0
-
-        for row in range(1, max_row + 1):
-            cell = sheet[f'B{row}']
-            original_value = cell.value
-
-            if original_value is not None:
-                cleaned_value = clean_text(str(original_value).strip())
-                initial_value = cleaned_value
-
-                for _ in range(MAX_REPLACE_ROUNDS):
-                    changed = False
-                    for key, value in cleaned_rules:
-                        if cleaned_value == key:
-                            cleaned_value = value
-                            replaced_count += 1
-                            changed = True
-                            break
-                    if not changed:
-                        break
-
-                if cleaned_value != initial_value:
-                    cell.value = cleaned_value
-
-            if row % 5000 == 0:
-                print(f"已处理 {row}/{max_row} 行")
-
+        exact_map = compile_exact_rules(cleaned_rules, MAX_REPLACE_ROUNDS)
+        replaced_count = replace_b_values(rows, exact_map)
         print(f"替换完成：共替换 {replaced_count} 处\n")
 
         # --------------------------
         # 步骤2：A列填充
         # --------------------------
         print("===== 步骤2：A列填充 =====")
-        current_a_value = None
-        for row in range(1, max_row + 1):
-            cell_value = sheet[f'A{row}'].value
-            if cell_value and str(cell_value).strip():
-                current_a_value = cell_value
-            elif current_a_value is not None:
-                sheet[f'A{row}'].value = current_a_value
+        fill_a_column(rows)
         print("A列填充完成\n")
 
+        # A、B列此后不再修改，清洗一次供后续步骤共用
+        table = build_row_table(rows)
+
         # --------------------------
         # 步骤3：删除A列包含指定关键词的行
         # --------------------------
         print(f"===== 步骤3：删除A列包含{DELETE_A_KEYWORDS}的行 =====")
-        deleted_a = delete_rows_by_keyword(sheet, "A", DELETE_A_KEYWORDS)
+        table, deleted_a = filter_by_keywords(table, "A", DELETE_A_KEYWORDS)
         print(f"A列删除完成：共删除 {deleted_a} 行\n")
-        max_row = sheet.max_row
 
         # --------------------------
         # 步骤4：删除B列包含指定关键词的行
         # --------------------------
         print(f"===== 步骤4：删除B列包含{DELETE_B_KEYWORDS[:5]}等关键词的行 =====")
-        deleted_b = delete_rows_by_keyword(sheet, "B", DELETE_B_KEYWORDS)
+        table, deleted_b = filter_by_keywords(table, "B", DELETE_B_KEYWORDS)
         print(f"B列删除完成：共删除 {deleted_b} 行\n")
-        max_row = sheet.max_row
 
         # --------------------------
         # 步骤5：处理多个特殊公司的行
         # 逻辑：A列匹配公司名称且B列不等于允许值 → 删除
         # --------------------------
         print("===== 步骤5：处理多个特殊公司的行 =====")
+        deleted_special = 0
         if not SPECIAL_COMPANIES:
             print("无特殊公司配置，跳过此步骤\n")
         else:
-            # 预处理特殊公司信息（清洗文本，提高匹配效率）
-            processed_companies = [
-                {
-                    "company_clean": clean_text(company["company"]),
-                    "allowed_b_clean": clean_text(company["allowed_b"]),
-                    "company_original": company["company"]  # 保留原始名称用于显示
-                }
-                for company in SPECIAL_COMPANIES
-            ]
-
-            rows_to_keep = []
-            # 遍历所有行检查特殊公司规则
-            for row in range(1, max_row + 1):
-                a_val = sheet[f'A{row}'].value
-                b_val = sheet[f'B{row}'].value
-                a_clean = clean_text(a_val)
-                b_clean = clean_text(b_val)
-
-                # 检查是否匹配任何特殊公司
-                keep_row = True
-                for comp in processed_companies:
-                    if a_clean == comp["company_clean"]:
-                        # 匹配到公司，检查B列是否为允许值
-                        if b_clean != comp["allowed_b_clean"]:
-                            keep_row = False
-                            break  # 匹配到一个公司即停止检查其他公司
-
-                if keep_row:
-                    row_data = [sheet.cell(row=row, column=col).value for col in range(1, max_col + 1)]
-                    rows_to_keep.append(row_data)
-
-            # 计算删除的行数
-            deleted_special = max_row - len(rows_to_keep)
-
-            # 清空工作表
-            for row in range(1, max_row + 1):
-                for col in range(1, max_col + 1):
-                    sheet.cell(row=row, column=col).value = None
-
-            # 写入保留的行数据
-            for new_row, row_data in enumerate(rows_to_keep, start=1):
-                for col, value in enumerate(row_data, start=1):
-                    sheet.cell(row=new_row, column=col).value = value
+            table, deleted_special = filter_special_companies(table, SPECIAL_COMPANIES)
 
             # 显示配置的特殊公司清单
             print("特殊公司配置清单：")
             for comp in SPECIAL_COMPANIES:
                 print(f"- {comp['company']}：仅保留B列='{comp['allowed_b']}'的行")
             print(f"特殊公司行处理完成：共删除 {deleted_special} 行不符合条件的记录\n")
-            max_row = len(rows_to_keep)
 
         # --------------------------
         # 步骤6：A/B列组合去重
         # --------------------------
         print("===== 步骤6：A/B列组合去重 =====")
-        seen_pairs = set()
-        rows_to_keep = []
-
-        for row in range(1, max_row + 1):
-            a_clean = clean_text(sheet[f'A{row}'].value)
-            b_clean = clean_text(sheet[f'B{row}'].value)
-            pair = (a_clean, b_clean)
-
-            if not a_clean and not b_clean:
-                continue
-
-            if pair not in seen_pairs:
-                seen_pairs.add(pair)
-                row_data = [sheet.cell(row=row, column=col).value for col in range(1, max_col + 1)]
-                rows_to_keep.append(row_data)
-
-        # 计算删除的重复行数
-        deleted_duplicate = max_row - len(rows_to_keep)
-
-        # 清空工作表
-        for row in range(1, max_row + 1):
-            for col in range(1, max_col + 1):
-                sheet.cell(row=row, column=col).value = None
-
-        # 写入去重后的数据
-        for new_row, row_data in enumerate(rows_to_keep, start=1):
-            for col, value in enumerate(row_data, start=1):
-                sheet.cell(row=new_row, column=col).value = value
-
+        table, deleted_duplicate = dedupe_ab(table)
         print(f"去重完成：共删除 {deleted_duplicate} 行重复数据\n")
-        max_row = len(rows_to_keep)
 
         # --------------------------
         # 步骤7：按B列自定义顺序分类
         # --------------------------
         print("===== 步骤7：按B列自定义顺序分类 =====")
-        # 创建排序优先级字典
-        sort_priority = {clean_text(item): idx for idx, item in enumerate(B_COLUMN_SORT_ORDER)}
-        default_priority = len(B_COLUMN_SORT_ORDER)  # 未指定项的优先级
-
-        rows_data = []
-        for row in range(1, max_row + 1):
-            a_val = sheet[f'A{row}'].value
-            b_val = sheet[f'B{row}'].value
-            if (not a_val or str(a_val).strip() == '') and (not b_val or str(b_val).strip() == ''):
-                continue
-
-            row_data = [sheet.cell(row=row, column=col).value for col in range(1, max_col + 1)]
-            b_clean = clean_text(b_val)
-            priority = sort_priority.get(b_clean, default_priority)
-            sort_key = (priority, b_clean)  # 排序键：(优先级, 清洗后的值)
-
-            rows_data.append((sort_key, row_data))
-
-        # 按自定义顺序排序
-        rows_data.sort(key=lambda x: x[0])
+        rows_data = sort_by_b(table, B_COLUMN_SORT_ORDER)
         print(f"分类完成：共 {len(rows_data)} 行有效数据")
         print(f"排序顺序：{', '.join(B_COLUMN_SORT_ORDER)}，其他项排在最后")
 
-        # 写入分类后的数据
-        for row in range(1, max_row + 1):
-            for col in range(1, max_col + 1):
-                sheet.cell(row=row, column=col).value = None
-
-        for new_row, (_, row_data) in enumerate(rows_data, start=1):
-            for col, value in enumerate(row_data, start=1):
-                sheet.cell(row=new_row, column=col).value = value
-
-            if new_row % 5000 == 0:
-                print(f"已写入 {new_row} 行数据")
-
-        max_row = len(rows_data)
+        # --------------------------
+        # 写回结果（只写一次）
+        # --------------------------
+        if write_only:
+            print("\n正在以只写模式保存文件...")
+            save_write_only(file_path, sheet_title, rows_data)
+        else:
+            write_rows(sheet, rows_data, max_row, max_col)
 
         # --------------------------
         # 步骤8：合并B列中内容相同的单元格
         # --------------------------
         print("===== 步骤8：合并B列中内容相同的单元格 =====")
-        if MERGE_B_COLUMN and max_row > 0:
+        merged_groups = 0
+        if MERGE_B_COLUMN and rows_data:
             merged_groups = merge_same_b_cells(sheet)
             print(f"B列合并完成：共合并 {merged_groups} 组相同内容的单元格\n")
         else:
@@ -381,12 +352,13 @@ def process_excel_columns(file_path):
         # --------------------------
         # 保存文件
         # --------------------------
-        print("\n正在保存文件...")
-        workbook.save(file_path)
+        if not write_only:
+            print("\n正在保存文件...")
+            workbook.save(file_path)
         print(f"所有处理完成，已覆盖原文件: {file_path}")
         print(f"最终统计：删除A列{deleted_a}行，删除B列{deleted_b}行，"
-              f"删除特殊公司行{deleted_special if SPECIAL_COMPANIES else 0}行，"
-              f"删除重复{deleted_duplicate}行，合并B列{merged_groups if MERGE_B_COLUMN else 0}组，"
+              f"删除特殊公司行{deleted_special}行，"
+              f"删除重复{deleted_duplicate}行，合并B列{merged_groups}组，"
               f"剩余{len(rows_data)}行")
 
     except Exception as e:
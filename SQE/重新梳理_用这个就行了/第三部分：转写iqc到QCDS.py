@@ -1,6 +1,7 @@
 import openpyxl
 import os
-import re
+
+from IQC记录库 import clean_cached, normalize_row, new_aggregate, add_record, sync_store, load_aggregate
 
 # ================ 可配置参数 ================
 process_all_months = False  # True=处理12个月份，False=处理单个月份
@@ -9,6 +10,8 @@ should_merge_cells = False  # 是否合并第二列相同单元格
 delete_zero_rows = False  # 是否删除第四列值为0的行（注意：默认用 hide 模式）
 delete_mode = 'hide'  # 'hide' 或 'openpyxl'
 create_backup = False  # 是否创建备份文件
+fill_summary_sheet = True  # 处理12个月份时，是否同时把全年合计写入"汇总"表（公式单元格不覆盖）
+use_iqc_store = True  # 是否使用IQC记录库（只入库新追加的行），False=每次完整扫描IQC检验记录
 
 # 文件路径设置
 file1_path = r"E:\System\desktop\PY\SQE\关系梳理\声乐（惠州）品控履历表_IQC检验记录（量产）.xlsx"
@@ -16,16 +19,6 @@ file2_path = r"E:\System\desktop\PY\SQE\声乐QCDS综合评分表_优化 - 副
 # ================================================================
 
 
-def clean_text(text):
-    """清洗文本：去除空格、特殊字符并统一为小写，增强匹配度"""
-    if not text:
-        return ""
-    text_str = str(text).strip()
-    text_str = re.sub(r'\s+', '', text_str)  # 去除所有空格
-    text_str = re.sub(r'[^\w\u4e00-\u9fa5]', '', text_str)  # 保留字母、数字和中文
-    return text_str.lower()  # 统一小写，忽略大小写差异
-
-
 def merge_same_cells(worksheet, column):
     """合并指定列中连续相同的单元格（原样保留你的实现）"""
     if worksheet.max_row < 2:
@@ -97,51 +90,39 @@ def delete_rows_with_zero(worksheet, mode='hide'):
         raise ValueError("不支持的 mode，选择 'hide' 或 'openpyxl'。")
 
 
-def process_month(ws1, ws2, month_num, month_name, should_merge, delete_zero,
-                  file1_suppliers, file2_suppliers):
-    """处理单个月份的数据，收集供应商信息"""
-    total_count = {}
-    ng_count = {}
+def scan_iqc_log(ws1, months):
+    """不使用记录库时：完整扫描一次IQC检验记录，按月份统计 (供应商, 料号) 的检验总数和NG数
 
-    # 处理file1数据，收集供应商
+    返回结构与 IQC记录库.load_aggregate 相同，月份 0 为全年合计（每行只计一次），用于"汇总"表。
+    """
+    aggregate = new_aggregate(months)
     for row in ws1.iter_rows(min_row=2, values_only=True):
-        date, supplier, part, status = row[:4]
-        if not supplier or not part:
-            continue
-        is_target_month = False
-        if isinstance(date, str):
-            if month_name in date:
-                is_target_month = True
-        elif hasattr(date, "month"):
-            if date.month == month_num:
-                is_target_month = True
-        if not is_target_month:
-            continue
-        cleaned_supplier = clean_text(supplier)
-        original_supplier = str(supplier).strip()
-        file1_suppliers.add((cleaned_supplier, original_supplier))
-        cleaned_part = clean_text(part)
-        key = (cleaned_supplier, cleaned_part)
-        total_count[key] = total_count.get(key, 0) + 1
-        if status and str(status).strip().lower() == "ng":
-            ng_count[key] = ng_count.get(key, 0) + 1
-
-    # 处理file2数据，写入 total / ng
+        record = normalize_row(row)
+        if record is not None:
+            add_record(aggregate, record)
+    return aggregate
+
+
+def is_formula(value):
+    return isinstance(value, str) and value.startswith('=')
+
+
+def fill_qcds_sheet(ws2, month_data, should_merge, delete_zero, file2_suppliers, keep_formulas=False):
+    """将统计结果写入QCDS工作表（第6行起，B列料号、C列供应商，写入D列总数、E列NG数）"""
     for row_num in range(6, ws2.max_row + 1):
         part = ws2.cell(row=row_num, column=2).value
         supplier = ws2.cell(row=row_num, column=3).value
         if not supplier or not part:
             continue
-        cleaned_supplier = clean_text(supplier)
+        cleaned_supplier = clean_cached(supplier)
         file2_suppliers.add(cleaned_supplier)
-        cleaned_part = clean_text(part)
-        key = (cleaned_supplier, cleaned_part)
+        key = (cleaned_supplier, clean_cached(part))
 
-        total_cell = ws2.cell(row=row_num, column=4)
-        total_cell.value = total_count.get(key, 0)
-
-        ng_cell = ws2.cell(row=row_num, column=5)
-        ng_cell.value = ng_count.get(key, 0)
+        for column, counts in ((4, month_data['total']), (5, month_data['ng'])):
+            cell = ws2.cell(row=row_num, column=column)
+            if keep_formulas and is_formula(cell.value):
+                continue
+            cell.value = counts.get(key, 0)
 
     # 执行删除/隐藏零值行操作（**不对名为 "汇总" 的 sheet 生效**）
     deleted_count = 0
@@ -175,28 +156,31 @@ if __name__ == "__main__":
     file2_suppliers = set()
 
     try:
-        wb1 = openpyxl.load_workbook(file1_path, read_only=True, data_only=True)
         wb2 = openpyxl.load_workbook(file2_path, data_only=False, keep_vba=True)
-        ws1 = wb1.active
-
-        all_months = [(i, f"{i}月") for i in range(1, 13)]
-        target_month_name = f"{target_month_num}月"
 
         if process_all_months:
-            for month_num, month_name in all_months:
-                if month_name in wb2.sheetnames:
-                    ws2 = wb2[month_name]
-                    process_month(ws1, ws2, month_num, month_name,
-                                  should_merge_cells, delete_zero_rows,
-                                  file1_suppliers, file2_suppliers)
+            months = [month_num for month_num in range(1, 13) if f"{month_num}月" in wb2.sheetnames]
         else:
-            if target_month_name in wb2.sheetnames:
-                ws2 = wb2[target_month_name]
-                process_month(ws1, ws2, target_month_num, target_month_name,
-                              should_merge_cells, delete_zero_rows,
-                              file1_suppliers, file2_suppliers)
+            months = [target_month_num] if f"{target_month_num}月" in wb2.sheetnames else []
+
+        # 各月份工作表都从同一份统计结果写入
+        if use_iqc_store:
+            sync_store(file1_path)
+            aggregate = load_aggregate(months, iqc_file=file1_path)
+        else:
+            wb1 = openpyxl.load_workbook(file1_path, read_only=True, data_only=True)
+            aggregate = scan_iqc_log(wb1.active, months)
+            wb1.close()
+
+        for month_num in months:
+            fill_qcds_sheet(wb2[f"{month_num}月"], aggregate[month_num],
+                            should_merge_cells, delete_zero_rows, file2_suppliers)
+            file1_suppliers |= aggregate[month_num]['suppliers']
+
+        if process_all_months and fill_summary_sheet and "汇总" in wb2.sheetnames:
+            fill_qcds_sheet(wb2["汇总"], aggregate[0], should_merge_cells, delete_zero_rows,
+                            set(), keep_formulas=True)
 
-        wb1.close()
         wb2.save(file2_path)
         wb2.close()
 
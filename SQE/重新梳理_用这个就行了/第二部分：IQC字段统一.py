@@ -4,6 +4,8 @@ import unicodedata
 import re
 from openpyxl.styles import Alignment
 
+from 规则引擎 import apply_exact, apply_fuzzy, compile_exact_rules, compile_fuzzy_rules, compile_keywords, contains_any
+
 # --------------------------
 # 配置参数
 # --------------------------
@@ -90,8 +92,8 @@ def delete_c_rows_by_keyword(sheet):
     if not DELETE_C_KEYWORDS:
         return 0
 
-    # 预处理删除关键词，统一格式
-    cleaned_keywords = [clean_text(kw) for kw in DELETE_C_KEYWORDS]
+    # 预处理删除关键词，统一格式后编译为自动机
+    automaton = compile_keywords([clean_text(kw) for kw in DELETE_C_KEYWORDS])
     max_row = sheet.max_row
     max_col = sheet.max_column
 
@@ -103,7 +105,7 @@ def delete_c_rows_by_keyword(sheet):
         cell_clean = clean_text(cell_value)
 
         # 检查是否包含任何关键词（包含匹配）
-        contains_keyword = any(kw in cell_clean for kw in cleaned_keywords)
+        contains_keyword = contains_any(automaton, cell_clean)
 
         # 如果不包含关键词，则保留此行
         if not contains_keyword:
@@ -230,8 +232,9 @@ def process_c_column(file_path):
         print(f"原始数据：共 {max_row} 行，{max_col} 列\n")
 
         # 预处理所有规则（清理格式，确保匹配准确性）
-        cleaned_rules = preprocess_rules(REPLACEMENT_RULES)
-        cleaned_fuzzy_rules = preprocess_rules(FUZZY_REPLACEMENT_RULES)
+        # 并编译：全字段规则合并为一次查找的字典，模糊规则编译为自动机
+        exact_map = compile_exact_rules(preprocess_rules(REPLACEMENT_RULES), MAX_REPLACE_ROUNDS)
+        fuzzy_rules = compile_fuzzy_rules(preprocess_rules(FUZZY_REPLACEMENT_RULES))
 
         # --------------------------
         # 步骤1：C列模糊匹配替换（包含关键词即替换）
@@ -248,12 +251,10 @@ def process_c_column(file_path):
                 cleaned_value = clean_text(str(original_value))
                 initial_value = cleaned_value
 
-                # 应用模糊替换
-                for key, value in cleaned_fuzzy_rules:
-                    if key in cleaned_value:  # 模糊匹配：包含关键词即替换
-                        cleaned_value = value
-                        fuzzy_replaced_count += 1
-                        break  # 每个单元格只应用一次模糊替换
+                # 应用模糊替换（包含关键词即替换，每个单元格只应用一次）
+                cleaned_value, replaced = apply_fuzzy(fuzzy_rules, cleaned_value)
+                if replaced:
+                    fuzzy_replaced_count += 1
 
                 # 如果有变化，更新单元格值
                 if cleaned_value != initial_value:
@@ -281,17 +282,9 @@ def process_c_column(file_path):
                 cleaned_value = clean_text(str(original_value))
                 initial_value = cleaned_value
 
-                # 应用多次全字段替换
-                for _ in range(MAX_REPLACE_ROUNDS):
-                    changed = False
-                    for key, value in cleaned_rules:
-                        if cleaned_value == key:  # 全字段精确匹配
-                            cleaned_value = value
-                            exact_replaced_count += 1
-                            changed = True
-                            break
-                    if not changed:
-                        break
+                # 应用全字段替换（多轮替换已在编译时合并）
+                cleaned_value, steps = apply_exact(exact_map, cleaned_value)
+                exact_replaced_count += steps
 
                 # 如果有变化，更新单元格值
                 if cleaned_value != initial_value:
@@ -2,6 +2,7 @@ import openpyxl
 import os
 import unicodedata
 import re
+from collections import Counter
 from difflib import SequenceMatcher
 
 # ==============================================================================
@@ -57,27 +58,113 @@ def clean_text(text):
 # ==============================================================================
 # 匹配逻辑（核心改进）
 # ==============================================================================
-def find_best_match(abbreviation, fullname_list, min_ratio):
+def split_bigrams(text):
+    """将文本切分为连续两个汉字的片段"""
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def build_fullname_index(fullname_list):
+    """为全称列表建立倒排索引：汉字二元组 -> 全称序号、单个汉字 -> 全称序号
+
+    fullname_list 为 [(清洗后的全称, 原始全称)]，序号即列表中的位置，匹配时按该顺序取第一个。
+    同一次运行中的匹配结果按清洗后的简称缓存在 memo 中。
+    """
+    grams, chars = {}, {}
+    char_counts = []
+    for idx, (full_clean, _) in enumerate(fullname_list):
+        for gram in set(split_bigrams(full_clean)):
+            grams.setdefault(gram, []).append(idx)
+        counts = Counter(full_clean)
+        for char in counts:
+            chars.setdefault(char, []).append(idx)
+        char_counts.append(counts)
+
+    return {
+        'names': fullname_list,
+        'grams': grams,
+        'gram_sets': {gram: set(postings) for gram, postings in grams.items()},
+        'chars': chars,
+        'char_counts': char_counts,
+        'substrings': {},  # 片段 -> 第一个包含它的全称序号（None 表示没有）
+        'memo': {},  # 清洗后的简称 -> (匹配的全称, 相似度)
+    }
+
+
+def find_first_containing(index, sub):
+    """返回第一个包含片段 sub（至少2个汉字）的全称序号，没有时返回None"""
+    if sub in index['substrings']:
+        return index['substrings'][sub]
+
+    result = None
+    gram_list = set(split_bigrams(sub))
+    if all(gram in index['grams'] for gram in gram_list):
+        if len(gram_list) == 1 and len(sub) == 2:
+            # 片段本身就是二元组，倒排表中的第一个全称即为结果
+            result = index['grams'][sub][0]
+        else:
+            # 取所有二元组倒排表的交集，再按顺序确认整个片段
+            postings = sorted((index['gram_sets'][gram] for gram in gram_list), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+            for idx in sorted(candidates):
+                if sub in index['names'][idx][0]:
+                    result = idx
+                    break
+
+    index['substrings'][sub] = result
+    return result
+
+
+def find_similar(index, abbr_clean, min_ratio):
+    """difflib 模糊匹配：只计算与简称有相同汉字的全称，并按相似度上限从高到低计算"""
+    abbr_counts = Counter(abbr_clean)
+    shared = Counter()
+    for char in abbr_counts:
+        for idx in index['chars'].get(char, ()):
+            shared[idx] += min(abbr_counts[char], index['char_counts'][idx][char])
+
+    # 相似度上限：2 × 相同汉字数 / 总长度（即 SequenceMatcher.quick_ratio）
+    candidates = sorted(
+        ((2.0 * count / (len(abbr_clean) + len(index['names'][idx][0])), idx) for idx, count in shared.items()),
+        key=lambda item: (-item[0], item[1]))
+
+    best_idx, best_ratio = None, 0
+    for upper_bound, idx in candidates:
+        if upper_bound < best_ratio or upper_bound < min_ratio:
+            break
+        ratio = SequenceMatcher(None, abbr_clean, index['names'][idx][0]).ratio()
+        # 相似度相同时取列表中靠前的全称
+        if ratio >= min_ratio and (ratio > best_ratio or (ratio == best_ratio and idx < best_idx)):
+            best_idx, best_ratio = idx, ratio
+
+    if best_idx is None:
+        return None, 0
+    return index['names'][best_idx][1], best_ratio
+
+
+def find_best_match(abbreviation, index, min_ratio):
     abbr_clean = clean_text(abbreviation)
     if not abbr_clean:
         return None, 0
+    if abbr_clean in index['memo']:
+        return index['memo'][abbr_clean]
 
-    # 第一优先：如果全称中包含任意 ≥2 连续汉字的片段
+    result = None
+    # 第一优先：如果全称中包含任意 ≥2 连续汉字的片段（从长到短、从左到右）
     for length in range(len(abbr_clean), MIN_CHINESE_MATCH_LEN - 1, -1):
         for start in range(0, len(abbr_clean) - length + 1):
-            sub = abbr_clean[start:start + length]
-            for full_clean, full_original in fullname_list:
-                if sub in full_clean:
-                    return full_original, 1.0  # 满分匹配
+            idx = find_first_containing(index, abbr_clean[start:start + length])
+            if idx is not None:
+                result = (index['names'][idx][1], 1.0)  # 满分匹配
+                break
+        if result:
+            break
 
     # 第二优先：用 difflib 做模糊匹配兜底
-    best_match, best_ratio = None, 0
-    for full_clean, full_original in fullname_list:
-        ratio = SequenceMatcher(None, abbr_clean, full_clean).ratio()
-        if ratio > best_ratio and ratio >= min_ratio:
-            best_match, best_ratio = full_original, ratio
+    if result is None:
+        result = find_similar(index, abbr_clean, min_ratio)
 
-    return best_match, best_ratio
+    index['memo'][abbr_clean] = result
+    return result
 
 
 # ==============================================================================
@@ -138,11 +225,11 @@ def get_unique_values(file_path, column_index):
         return []
     workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=False)
     sheet = workbook.active
-    values = set()
+    values = {}  # 保持文件中的先后顺序，匹配结果不受集合顺序影响
     for row in sheet.iter_rows(min_row=1, min_col=column_index, max_col=column_index, values_only=True):
         val = clean_text(row[0])
         if val:
-            values.add((val, row[0]))
+            values[(val, row[0])] = None
     workbook.close()
     return list(values)
 
@@ -157,13 +244,14 @@ def complete_abbreviations():
     max_row = preprocess_abbreviation_file(workbook)
     fullname_list = get_unique_values(FULLNAME_EXCEL_PATH, FULLNAME_COLUMN)
     print(f"读取全称 {len(fullname_list)} 条")
+    fullname_index = build_fullname_index(fullname_list)
 
     completed = 0
     for i in range(1, max_row + 1):
         abbr = sheet.cell(row=i, column=ABBR_COLUMN).value
         if not abbr:
             continue
-        match, ratio = find_best_match(abbr, fullname_list, MIN_MATCH_RATIO)
+        match, ratio = find_best_match(abbr, fullname_index, MIN_MATCH_RATIO)
         if match:
             sheet.cell(row=i, column=FULLNAME_TARGET_COLUMN or ABBR_COLUMN).value = match
             completed += 1
@@ -0,0 +1,216 @@
+"""名称统一规则的编译与匹配，供第一部分、第二部分及小工具中的供应商名称替换共用
+
+- 全字段替换规则编译为一个字典：键直接映射到连续替换后的最终值（如 盆架组→盆架组件→盆架
+  编译时一次算好），单元格只需一次字典查找。
+- 包含匹配的关键词（删除关键词、模糊替换规则、供应商简称等）编译为一个 Aho-Corasick 自动机，
+  单元格只需扫描一遍文本，代价与文本长度成正比，与关键词个数无关。
+
+编译结果按规则内容的哈希值缓存在 RULE_CACHE_DIR 下，规则不变时直接加载。
+调用方负责先对规则做与单元格相同的清洗（clean_text），引擎只做字符串的精确比较。
+"""
+import hashlib
+import os
+import pickle
+from collections import deque
+
+RULE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".规则缓存")
+ENGINE_VERSION = 1  # 编译结果结构变化时递增，旧缓存自动失效
+
+# 进程内缓存：规则哈希 -> 编译结果
+_compiled_cache = {}
+
+
+def get_rules_hash(kind, payload):
+    """计算规则内容的哈希值（payload 只包含字符串、整数、None 组成的元组/列表）"""
+    text = repr((ENGINE_VERSION, kind, payload))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def read_cache_file(cache_path):
+    """读取编译缓存，不存在或已损坏时返回None"""
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取规则缓存失败，将重新编译: {e}")
+        return None
+
+
+def write_cache_file(cache_path, compiled):
+    """写入编译缓存（先写临时文件再替换，避免中断时留下损坏的缓存）"""
+    temp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"警告: 无法保存规则缓存，下次运行将重新编译: {e}")
+
+
+def load_compiled(kind, payload, builder, use_cache=True):
+    """按规则哈希加载编译结果，缓存中没有时调用 builder(payload) 编译并保存"""
+    rules_hash = get_rules_hash(kind, payload)
+    if rules_hash in _compiled_cache:
+        return _compiled_cache[rules_hash]
+
+    cache_path = os.path.join(RULE_CACHE_DIR, f"{kind}_{rules_hash[:16]}.pkl")
+    compiled = read_cache_file(cache_path) if use_cache else None
+    if compiled is None:
+        compiled = builder(payload)
+        if use_cache:
+            write_cache_file(cache_path, compiled)
+
+    _compiled_cache[rules_hash] = compiled
+    return compiled
+
+
+# --------------------------
+# 全字段替换规则
+# --------------------------
+def build_exact_map(payload):
+    """将替换规则编译为 {原值: (最终值, 替换次数)}
+
+    与逐轮遍历规则的结果一致：同一个键以列表中第一条规则为准；每轮最多替换一次，
+    最多 max_rounds 轮（None 表示替换到不再变化为止，遇到循环时停止）。
+    """
+    rules, max_rounds = payload
+    first_rule = {}
+    for key, value in rules:
+        first_rule.setdefault(key, value)
+
+    exact_map = {}
+    for key in first_rule:
+        value, steps, seen = key, 0, {key}
+        while max_rounds is None or steps < max_rounds:
+            if value not in first_rule:
+                break
+            value = first_rule[value]
+            steps += 1
+            if max_rounds is None:
+                if value in seen:
+                    break
+                seen.add(value)
+        exact_map[key] = (value, steps)
+    return exact_map
+
+
+def compile_exact_rules(rules, max_rounds=None, use_cache=True):
+    """编译全字段替换规则（rules 为已清洗的 (关键词, 替换值) 列表）"""
+    payload = (tuple((key, value) for key, value in rules), max_rounds)
+    return load_compiled('exact', payload, build_exact_map, use_cache)
+
+
+def apply_exact(exact_map, text):
+    """返回(替换后的值, 替换次数)，没有匹配的规则时原样返回"""
+    return exact_map.get(text, (text, 0))
+
+
+# --------------------------
+# 包含匹配（Aho-Corasick 自动机）
+# --------------------------
+def build_automaton(keywords):
+    """将关键词列表编译为 Aho-Corasick 自动机
+
+    每个状态的输出为该状态匹配到的关键词序号（升序，已合并失败链上的输出）；
+    空关键词包含在任何文本中，单独记录在 always 中。
+    """
+    goto = [{}]
+    outputs = [set()]
+    always = []
+    for idx, keyword in enumerate(keywords):
+        if not keyword:
+            always.append(idx)
+            continue
+        state = 0
+        for char in keyword:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                outputs.append(set())
+            state = next_state
+        outputs[state].add(idx)
+
+    # 按广度优先计算失败指针，并把失败状态的输出合并进来
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            outputs[next_state] |= outputs[fail[next_state]]
+
+    return {
+        'goto': goto,
+        'fail': fail,
+        'outputs': [tuple(sorted(output)) for output in outputs],
+        'always': tuple(always),
+        'size': len(keywords),
+    }
+
+
+def compile_keywords(keywords, use_cache=True):
+    """编译包含匹配的关键词列表（已清洗）"""
+    return load_compiled('keywords', tuple(keywords), build_automaton, use_cache)
+
+
+def iter_matches(automaton, text):
+    """扫描文本，依次产出每个位置匹配到的关键词序号元组"""
+    goto, fail, outputs = automaton['goto'], automaton['fail'], automaton['outputs']
+    state = 0
+    for char in text:
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        if outputs[state]:
+            yield outputs[state]
+
+
+def contains_any(automaton, text):
+    """文本中是否包含任一关键词"""
+    if automaton['always']:
+        return True
+    for _ in iter_matches(automaton, text):
+        return True
+    return False
+
+
+def find_first(automaton, text):
+    """返回文本中包含的关键词里序号最小的一个（即规则列表中最靠前的），没有时返回None"""
+    first = automaton['always'][0] if automaton['always'] else None
+    for matched in iter_matches(automaton, text):
+        if first is None or matched[0] < first:
+            first = matched[0]
+    return first
+
+
+def find_all(automaton, text):
+    """返回文本中包含的所有关键词序号集合"""
+    found = set(automaton['always'])
+    for matched in iter_matches(automaton, text):
+        found.update(matched)
+    return found
+
+
+def compile_fuzzy_rules(rules, use_cache=True):
+    """编译模糊替换规则（包含关键词即替换，多条命中时取列表中最靠前的规则）"""
+    return {
+        'automaton': compile_keywords([key for key, _ in rules], use_cache),
+        'values': [value for _, value in rules],
+    }
+
+
+def apply_fuzzy(fuzzy_rules, text):
+    """返回(替换后的值, 是否替换)"""
+    idx = find_first(fuzzy_rules['automaton'], text)
+    if idx is None:
+        return text, False
+    return fuzzy_rules['values'][idx], True
@@ -1,8 +1,12 @@
+import multiprocessing as mp
 import os
 import re
 import sys
-from wand.image import Image
-from wand.color import Color
+
+from 图纸清单 import load_manifest, save_manifest, scan_folder, rules_tag, code_rules, rename_pending
+from 长图渲染 import pdf_to_long_png, run_parallel, get_worker_budget, MAX_WORKERS
+
+RENAME_RULES_VERSION = 1  # 处理标记包含 normalize_filename 的代码，修改后自动重新规范化；其他影响结果的改动需递增
 
 # ==============================
 # 文件名规范化函数
@@ -30,28 +34,9 @@ def process_single_pdf(pdf_path, dpi=800):
         base_name = os.path.splitext(file_name)[0]
         img_path = os.path.join(file_dir, f"{base_name}.png")
 
-        pages_images = []
-
-        # 打开 PDF，每页处理
-        with Image(filename=pdf_path, resolution=dpi) as pdf:
-            for i, page in enumerate(pdf.sequence):
-                with Image(page) as img:
-                    img.background_color = Color("white")
-                    img.alpha_channel = 'remove'
-                    img.trim()
-                    pages_images.append(img.clone())
-
-        total_height = sum(img.height for img in pages_images)
-        max_width = max(img.width for img in pages_images)
-
-        # 拼接为长图
-        with Image(width=max_width, height=total_height, background=Color("white")) as final_img:
-            y_offset = 0
-            for img in pages_images:
-                final_img.composite(img, left=0, top=y_offset)
-                y_offset += img.height
-            final_img.save(filename=img_path)
-            print(f"✅ 生成长图: {img_path}")
+        # 逐页分段渲染、裁白边后直接拼接写入长图（内存占用有上限）
+        pdf_to_long_png(pdf_path, img_path, dpi, get_worker_budget())
+        print(f"✅ 生成长图: {img_path}")
 
         # 删除原 PDF
         os.remove(pdf_path)
@@ -64,26 +49,26 @@ def process_single_pdf(pdf_path, dpi=800):
 # 批量处理文件夹内 PDF
 # ==============================
 def process_all_pdfs_in_folder(folder_path):
-    for file_name in os.listdir(folder_path):
-        if file_name.lower().endswith(".pdf"):
-            pdf_path = os.path.join(folder_path, file_name)
-            process_single_pdf(pdf_path)
+    pdf_paths = [os.path.join(folder_path, file_name) for file_name in os.listdir(folder_path)
+                 if file_name.lower().endswith(".pdf")]
+    # 多个PDF并行处理
+    run_parallel(process_single_pdf, pdf_paths, MAX_WORKERS)
 
 # ==============================
 # 批量规范化文件名
 # ==============================
 def normalize_folder(folder_path):
-    for root, dirs, files in os.walk(folder_path):
-        for file in files:
-            old_path = os.path.join(root, file)
-            new_name = normalize_filename(file)
-            if new_name != file:
-                new_path = os.path.join(root, new_name)
-                try:
-                    os.rename(old_path, new_path)
-                    print(f"✅ 重命名: {file} → {new_name}")
-                except Exception as e:
-                    print(f"❌ {file} 重命名失败: {e}")
+    # 只规范化上次之后新增或变化的文件（新生成的长图等）
+    manifest = load_manifest(folder_path)
+    scan_folder(folder_path, manifest)
+    try:
+        rename_pending(
+            folder_path, manifest, rules_tag("pdf处理工具", RENAME_RULES_VERSION, code_rules(normalize_filename)),
+            normalize_filename,
+            on_renamed=lambda file, new_name: print(f"✅ 重命名: {file} → {new_name}"),
+            on_error=lambda file, e: print(f"❌ {file} 重命名失败: {e}"))
+    finally:
+        save_manifest(folder_path, manifest)
 
 # ==============================
 # 文件夹一体化处理
@@ -97,6 +82,8 @@ def process_folder(folder_path):
 # 主程序入口
 # ==============================
 if __name__ == "__main__":
+    mp.freeze_support()  # 打包为exe后多进程需要
+
     if len(sys.argv) < 2:
         print("请拖拽文件或文件夹到本程序上运行。")
         input("按回车键退出...")
@@ -0,0 +1,211 @@
+"""图纸归档目录的文件清单，供过滤金蝶图纸、重命名等批量处理共用
+
+清单保存在目录下的 .图纸清单.json，记录每个文件的 (相对路径, 大小, 修改时间, BLAKE2 摘要, 已执行过的处理)。
+- 再次运行时，大小和修改时间都没变的文件视为未变化，沿用上次的摘要和处理记录，
+  重命名规则只需要对新增或变化的文件执行。
+- 判断两个文件内容是否相同时按需计算摘要：先比大小，再比文件头部的摘要，最后才读全文；
+  算过的摘要记在清单里，文件不变就不再重算。
+"""
+import hashlib
+import json
+import os
+import types
+
+MANIFEST_NAME = ".图纸清单.json"
+MANIFEST_VERSION = 1  # 清单结构变化时递增，旧清单自动重建
+HEAD_BYTES = 64 * 1024  # 头部摘要读取的字节数
+READ_BYTES = 1024 * 1024
+
+
+def get_manifest_path(folder):
+    return os.path.join(folder, MANIFEST_NAME)
+
+
+def load_manifest(folder):
+    """读取清单，不存在、已损坏或版本不一致时返回空清单"""
+    try:
+        with open(get_manifest_path(folder), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except FileNotFoundError:
+        pass
+    except (ValueError, OSError) as e:
+        print(f"读取图纸清单失败，将重新建立: {e}")
+    return {"version": MANIFEST_VERSION, "files": {}}
+
+
+def save_manifest(folder, manifest):
+    """保存清单（先写临时文件再替换，避免中断时留下损坏的清单）"""
+    path = get_manifest_path(folder)
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"警告: 无法保存图纸清单，下次运行将重新检查所有文件: {e}")
+
+
+def rules_tag(*rules):
+    """根据处理规则（关键词、正则、版本号等）生成处理标记，规则变化后所有文件都会重新处理"""
+    return hashlib.blake2b(repr(rules).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def code_rules(func):
+    """函数的字节码、常量和引用的名称，传给 rules_tag 后修改函数里的正则等逻辑会自动重新处理
+
+    不读取源码，打包为exe后同样可用；frozenset 常量按文本排序，避免字符串哈希随机化使标记每次不同。
+    """
+    def expand(const):
+        if isinstance(const, types.CodeType):
+            return const.co_code, tuple(expand(c) for c in const.co_consts), const.co_names
+        if isinstance(const, frozenset):
+            return tuple(sorted(repr(c) for c in const))
+        return const
+    return expand(func.__code__)
+
+
+# ==============================
+# 遍历目录
+# ==============================
+def iter_files(folder, sub=""):
+    """递归遍历目录，产出 (相对路径, stat)，顺序与 os.walk 相同（先当前目录的文件，再子目录）
+
+    各级目录中的清单文件（上级或下级目录单独处理时留下的）都不算作图纸。
+    """
+    subdirs = []
+    with os.scandir(os.path.join(folder, sub)) as entries:
+        for entry in entries:
+            rel = os.path.join(sub, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(rel)
+            elif entry.is_file() and not entry.name.startswith(MANIFEST_NAME):
+                yield rel, entry.stat()
+    for rel in subdirs:
+        yield from iter_files(folder, rel)
+
+
+def is_unchanged(entry, stat):
+    return entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns
+
+
+def new_entry(stat):
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def scan_folder(folder, manifest):
+    """遍历目录并更新清单：未变化的文件沿用原记录，新增或变化的文件重新记录，已不存在的文件移除
+
+    返回新增或变化的文件数。
+    """
+    old_files = manifest["files"]
+    files = {}
+    changed = 0
+    for rel, stat in iter_files(folder):
+        entry = old_files.get(rel)
+        if entry is None or not is_unchanged(entry, stat):
+            entry = new_entry(stat)
+            changed += 1
+        files[rel] = entry
+    manifest["files"] = files
+    return changed
+
+
+def get_pending(manifest, tag):
+    """返回还没有执行过 tag 处理的文件（遍历顺序）
+
+    处理过程中文件可能被删除或被重名文件覆盖，调用方处理前应检查是否仍在清单中。
+    """
+    return [rel for rel, entry in manifest["files"].items() if tag not in entry.get("done", ())]
+
+
+# ==============================
+# 记录处理结果
+# ==============================
+def mark_done(manifest, rel, tag):
+    done = manifest["files"][rel].setdefault("done", [])
+    if tag not in done:
+        done.append(tag)
+
+
+def remove_file(manifest, rel):
+    manifest["files"].pop(rel, None)
+
+
+def rename_file(folder, manifest, old_rel, new_rel):
+    """文件重命名后更新清单（内容没变，摘要和处理记录随文件一起转移）"""
+    entry = manifest["files"].pop(old_rel, None)
+    stat = os.stat(os.path.join(folder, new_rel))
+    if entry is None or not is_unchanged(entry, stat):
+        entry = new_entry(stat)
+    manifest["files"][new_rel] = entry
+
+
+def rename_pending(folder, manifest, tag, normalize, on_renamed, on_error):
+    """对未处理过的文件执行文件名规范化：normalize(文件名) 返回新文件名，返回处理的文件数"""
+    pending = get_pending(manifest, tag)
+    for rel in pending:
+        if rel not in manifest["files"]:
+            continue
+        root, file = os.path.split(rel)
+        new_name = normalize(file)
+        new_rel = os.path.join(root, new_name)
+        if new_name != file:
+            try:
+                os.rename(os.path.join(folder, rel), os.path.join(folder, new_rel))
+            except Exception as e:
+                on_error(file, e)
+                continue
+            rename_file(folder, manifest, rel, new_rel)
+            on_renamed(file, new_name)
+        mark_done(manifest, new_rel, tag)
+    return len(pending)
+
+
+# ==============================
+# 内容比较
+# ==============================
+def hash_file(path, limit=None):
+    digest = hashlib.blake2b(digest_size=20)
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(READ_BYTES if remaining is None else min(READ_BYTES, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def get_entry(folder, manifest, rel):
+    """返回文件的清单记录，文件不在清单中或已变化时重新记录"""
+    stat = os.stat(os.path.join(folder, rel))
+    entry = manifest["files"].get(rel)
+    if entry is None or not is_unchanged(entry, stat):
+        entry = manifest["files"][rel] = new_entry(stat)
+    return entry
+
+
+def get_digest(folder, manifest, rel, kind):
+    """按需计算并缓存摘要：kind 为 "head"（文件头部）或 "full"（全文）"""
+    entry = get_entry(folder, manifest, rel)
+    if kind not in entry:
+        if entry["size"] <= HEAD_BYTES:
+            # 小文件的头部就是全文，只读一次
+            entry["head"] = entry["full"] = hash_file(os.path.join(folder, rel))
+        else:
+            entry[kind] = hash_file(os.path.join(folder, rel), HEAD_BYTES if kind == "head" else None)
+    return entry[kind]
+
+
+def same_content(folder, manifest, rel_a, rel_b):
+    """两个文件内容是否完全相同：大小 → 头部摘要 → 全文摘要，逐级比较"""
+    if get_entry(folder, manifest, rel_a)["size"] != get_entry(folder, manifest, rel_b)["size"]:
+        return False
+    for kind in ("head", "full"):
+        if get_digest(folder, manifest, rel_a, kind) != get_digest(folder, manifest, rel_b, kind):
+            return False
+    return True
@@ -1,88 +1,119 @@
 import openpyxl
+from collections import Counter
+from copy import copy
 
 # 文件路径
 file_path = r"E:\System\desktop\PY\图纸归档系统\BOm原档 - 副本.xlsx"
 
-try:
-    # 加载工作簿
-    wb = openpyxl.load_workbook(file_path)
-    ws = wb.active  # 获取当前活跃工作表
-    max_row = ws.max_row  # 最大行数
-
-    # ----------------------
-    # 处理第二列（B列）：
-    # 1. 用B1的值填充下方空单元格（遇到非空则更新复制源）
-    # 2. 填充完成后清空B1
-    # 3. 遍历所有行，若A列和B列同时有值，则清空B列的值
-    # ----------------------
-    first_value_col2 = ws.cell(row=1, column=2).value  # 保存B1初始值
-    current_value = first_value_col2
-
-    if current_value is not None:
-        # 步骤1：填充下方空单元格
-        for row in range(2, max_row + 1):
-            cell = ws.cell(row=row, column=2)
-            if cell.value is None:
-                cell.value = current_value
-            else:
-                current_value = cell.value  # 更新复制源
-
-        # 步骤2：清空B1
-        ws.cell(row=1, column=2).value = None
-
-    # # 步骤3：检查所有行，若A列和B列同时有值，则清空B列
-    # for row in range(1, max_row + 1):
-    #     col1_value = ws.cell(row=row, column=1).value  # 第一列（A列）值
-    #     col2_value = ws.cell(row=row, column=2).value  # 第二列（B列）值
-    #     # 若两列同时存在数值（非空），则清空第二列
-    #     if col1_value is not None and col2_value is not None:
-    #         ws.cell(row=row, column=2).value = None
-
-    # ----------------------
-    # 处理第5、6、7列（E、F、G列）：
-    # 1. 整体向下移动一行
-    # 2. 完成移动后，清空原第一行
-    # ----------------------
-    for col in [5, 6, 7]:
-        # 向下移动一行（从最后一行向上遍历，避免覆盖）
-        for row in range(max_row, 0, -1):
-            ws.cell(row=row + 1, column=col).value = ws.cell(row=row, column=col).value
-        # 清空原第一行
-        ws.cell(row=1, column=col).value = None
-
-    # ----------------------
-    # 去重逻辑（保留首段，删除重复段）
-    # ----------------------
-    seen = set()
-    rows_to_delete = []
+SHIFT_COLUMNS = [5, 6, 7]  # 整体向下移动一行的列（E、F、G列）
+
+
+def read_rows(ws):
+    """一次性读出整张表的值，每行补齐到相同列数（至少到G列）"""
+    width = max(ws.max_column, max(SHIFT_COLUMNS))
+    return [list(row) + [None] * (width - len(row)) for row in ws.iter_rows(values_only=True)], width
+
+
+def fill_column_b(rows):
+    """处理第二列（B列）：
+    1. 用B1的值填充下方空单元格（遇到非空则更新复制源）
+    2. 填充完成后清空B1
+    """
+    if not rows or rows[0][1] is None:
+        return
+    current_value = rows[0][1]
+    for row in rows[1:]:
+        if row[1] is None:
+            row[1] = current_value
+        else:
+            current_value = row[1]  # 更新复制源
+    rows[0][1] = None
+
+
+def shift_columns_down(rows, width):
+    """E、F、G列整体向下移动一行，原第一行清空（表格因此多出一行）"""
+    rows.append([None] * width)
+    for col in SHIFT_COLUMNS:
+        idx = col - 1
+        for r in range(len(rows) - 1, 0, -1):
+            rows[r][idx] = rows[r - 1][idx]
+        rows[0][idx] = None
+
+
+def remove_duplicate_segments(rows):
+    """去重逻辑（保留首段，删除重复段）：A列有值的行到下一个A列有值的行之前为一段
 
-    row = 1
-    while row <= ws.max_row:
-        a_val = ws.cell(row=row, column=1).value
+    返回 (保留的行, 保留的行去重前的行号, 删除的段列表[(编号, 起始行, 结束行)])，行号为去重前的行号。
+    """
+    seen = set()
+    kept = []
+    sources = []
+    removed = []
+    keep = True  # 第一个编号之前的行保留
+    for row_num, row in enumerate(rows, start=1):
+        a_val = row[0]
         if a_val is not None:
-            if a_val in seen:
-                # 重复编号 -> 删除该段
-                start_row = row
-                end_row = row
-                # 找段尾（下一个A有值之前）
-                while end_row + 1 <= ws.max_row and ws.cell(row=end_row + 1, column=1).value is None:
-                    end_row += 1
-                # 标记删除区间
-                rows_to_delete.extend(range(start_row, end_row + 1))
-                row = end_row + 1
-                continue
-            else:
+            keep = a_val not in seen
+            if keep:
                 seen.add(a_val)
-        row += 1
+            else:
+                removed.append([a_val, row_num, row_num])  # 重复编号 -> 删除该段
+        elif not keep:
+            removed[-1][2] = row_num
+        if keep:
+            kept.append(row)
+            sources.append(row_num)
+    return kept, sources, [tuple(segment) for segment in removed]
+
+
+def write_rows(ws, rows, sources, old_row_count):
+    """把处理后的行一次写回工作表，多余的行在末尾一次删除
+
+    sources 为每行去重前的行号：行被上移时单元格格式跟着移动，与逐段 delete_rows 的结果一致。
+    按行号从小到大写入，来源行总在当前行及其下方，复制时还没有被覆盖。
+    """
+    for row_num, (row, source) in enumerate(zip(rows, sources), start=1):
+        for col, value in enumerate(row, start=1):
+            cell = ws.cell(row=row_num, column=col)
+            cell.value = value
+            if source != row_num:
+                cell._style = copy(ws.cell(row=source, column=col)._style)
+    if old_row_count > len(rows):
+        ws.delete_rows(len(rows) + 1, old_row_count - len(rows))
+
+
+def report_removed(removed):
+    removed_rows = sum(end - start + 1 for _, start, end in removed)
+    print(f"删除了 {len(removed)} 个重复段，共 {removed_rows} 行")
+    if removed:
+        counts = Counter(a_val for a_val, _, _ in removed)
+        print("被删除的重复编号（编号: 重复段数，首个重复段的原行号）：")
+        first_segment = {}
+        for a_val, start, end in removed:
+            first_segment.setdefault(a_val, (start, end))
+        for a_val, count in counts.items():
+            start, end = first_segment[a_val]
+            print(f"- {a_val}: {count} 段，第 {start}-{end} 行")
+    return removed_rows
+
+
+if __name__ == "__main__":
+    try:
+        # 加载工作簿
+        wb = openpyxl.load_workbook(file_path)
+        ws = wb.active  # 获取当前活跃工作表
 
-    # 倒序删除，防止索引错乱
-    for r in sorted(rows_to_delete, reverse=True):
-        ws.delete_rows(r, 1)
+        # 整张表读入内存，填充、移动、去重都在内存中完成，最后一次写回
+        rows, width = read_rows(ws)
+        fill_column_b(rows)
+        shift_columns_down(rows, width)
+        kept, sources, removed = remove_duplicate_segments(rows)
+        write_rows(ws, kept, sources, len(rows))
 
-    # 保存修改
-    wb.save(file_path)
-    print(f"✅ 操作完成并去重，已保存：{file_path}")
-    print(f"删除了 {len(rows_to_delete)} 行")
+        # 保存修改
+        wb.save(file_path)
+        print(f"✅ 操作完成并去重，已保存：{file_path}")
+        report_removed(removed)
 
-except Exception as e:
-    print(f"处理过程中发生错误：{str(e)}")
+    except Exception as e:
+        print(f"处理过程中发生错误：{str(e)}")
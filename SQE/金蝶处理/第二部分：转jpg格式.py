@@ -1,6 +1,7 @@
+import multiprocessing as mp
 import os
-from wand.image import Image
-from wand.color import Color
+
+from 长图渲染 import pdf_to_long_png, run_parallel, get_worker_budget, MAX_WORKERS
 
 def process_single_pdf(pdf_path, dpi=500):
     """
@@ -10,42 +11,15 @@ def process_single_pdf(pdf_path, dpi=500):
     3. 拼接为一张长图输出
     4. 覆盖原PDF
     """
+    print(f"开始处理：{pdf_path}")
     try:
         file_dir, file_name = os.path.split(pdf_path)
         base_name = os.path.splitext(file_name)[0]
         img_path = os.path.join(file_dir, f"{base_name}.png")
 
-        pages_images = []
-
-        # 打开PDF，按页处理
-        with Image(filename=pdf_path, resolution=dpi) as pdf:
-            for page in pdf.sequence:
-                with Image(page) as img:
-                    # 转为白底
-                    img.background_color = Color("white")
-                    img.alpha_channel = 'remove'
-
-                    # 自动裁剪
-                    img.trim()
-
-                    # 转成标准Image对象保存到列表
-                    pages_images.append(img.clone())
-
-        # 计算拼接后的总高度和最大宽度
-        total_height = sum(img.height for img in pages_images)
-        max_width = max(img.width for img in pages_images)
-
-        # 创建一张新图用于拼接
-        with Image(width=max_width, height=total_height, background=Color("white")) as final_img:
-            y_offset = 0
-            for img in pages_images:
-                # 将每页贴上去
-                final_img.composite(img, left=0, top=y_offset)
-                y_offset += img.height
-
-            # 保存最终拼接图
-            final_img.save(filename=img_path)
-            print(f"已生成长图：{img_path}")
+        # 逐页分段渲染为白底图片、裁剪白边，直接拼接写入长图（内存占用有上限）
+        pdf_to_long_png(pdf_path, img_path, dpi, get_worker_budget())
+        print(f"已生成长图：{img_path}")
 
         # 删除原PDF
         os.remove(pdf_path)
@@ -61,15 +35,15 @@ def process_all_pdfs_in_folder(folder_path):
         print(f"错误：文件夹 {folder_path} 不存在")
         return
 
-    for file_name in os.listdir(folder_path):
-        if file_name.lower().endswith(".pdf"):
-            pdf_path = os.path.join(folder_path, file_name)
-            print(f"开始处理：{pdf_path}")
-            process_single_pdf(pdf_path)
+    pdf_paths = [os.path.join(folder_path, file_name) for file_name in os.listdir(folder_path)
+                 if file_name.lower().endswith(".pdf")]
+    print(f"共 {len(pdf_paths)} 个PDF，使用 {min(MAX_WORKERS, max(len(pdf_paths), 1))} 个进程并行处理")
+    run_parallel(process_single_pdf, pdf_paths, MAX_WORKERS)
 
     print("所有PDF处理完毕")
 
 
 if __name__ == "__main__":
+    mp.freeze_support()  # 打包为exe后多进程需要
     target_folder = r"E:\System\desktop\PY\BOMM"
     process_all_pdfs_in_folder(target_folder)
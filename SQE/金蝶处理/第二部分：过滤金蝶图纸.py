@@ -1,6 +1,9 @@
 import os
 import re
 
+from 图纸清单 import (load_manifest, save_manifest, scan_folder, rules_tag, get_pending, mark_done,
+                  remove_file, rename_file, same_content)
+
 # =========================
 # 配置区域
 # =========================
@@ -9,6 +12,15 @@ folder_path = r"E:\System\desktop\PY\BOMM"
 # 删除关键词（文件名中包含这些词就删除）
 delete_keywords = ["SOP", "控制", "承认书", "报告", "外形图", "定位治具", "变更"]
 
+# 特殊清理规则
+clean_patterns = [
+    (r"（\d+）", ""),        # 中文括号数字
+    (r"\(\d+\)", ""),        # 英文括号数字
+    (r"Model\s*\(\d+\)", ""),  # Model (1)
+    (r"\s*\d+-\d+-\d+", ""),   # 例如 23-9-9
+]
+RULES_VERSION = 1  # 修改 clean_filename 的逻辑后递增，所有文件会重新处理
+
 # =========================
 # 文件重命名逻辑
 # =========================
@@ -21,13 +33,7 @@ def clean_filename(filename):
             return None
 
     # === 特殊清理逻辑 ===
-    patterns = [
-        (r"（\d+）", ""),        # 中文括号数字
-        (r"\(\d+\)", ""),        # 英文括号数字
-        (r"Model\s*\(\d+\)", ""),  # Model (1)
-        (r"\s*\d+-\d+-\d+", ""),   # 例如 23-9-9
-    ]
-    for pattern, repl in patterns:
+    for pattern, repl in clean_patterns:
         name = re.sub(pattern, repl, name)
 
     # === 提取第一个9位数字主型号 ===
@@ -48,46 +54,70 @@ def clean_filename(filename):
 # =========================
 # 遍历文件夹并处理
 # =========================
-for root, _, files in os.walk(folder_path):
-    for file in files:
-        old_path = os.path.join(root, file)
-        new_name = clean_filename(file)
-
-        # 删除关键词或空名文件
-        if new_name is None:
+def process_file(folder, manifest, rel, tag):
+    """处理单个文件：删除、去重或重命名，处理完成的文件记入清单"""
+    root, file = os.path.split(rel)
+    old_path = os.path.join(folder, rel)
+    new_name = clean_filename(file)
+
+    # 删除关键词或空名文件
+    if new_name is None:
+        try:
+            os.remove(old_path)
+            remove_file(manifest, rel)
+            print(f"❌ 删除: {file}")
+        except PermissionError:
+            print(f"⚠️ 无法删除（权限或占用）：{file}")
+        return
+
+    new_rel = os.path.join(root, new_name)
+    new_path = os.path.join(folder, new_rel)
+
+    # 如果重名，进行内容比较（大小 → 头部摘要 → 全文摘要）
+    if os.path.exists(new_path) and not os.path.samefile(new_path, old_path):
+        if same_content(folder, manifest, rel, new_rel):
+            print(f"🟡 跳过重复（内容相同）：{file}")
             try:
                 os.remove(old_path)
-                print(f"❌ 删除: {file}")
+                remove_file(manifest, rel)
             except PermissionError:
-                print(f"⚠️ 无法删除（权限或占用）：{file}")
-            continue
-
-        new_path = os.path.join(root, new_name)
-
-        # 如果重名，进行内容比较
-        if os.path.exists(new_path) and new_path != old_path:
-            old_size = os.path.getsize(old_path)
-            new_size = os.path.getsize(new_path)
-
-            if old_size == new_size:
-                print(f"🟡 跳过重复（内容相同）：{file}")
-                try:
-                    os.remove(old_path)
-                except PermissionError:
-                    print(f"⚠️ 无法删除重复文件（权限）：{file}")
-                continue
-            else:
-                print(f"⚠️ 删除旧重名文件（不同内容）：{new_path}")
-                try:
-                    os.remove(new_path)
-                except PermissionError:
-                    print(f"⚠️ 无法删除旧文件（权限）：{new_path}")
-                    continue
-
-        # 执行重命名
-        if new_name != file:
+                print(f"⚠️ 无法删除重复文件（权限）：{file}")
+            return
+        else:
+            print(f"⚠️ 删除旧重名文件（不同内容）：{new_path}")
             try:
-                os.rename(old_path, new_path)
-                print(f"✅ 重命名: {file} → {new_name}")
+                os.remove(new_path)
+                remove_file(manifest, new_rel)
             except PermissionError:
-                print(f"⚠️ 无法重命名（被占用或权限不足）：{file}")
+                print(f"⚠️ 无法删除旧文件（权限）：{new_path}")
+                return
+
+    # 执行重命名
+    if new_name != file:
+        try:
+            os.rename(old_path, new_path)
+            rename_file(folder, manifest, rel, new_rel)
+            print(f"✅ 重命名: {file} → {new_name}")
+        except PermissionError:
+            print(f"⚠️ 无法重命名（被占用或权限不足）：{file}")
+            return
+    mark_done(manifest, new_rel, tag)
+
+
+def filter_folder(folder):
+    """只处理上次运行之后新增或变化的文件（以及规则变化后的所有文件）"""
+    manifest = load_manifest(folder)
+    changed = scan_folder(folder, manifest)
+    tag = rules_tag("过滤金蝶图纸", RULES_VERSION, delete_keywords, clean_patterns)
+    pending = get_pending(manifest, tag)
+    print(f"共 {len(manifest['files'])} 个文件，新增或变化 {changed} 个，需要处理 {len(pending)} 个")
+    try:
+        for rel in pending:
+            if rel in manifest["files"]:  # 可能已作为重名文件被删除
+                process_file(folder, manifest, rel, tag)
+    finally:
+        save_manifest(folder, manifest)
+
+
+if __name__ == "__main__":
+    filter_folder(folder_path)
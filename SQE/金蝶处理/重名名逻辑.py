@@ -1,8 +1,11 @@
 import os
 import re
 
+from 图纸清单 import load_manifest, save_manifest, scan_folder, rules_tag, code_rules, rename_pending
+
 # ===== 配置路径 =====
 folder_path = r"Z:\\3-品质部\\实验室\\邓洋枢\\3-规格书\\新建文件夹\\新建文件夹 (2)\\07.受控图纸"
+RULES_VERSION = 1  # 处理标记包含 normalize_filename 的代码，修改后自动重新处理；其他影响结果的改动需递增
 
 # ===== 文件名处理函数 =====
 def normalize_filename(name):
@@ -38,15 +41,20 @@ def normalize_filename(name):
     return base + ext
 
 
-# ===== 遍历文件并重命名 =====
-for root, dirs, files in os.walk(folder_path):
-    for file in files:
-        old_path = os.path.join(root, file)
-        new_name = normalize_filename(file)
-        if new_name != file:
-            new_path = os.path.join(root, new_name)
-            try:
-                os.rename(old_path, new_path)
-                print(f"✅ {file} → {new_name}")
-            except Exception as e:
-                print(f"❌ 重命名失败 {file}: {e}")
+# ===== 遍历文件并重命名（只处理新增或变化的文件） =====
+def rename_folder(folder):
+    manifest = load_manifest(folder)
+    changed = scan_folder(folder, manifest)
+    tag = rules_tag("重名名逻辑", RULES_VERSION, code_rules(normalize_filename))
+    try:
+        processed = rename_pending(
+            folder, manifest, tag, normalize_filename,
+            on_renamed=lambda file, new_name: print(f"✅ {file} → {new_name}"),
+            on_error=lambda file, e: print(f"❌ 重命名失败 {file}: {e}"))
+    finally:
+        save_manifest(folder, manifest)
+    print(f"共 {len(manifest['files'])} 个文件，新增或变化 {changed} 个，本次检查 {processed} 个")
+
+
+if __name__ == "__main__":
+    rename_folder(folder_path)
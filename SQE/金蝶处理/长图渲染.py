@@ -0,0 +1,163 @@
+"""PDF图纸转长图：逐页分段渲染、裁剪白边，按行流式写入PNG，内存占用有上限
+
+- 每页按横向分段渲染（PyMuPDF 的 clip），每段的像素数由内存预算决定，不会一次渲染整页。
+- 第一遍渲染时计算裁剪框（与 ImageMagick 的 trim 相同：去掉与左上角颜色相同的边），
+  渲染结果压缩后暂存到临时文件；第二遍按段读出、裁剪、右侧补白，直接压缩写入PNG。
+- 任何时候内存中只有一个分段，与页数和长图的总尺寸无关。
+"""
+import os
+import struct
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+import numpy as np
+
+MEMORY_LIMIT_MB = 2048  # 所有进程合计的渲染内存上限
+MAX_WORKERS = max(1, (os.cpu_count() or 1) - 1)  # 并行处理PDF的进程数
+WORK_COPIES = 4  # 一个分段在处理时同时存在的副本数（像素缓冲、比较结果、裁剪补白、压缩数据）
+PNG_COMPRESS_LEVEL = 6
+IDAT_SIZE = 1 << 20  # PNG 中每个 IDAT 块的大小
+
+
+def get_worker_budget(max_workers=MAX_WORKERS, memory_limit_mb=MEMORY_LIMIT_MB):
+    """每个进程可用的渲染内存（字节）"""
+    return memory_limit_mb * 1024 * 1024 // max(1, max_workers)
+
+
+# ==============================
+# 第一遍：分段渲染、计算裁剪框
+# ==============================
+def render_page_bands(page, zoom, budget_bytes):
+    """分段渲染一页，依次产出每段的 RGB 数组（高, 宽, 3）"""
+    rect = page.rect
+    matrix = fitz.Matrix(zoom, zoom)
+    width_px = max(1, round(rect.width * zoom))
+    height_px = max(1, round(rect.height * zoom))
+    band_px = max(1, budget_bytes // (width_px * 3 * WORK_COPIES))
+
+    for top in range(0, height_px, band_px):
+        bottom = min(top + band_px, height_px)
+        clip = fitz.Rect(rect.x0, rect.y0 + top / zoom, rect.x1, rect.y0 + bottom / zoom)
+        pix = page.get_pixmap(matrix=matrix, clip=clip, colorspace=fitz.csRGB, alpha=False)
+        if pix.height == 0 or pix.width == 0:
+            continue
+        samples = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+        yield samples[:, :pix.width * 3].reshape(pix.height, pix.width, 3)
+
+
+def scan_page(page, zoom, budget_bytes, spool):
+    """渲染一页，各段压缩后写入临时文件
+
+    返回 (裁剪框 (上, 下, 左, 右)，整页为背景色时为None, 分段列表 [(起始行, 高, 宽, 文件偏移, 长度)])
+    """
+    bands = []
+    background = None
+    top = bottom = left = right = None
+    row = 0
+    for band in render_page_bands(page, zoom, budget_bytes):
+        if background is None:
+            background = band[0, 0].copy()
+        mask = np.any(band != background, axis=2)
+        rows = np.flatnonzero(mask.any(axis=1))
+        if len(rows):
+            cols = np.flatnonzero(mask.any(axis=0))
+            if top is None:
+                top, left, right = row + rows[0], cols[0], cols[-1] + 1
+            else:
+                left, right = min(left, cols[0]), max(right, cols[-1] + 1)
+            bottom = row + rows[-1] + 1
+        del mask
+
+        data = zlib.compress(band.tobytes(), 1)
+        bands.append((row, band.shape[0], band.shape[1], spool.tell(), len(data)))
+        spool.write(data)
+        row += band.shape[0]
+
+    box = None if top is None else (int(top), int(bottom), int(left), int(right))
+    return box, bands
+
+
+# ==============================
+# 第二遍：裁剪、拼接、写入PNG
+# ==============================
+def iter_page_rows(spool, box, bands, width):
+    """依次产出裁剪后的行块（右侧补白到长图宽度），形状为 (行数, width * 3)"""
+    top, bottom, left, right = box
+    for row, height, band_width, offset, length in bands:
+        start, end = max(top - row, 0), min(bottom - row, height)
+        if start >= end:
+            continue
+        spool.seek(offset)
+        band = np.frombuffer(zlib.decompress(spool.read(length)), dtype=np.uint8).reshape(height, band_width, 3)
+        block = np.full((end - start, width, 3), 255, dtype=np.uint8)
+        block[:, :right - left] = band[start:end, left:right]
+        yield block.reshape(end - start, width * 3)
+
+
+def write_chunk(f, tag, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(tag)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def write_png(path, width, height, blocks):
+    """按行块流式写入 RGB PNG（每行使用 Up 过滤，图纸上下相邻行相似，压缩率更高）"""
+    compressor = zlib.compressobj(PNG_COMPRESS_LEVEL)
+    previous = np.zeros(width * 3, dtype=np.uint8)
+    pending = bytearray()
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        write_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        for block in blocks:
+            filtered = np.empty((block.shape[0], block.shape[1] + 1), dtype=np.uint8)
+            filtered[:, 0] = 2  # Up
+            filtered[0, 1:] = block[0] - previous
+            filtered[1:, 1:] = block[1:] - block[:-1]
+            previous = block[-1].copy()
+            pending += compressor.compress(filtered.tobytes())
+            while len(pending) >= IDAT_SIZE:
+                write_chunk(f, b"IDAT", bytes(pending[:IDAT_SIZE]))
+                del pending[:IDAT_SIZE]
+        pending += compressor.flush()
+        write_chunk(f, b"IDAT", bytes(pending))
+        write_chunk(f, b"IEND", b"")
+
+
+def pdf_to_long_png(pdf_path, png_path, dpi, budget_bytes=None):
+    """将PDF每页裁掉白边后上下拼接为一张长图（左对齐，右侧补白），返回长图的 (宽, 高)"""
+    budget_bytes = budget_bytes or get_worker_budget(1)
+    zoom = dpi / 72
+    with tempfile.TemporaryFile() as spool:
+        with fitz.open(pdf_path) as doc:
+            pages = [scan_page(page, zoom, budget_bytes, spool) for page in doc]
+        pages = [(box, bands) for box, bands in pages if box is not None]  # 整页空白的页裁剪后没有内容
+
+        width = max((right - left for (_, _, left, right), _ in pages), default=1)
+        height = sum(bottom - top for (top, bottom, _, _), _ in pages) or 1
+        if pages:
+            blocks = (block for box, bands in pages for block in iter_page_rows(spool, box, bands, width))
+        else:
+            blocks = [np.full((1, 3), 255, dtype=np.uint8)]
+
+        # 先写临时文件，完整写完再替换，中途出错不会留下残缺的图片
+        temp_path = png_path + ".tmp"
+        try:
+            write_png(temp_path, width, height, blocks)
+            os.replace(temp_path, png_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return width, height
+
+
+def run_parallel(func, pdf_paths, max_workers=MAX_WORKERS):
+    """多进程处理多个PDF，func(pdf_path) 须为模块级函数"""
+    if max_workers <= 1 or len(pdf_paths) <= 1:
+        for pdf_path in pdf_paths:
+            func(pdf_path)
+        return
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(pdf_paths))) as executor:
+        list(executor.map(func, pdf_paths))
@@ -2,6 +2,28 @@ import pandas as pd
 import os
 
 
+def find_first_fullnames(short_names, full_names):
+    """为每个简称找到第一个包含它的全称（按全称列表顺序，跳过空全称），返回 {简称: 全称}
+
+    简称放进集合，每个全称只按简称出现过的长度取子串查集合，不再逐个简称遍历全称列表。
+    """
+    shorts = {short for short in short_names if short.strip() != ''}
+    lengths = sorted({len(short) for short in shorts})
+
+    first_full = {}
+    for full in full_names:
+        if len(first_full) == len(shorts):
+            break
+        if full.strip() == '':
+            continue
+        for size in lengths:
+            for start in range(len(full) - size + 1):
+                piece = full[start:start + size]
+                if piece in shorts:
+                    first_full.setdefault(piece, full)
+    return first_full
+
+
 def match_supplier_names(file_path):
     """
     匹配供应商简称和全称，将结果写入第三、四列，并打印未匹配的记录
@@ -31,6 +53,9 @@ def match_supplier_names(file_path):
         # 存储未匹配的记录
         unmatched_records = []
 
+        # 一次性为所有简称查找第一个包含它的全称
+        first_full = find_first_fullnames(short_names, full_names)
+
         # 遍历每个简称，查找匹配的全称
         for idx, short in enumerate(short_names):
             if short.strip() == '':
@@ -39,13 +64,10 @@ def match_supplier_names(file_path):
                 continue
 
             # 查找包含该简称的全称
-            match_found = False
-            for full in full_names:
-                if short in full and full.strip() != '':
-                    matched_short.append(short)
-                    matched_full.append(full)
-                    match_found = True
-                    break
+            match_found = short in first_full
+            if match_found:
+                matched_short.append(short)
+                matched_full.append(first_full[short])
 
             # 如果没有找到匹配项
             if not match_found: